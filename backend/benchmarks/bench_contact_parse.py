@@ -0,0 +1,300 @@
+"""
+Micro-benchmark: per-contact parse cost of Contacts.xml, XPath searches vs ModelIndex.
+
+Builds a synthetic Cellebrite report (100k contacts by default), streams it with
+iter_report_models and runs both extractors over every Contact model, checking that
+they produce identical records.
+
+Usage (from backend/):
+    python benchmarks/bench_contact_parse.py [--contacts 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+
+import server  # noqa: E402
+
+
+def _field(name: str, text: str) -> str:
+    return f'<field name="{name}" type="String"><value type="String"><![CDATA[{text}]]></value></field>'
+
+
+def _entry(model_type: str, value: str, category: str) -> str:
+    return f'<model type="{model_type}">{_field("Category", category)}{_field("Value", value)}{_field("Domain", "Entries")}</model>'
+
+
+def _contact(rng: random.Random, i: int) -> str:
+    phone = f"407{rng.randint(10000000, 99999999)}"
+    whatsapp = rng.random() < 0.6
+    parts = [_field('UserMapping', 'False'), _field('Source', 'WhatsApp' if whatsapp else 'Phone'),
+             _field('Account', f'account{i % 7}'), _field('Name', f'Contact {i}')]
+    entries = [_entry('PhoneNumber', '+' + phone, 'Mobile')]
+    if whatsapp:
+        entries.append(_entry('UserID', f'{phone}@s.whatsapp.net', 'WhatsApp'))
+    if rng.random() < 0.3:
+        entries.append(_entry('Email', f'user{i}@gmail.com', 'Home'))
+    parts.append(f'<multiModelField name="Entries" type="ContactEntry">{"".join(entries)}</multiModelField>')
+    if rng.random() < 0.5:
+        local_path = f'files\\Image\\{phone}-1482251074.thumb'
+        parts.append('<multiModelField name="Photos" type="ContactPhoto"><model type="ContactPhoto">'
+                     f'{_field("Name", local_path.split(chr(92))[-1])}'
+                     f'<metadata section="File"><item name="Local Path"><![CDATA[{local_path}]]></item></metadata>'
+                     '</model></multiModelField>')
+    if whatsapp and rng.random() < 0.3:
+        parts.append('<multiModelField name="AdditionalInfo" type="KeyValueModel"><model type="KeyValueModel">'
+                     f'{_field("Key", "Group in common")}{_field("Value", f"1203634{i % 50}@g.us Group {i % 50}")}'
+                     '</model></multiModelField>')
+    return f'<model type="Contact" id="c{i}" deleted_state="Intact" extractionId="0">{"".join(parts)}</model>'
+
+
+def write_report(path: str, contacts: int):
+    rng = random.Random(42)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<?xml version="1.0" encoding="utf-8"?><project name="Bench" xmlns="{server.CELLEBRITE_NS}">'
+                '<decodedData><modelType type="Contact">')
+        for i in range(contacts):
+            f.write(_contact(rng, i))
+        f.write('</modelType></decodedData></project>')
+
+
+def legacy_contact_from_model(contact_model: ET.Element) -> Optional[Dict[str, Any]]:
+    """Previous implementation: one `.//ns:` descendant search per extraction rule"""
+    ns = server.CELLEBRITE_NSMAP
+    
+    contact_data = {
+        'extraction_id': contact_model.get('extractionId'),
+        'deleted_state': contact_model.get('deleted_state'),
+    }
+    
+    # Store ALL XML fields in raw_data for complete view
+    raw_fields = {}
+    for field in contact_model.findall('.//ns:field', ns):
+        field_name = field.get('name')
+        field_value = field.find('ns:value', ns)
+        if field_value is not None and field_value.text:
+            raw_fields[field_name] = field_value.text
+    
+    # Store all sub-models (PhoneNumber, Email, UserID, etc.)
+    raw_models = {}
+    for sub_model in contact_model.findall('.//ns:model', ns):
+        model_type = sub_model.get('type')
+        if model_type and model_type != 'Contact':
+            if model_type not in raw_models:
+                raw_models[model_type] = []
+            model_data = {}
+            for field in sub_model.findall('.//ns:field', ns):
+                field_name = field.get('name')
+                field_value = field.find('ns:value', ns)
+                if field_value is not None and field_value.text:
+                    model_data[field_name] = field_value.text
+            if model_data:
+                raw_models[model_type].append(model_data)
+    
+    # Get source
+    source_field = contact_model.find('.//ns:field[@name="Source"]', ns)
+    if source_field is not None:
+        source_value = source_field.find('ns:value', ns)
+        if source_value is not None:
+            contact_data['source'] = source_value.text
+    
+    # Get account
+    account_field = contact_model.find('.//ns:field[@name="Account"]', ns)
+    if account_field is not None:
+        account_value = account_field.find('ns:value', ns)
+        if account_value is not None:
+            contact_data['account'] = account_value.text
+    
+    # Get name - IMPORTANT: Only look for direct child Name field, not nested in ContactPhoto
+    # Use ns:field to only search direct children, not .//ns:field which searches all descendants
+    name_field = None
+    for field in contact_model.findall('ns:field', ns):
+        if field.get('name') == 'Name':
+            name_value = field.find('ns:value', ns)
+            if name_value is not None and name_value.text:
+                # Validate this is a real name, not a photo filename or encoded placeholder
+                name_text = name_value.text.strip()
+    
+                # Skip invalid names:
+                # 1. Photo filenames (.thumb, .jpg, .j, etc.)
+                # 2. Base64 encoded placeholders (+EAA=, +EAB=, etc.)
+                # 3. Phone-timestamp patterns (40721208508-1482251074)
+                is_invalid = False
+    
+                # Check for photo filename patterns
+                if any(ext in name_text for ext in ['.thumb', '.jpg', '.jpeg', '.png', '.j']):
+                    is_invalid = True
+                # Check for phone-timestamp pattern
+                elif len(name_text) > 10 and '-' in name_text and name_text.split('-')[0].isdigit():
+                    is_invalid = True
+                # Check for base64 encoded placeholders (like +EAA=, +EAB=, etc.)
+                elif name_text.startswith('+') and '=' in name_text and len(name_text) < 10:
+                    is_invalid = True
+                # Check for just "+" or empty-ish values
+                elif name_text in ['+', '-', 'null', 'None', '']:
+                    is_invalid = True
+    
+                if not is_invalid:
+                    contact_data['name'] = name_text
+            break
+    
+    # Extract photo path from ContactPhoto model
+    # Two possible sources: 
+    # 1. Local Path in metadata (iOS style): files\Image\40721208508-1482251074.thumb
+    # 2. contactphoto_extracted_path (Android style): contacts\WhatsApp_...\ID\filename.j
+    photo_models = contact_model.findall('.//ns:model[@type="ContactPhoto"]', ns)
+    if photo_models:
+        for photo_model in photo_models:
+            # Try Strategy 1: Local Path from metadata
+            local_path_elem = photo_model.find('.//ns:metadata[@section="File"]/ns:item[@name="Local Path"]', ns)
+            if local_path_elem is not None and local_path_elem.text:
+                # Local Path format: files\Image\40721208508-1482251074.thumb
+                photo_filename = local_path_elem.text.replace('\\', '/').split('/')[-1]
+                contact_data['photo_filename'] = photo_filename
+                # Also store full path for direct matching
+                contact_data['photo_local_path'] = local_path_elem.text.replace('\\', '/')
+                break
+    
+            # Try Strategy 2: contactphoto_extracted_path field
+            extracted_path_elem = photo_model.find('.//ns:field[@name="contactphoto_extracted_path"]/ns:value', ns)
+            if extracted_path_elem is not None and extracted_path_elem.text:
+                # Path format: contacts\WhatsApp_...\ID\filename.j
+                extracted_path = extracted_path_elem.text.replace('\\', '/')
+                photo_filename = extracted_path.split('/')[-1]
+                contact_data['photo_filename'] = photo_filename
+                contact_data['photo_extracted_path'] = extracted_path
+                break
+    
+    # Get phone numbers
+    # For WhatsApp contacts, prioritize extracting phone from user_id
+    # because user_id contains the actual WhatsApp phone number
+    phone_from_phonenumber_model = None
+    phone_models = contact_model.findall('.//ns:model[@type="PhoneNumber"]', ns)
+    if phone_models:
+        phone_value_elem = phone_models[0].find('.//ns:field[@name="Value"]/ns:value', ns)
+        if phone_value_elem is not None:
+            phone_from_phonenumber_model = phone_value_elem.text
+    
+    # Get email
+    email_models = contact_model.findall('.//ns:model[@type="Email"]', ns)
+    if email_models:
+        email_value_elem = email_models[0].find('.//ns:field[@name="Value"]/ns:value', ns)
+        if email_value_elem is not None:
+            contact_data['email'] = email_value_elem.text
+    
+    # Get user IDs (Facebook ID, Instagram ID, WhatsApp ID, etc.)
+    userid_models = contact_model.findall('.//ns:model[@type="UserID"]', ns)
+    extracted_user_id = None
+    if userid_models:
+        userid_value_elem = userid_models[0].find('.//ns:field[@name="Value"]/ns:value', ns)
+        category_elem = userid_models[0].find('.//ns:field[@name="Category"]/ns:value', ns)
+        if userid_value_elem is not None:
+            extracted_user_id = userid_value_elem.text
+            contact_data['user_id'] = userid_value_elem.text
+        if category_elem is not None:
+            contact_data['category'] = category_elem.text
+    
+    # Determine which phone number to use
+    # For WhatsApp contacts: Extract phone from user_id (e.g., 40751601949@s.whatsapp.net -> +40751601949)
+    # For other contacts: Use PhoneNumber model
+    source = contact_data.get('source', '')
+    if source == 'WhatsApp' and extracted_user_id and '@s.whatsapp.net' in extracted_user_id:
+        # Extract phone number from WhatsApp user_id
+        phone_digits = extracted_user_id.split('@')[0]
+        if phone_digits.isdigit():
+            contact_data['phone'] = '+' + phone_digits
+    elif phone_from_phonenumber_model:
+        # Use phone from PhoneNumber model for non-WhatsApp contacts
+        contact_data['phone'] = phone_from_phonenumber_model
+    
+    # Extract WhatsApp group memberships from AdditionalInfo
+    whatsapp_groups = []
+    additional_info_models = contact_model.findall('.//ns:multiModelField[@name="AdditionalInfo"]/ns:model[@type="KeyValueModel"]', ns)
+    for kv_model in additional_info_models:
+        key_elem = kv_model.find('.//ns:field[@name="Key"]/ns:value', ns)
+        value_elem = kv_model.find('.//ns:field[@name="Value"]/ns:value', ns)
+        if key_elem is not None and value_elem is not None:
+            if key_elem.text == "Group in common" and value_elem.text:
+                # Value format: "40765261003-1601966684@g.us Group Name"
+                whatsapp_groups.append(value_elem.text)
+    
+    if whatsapp_groups:
+        contact_data['whatsapp_groups'] = whatsapp_groups
+    
+    contact_data['raw_data'] = {
+        'xml_id': contact_model.get('id'),
+        'fields': raw_fields,
+        'models': raw_models
+    }
+    
+    # Only add contact if it has a phone number AND it's not a WhatsApp group/newsletter/broadcast/bot/lid
+    # Check both phone and user_id for group identifiers
+    phone = contact_data.get('phone', '')
+    user_id = contact_data.get('user_id', '')
+    
+    # Skip if it's a WhatsApp group/newsletter/broadcast/bot/business account
+    # Identifiers: @g.us (groups), @broadcast (broadcasts), @newsletter (channels), @lid (business), @bot (bots)
+    whatsapp_system_identifiers = ['@g.us', '@broadcast', '@newsletter', '@lid', '@bot']
+    
+    is_whatsapp_system = False
+    for identifier in whatsapp_system_identifiers:
+        if identifier in phone or identifier in user_id:
+            is_whatsapp_system = True
+            break
+    
+    if phone and not is_whatsapp_system:
+        return contact_data
+    return None
+
+
+def indexed_contact_from_model(contact_model: ET.Element) -> Optional[Dict[str, Any]]:
+    return server._contact_from_model(server.ModelIndex.build(contact_model))
+
+
+def run(path: str, extractor) -> Dict[str, Any]:
+    records = []
+    elapsed = 0.0
+    models = 0
+    for contact_model in server.iter_report_models(path, 'Contact'):
+        start = time.perf_counter()
+        record = extractor(contact_model)
+        elapsed += time.perf_counter() - start
+        models += 1
+        if record:
+            records.append(record)
+    return {'elapsed': elapsed, 'models': models, 'records': records}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contacts', type=int, default=100000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        report = os.path.join(temp_dir, 'Contacts.xml')
+        write_report(report, args.contacts)
+        print(f"Synthetic report: {args.contacts} contacts, {os.path.getsize(report) / 1e6:.1f} MB")
+        
+        before = run(report, legacy_contact_from_model)
+        after = run(report, indexed_contact_from_model)
+    
+    if before['records'] != after['records']:
+        sys.exit("Extractors disagree - ModelIndex output differs from the XPath implementation")
+    
+    for label, result in (('xpath (before)', before), ('ModelIndex (after)', after)):
+        per_contact = result['elapsed'] / result['models'] * 1e6
+        print(f"{label:>20}: {result['elapsed']:.2f}s total, {per_contact:.1f} us/contact")
+    print(f"{'speedup':>20}: {before['elapsed'] / after['elapsed']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
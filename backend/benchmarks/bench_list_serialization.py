@@ -0,0 +1,115 @@
+"""
+Micro-benchmark: list endpoint serialization, response_model=List[Model] vs the ?fast=true path.
+
+Builds synthetic stored documents shaped like the list projections of contacts, passwords
+and user_accounts (200k contacts by default) and serializes them the way FastAPI does for
+response_model (validate + JSON mode dump + json.dumps) and with FastListEncoder (orjson),
+checking that both produce the same JSON.
+
+Usage (from backend/):
+    python benchmarks/bench_list_serialization.py [--rows 200000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+
+from fastapi import Response  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import server  # noqa: E402
+
+
+def stored_row(rng: random.Random, i: int, kind: str) -> Dict[str, Any]:
+    """A document as the list endpoint reads it: list projection applied, naive UTC datetimes"""
+    common = {'case_number': f'CASE-{i % 5}', 'person_name': f'Suspect {i % 11}', 'device_info': 'Apple iPhone 12',
+              'upload_session_id': f'session-{i % 17}'}
+    if kind == 'contacts':
+        phone = f'07{rng.randint(10000000, 99999999)}'
+        doc = server.Contact(**common, source=rng.choice(['WhatsApp', 'Phone', 'Telegram']), account=f'account{i % 7}',
+                             name=f'Contact {i}', phone=phone, **server.phone_keys(phone),
+                             whatsapp_groups=[f'1203634{i % 50}@g.us Group {i % 50}'] if i % 3 == 0 else None)
+        projection = server.CONTACT_LIST_PROJECTION
+    elif kind == 'passwords':
+        doc = server.Password(**common, application=rng.choice(['Chrome', 'Safari', 'Keychain']), username=f'user{i}@gmail.com',
+                              password=f'secret{i % 997}', url=f'https://site{i % 300}.example', email_domain='gmail.com',
+                              raw_data={'fields': {'Account': f'user{i}', 'Type': 'Web', 'Source': 'Chrome'}})
+        projection = server.PASSWORD_LIST_PROJECTION
+    else:
+        doc = server.UserAccount(**common, source=rng.choice(['WhatsApp', 'Instagram', 'Google']), username=f'user{i}',
+                                 user_id=str(10000000 + i), email=f'user{i}@gmail.com', email_domain='gmail.com',
+                                 raw_data={'fields': {'ServiceIdentifier': 'com.google', 'Type': 'Account'}})
+        projection = server.USER_ACCOUNT_LIST_PROJECTION
+
+    stored = doc.model_dump()
+    stored['created_at'] = stored['created_at'].replace(tzinfo=None, microsecond=stored['created_at'].microsecond // 1000 * 1000)
+    row = {field: stored.get(field) for field in projection if field != '_id' and '.' not in field}
+    if any(field.startswith('raw_data.') for field in projection):
+        row['raw_data'] = {'fields': {field: value for field, value in stored['raw_data']['fields'].items()
+                                      if f'raw_data.fields.{field}' in projection}}
+    return row
+
+
+def response_model_path(model: type, rows: List[Dict[str, Any]]) -> bytes:
+    """What the endpoint did before: created_at loop, response_model validation + serialization, JSONResponse"""
+    for row in rows:
+        if isinstance(row.get('created_at'), str):
+            row['created_at'] = datetime.fromisoformat(row['created_at'])
+    field = create_response_field(name='Response', type_=List[model])
+    content = asyncio.run(serialize_response(field=field, response_content=rows))
+    return JSONResponse(content).body
+
+
+def fast_path(encoder: 'server.FastListEncoder', rows: List[Dict[str, Any]]) -> bytes:
+    endpoint_response = Response()
+    del endpoint_response.headers['content-length']  # as FastAPI does for the injected response
+    return encoder.response(rows, endpoint_response).body
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    if server.orjson is None:
+        sys.exit("orjson is not installed - the fast path is disabled")
+
+    rng = random.Random(42)
+    cases = (
+        ('contacts', server.Contact, server.CONTACT_FAST_JSON, args.rows),
+        ('passwords', server.Password, server.PASSWORD_FAST_JSON, args.rows // 4),
+        ('user_accounts', server.UserAccount, server.USER_ACCOUNT_FAST_JSON, args.rows // 4),
+    )
+    for kind, model, encoder, count in cases:
+        rows = [stored_row(rng, i, kind) for i in range(count)]
+        before, before_elapsed = timed(response_model_path, model, [dict(row) for row in rows])
+        after, after_elapsed = timed(fast_path, encoder, rows)
+        if json.loads(before) != json.loads(after):
+            sys.exit(f"{kind}: fast path output differs from the response_model path")
+
+        print(f"{kind} ({count} rows, {len(after) / 1e6:.1f} MB)")
+        for label, elapsed in (('response_model (before)', before_elapsed), ('orjson fast path (after)', after_elapsed)):
+            print(f"{label:>26}: {elapsed:.2f}s total, {elapsed / count * 1e6:.1f} us/row")
+        print(f"{'speedup':>26}: {before_elapsed / after_elapsed:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
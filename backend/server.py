@@ -1,5 +1,6 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException
+from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Depends, Query, Request, Response
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -8,9 +9,9 @@ import logging
 import traceback
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple, Union, get_args, get_origin
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import xml.etree.ElementTree as ET
 import zipfile
 import io
@@ -18,8 +19,26 @@ import tempfile
 import shutil
 import base64
 import csv
-from pymongo import MongoClient
+import json
+from pymongo import MongoClient, UpdateOne, ReplaceOne, DeleteMany
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from bson import json_util
 import re
+import time
+import hashlib
+import unicodedata
+import threading
+from collections import OrderedDict
+from queue import Empty, Full
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+import multiprocessing
+import asyncio
+import socket
+
+try:
+    import orjson
+except ImportError:  # optional: ?fast=true then falls back to the response model path
+    orjson = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -51,6 +70,125 @@ def normalize_phone(phone: str) -> str:
     
     return normalized
 
+def phone_keys(phone: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Indexed phone lookup keys stored on each contact: normalized_phone and phone_suffix9
+    (last 9 digits, used to match numbers regardless of country code format)
+    """
+    if not phone:
+        return {'normalized_phone': None, 'phone_suffix9': None}
+    normalized = normalize_phone(phone)
+    return {'normalized_phone': normalized, 'phone_suffix9': normalized[-9:] if len(normalized) >= 9 else None}
+
+def same_phone_query(phone: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Mongo filter for contacts whose phone equals phone after normalization or shares its last 9 digits"""
+    keys = phone_keys(phone)
+    if not keys['normalized_phone']:
+        return None
+    clauses = [{'normalized_phone': keys['normalized_phone']}]
+    if keys['phone_suffix9']:
+        clauses.append({'phone_suffix9': keys['phone_suffix9']})
+    return {'$or': clauses}
+
+def group_membership_edges(contact: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    group_memberships edges for a contact, parsed once from its whatsapp_groups strings
+    ("120363212727307534@g.us BLOC DE BAȘTINĂ (bdb)") - one edge per group
+    """
+    edges = {}
+    for group_str in (contact.get('whatsapp_groups') or []):
+        if '@g.us' not in group_str:
+            continue
+        group_id, group_name = group_str.split('@g.us', 1)
+        group_id += '@g.us'
+        if group_id in edges:
+            edges[group_id]['group_name'] = edges[group_id]['group_name'] or group_name.strip()
+            continue
+        edges[group_id] = {
+            'group_id': group_id,
+            'group_name': group_name.strip(),
+            'contact_id': contact.get('id'),
+            'phone': contact.get('phone'),
+            'normalized_phone': contact.get('normalized_phone'),
+            'case_number': contact.get('case_number'),
+            'person_name': contact.get('person_name'),
+            'device_info': contact.get('device_info'),
+            'upload_session_id': contact.get('upload_session_id')
+        }
+    return list(edges.values())
+
+# --- Search index ---
+# Contacts, passwords and accounts store the lowercase, accent-folded tokens of their searchable
+# fields in search_terms (multikey index); /search runs anchored prefix regexes against it.
+# Digit tokens also store their suffixes, so phone fragments match anywhere in the number.
+SEARCH_FIELDS = {
+    'contacts': ('name', 'source', 'phone', 'normalized_phone', 'email', 'user_id', 'account', 'category'),
+    'passwords': ('application', 'username', 'url', 'description'),
+    'user_accounts': ('source', 'username', 'user_id', 'email', 'name')
+}
+MIN_PHONE_FRAGMENT = 3
+MAX_TERM_LENGTH = 64
+
+# Default projection for documents returned by the API (internal index fields stay in Mongo)
+DOC_PROJECTION = {'_id': 0, 'search_terms': 0, 'credential_key': 0, 'password_key': 0}
+
+def fold_text(text: str) -> str:
+    """Lowercase and strip diacritics (Ștefan -> stefan)"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+def search_terms(collection: str, doc: Dict[str, Any]) -> List[str]:
+    """Index terms stored on a document of collection"""
+    terms = set()
+    for field in SEARCH_FIELDS[collection]:
+        value = doc.get(field)
+        if not value:
+            continue
+        for token in re.findall(r'\w+', fold_text(str(value))):
+            token = token[:MAX_TERM_LENGTH]
+            terms.add(token)
+            if token.isdigit():
+                terms.update(token[i:] for i in range(1, len(token) - MIN_PHONE_FRAGMENT + 1))
+    return sorted(terms)
+
+def search_filter(query: str) -> Optional[Dict[str, Any]]:
+    """
+    Mongo filter for a search query: every word must prefix-match a stored term.
+    Phone-like queries (digits, spaces, +, -, parentheses) are one fragment, as typed or normalized.
+    """
+    compact = re.sub(r'[\s\-().+]', '', query)
+    if compact.isdigit():
+        fragments = sorted({compact, normalize_phone(query.strip())} - {''})
+        return {'$or': [{'search_terms': {'$regex': '^' + re.escape(f[:MAX_TERM_LENGTH])}} for f in fragments]}
+    words = re.findall(r'\w+', fold_text(query))
+    if not words:
+        return None
+    return {'$and': [{'search_terms': {'$regex': '^' + re.escape(w[:MAX_TERM_LENGTH])}} for w in words]}
+
+def credential_key(collection: str, doc: Dict[str, Any]) -> str:
+    """Dedup key stored on passwords / user_accounts: lowercased "username_application" (Unicode-aware)"""
+    if collection == 'passwords':
+        username = doc.get('username') or doc.get('password') or ''
+        app = doc.get('application', '')
+    else:
+        username = doc.get('username') or doc.get('email') or ''
+        app = doc.get('source', '')
+    return f"{username}_{app}".lower()
+
+def password_key(collection: str, doc: Dict[str, Any]) -> Optional[str]:
+    """Password value a password / account contributes to the reuse analysis (None when it is not password-like)"""
+    if collection == 'passwords':
+        value = (doc.get('password', '') or '').strip()
+        # Skip empty or very short values and values that look like a username/email
+        if len(value) < 2 or ('@' in value and '.' in value):
+            return None
+        return value
+    # Accounts: user_id only counts when it is not a numeric ID, an email or too short
+    value = (doc.get('user_id', '') or '').strip()
+    if len(value) < 6 or value.isdigit() or '@' in value:
+        return None
+    return value
+
 def sanitize_filename(name: str) -> str:
     """Sanitize strings for filesystem use"""
     if not name:
@@ -143,6 +281,8 @@ class Contact(BaseModel):
     account: Optional[str] = None
     name: Optional[str] = None
     phone: Optional[str] = None
+    normalized_phone: Optional[str] = None  # normalize_phone(phone), indexed
+    phone_suffix9: Optional[str] = None  # last 9 digits of normalized_phone, indexed
     email: Optional[str] = None
     user_id: Optional[str] = None
     category: Optional[str] = None
@@ -227,16 +367,126 @@ class SuspectProfile(BaseModel):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+# List views never render the XML dump (raw_data); credential filters read only these few of
+# its fields. Full records are served by the detail endpoints.
+LIST_RAW_FIELDS = ('Account', 'Type', 'Source', 'ServiceIdentifier')
+
+def list_projection(model: type, raw_fields: Tuple[str, ...] = ()) -> Dict[str, int]:
+    """Lean inclusion projection for list endpoints: the model's fields without raw_data"""
+    projection = {'_id': 0}
+    projection.update({field: 1 for field in model.model_fields if field != 'raw_data'})
+    projection.update({f'raw_data.fields.{field}': 1 for field in raw_fields})
+    return projection
+
+CONTACT_LIST_PROJECTION = list_projection(Contact)
+PASSWORD_LIST_PROJECTION = list_projection(Password, LIST_RAW_FIELDS)
+USER_ACCOUNT_LIST_PROJECTION = list_projection(UserAccount, LIST_RAW_FIELDS)
+
+# Opt-in fast path (?fast=true) for the big list endpoints: the fetched documents are encoded
+# with orjson as they are, instead of being validated and re-serialized one by one through
+# response_model. The model is checked once so both paths produce the same JSON.
+JSON_NATIVE_TYPES = (str, int, float, bool, datetime, type(None), Any)
+
+def json_native(annotation) -> bool:
+    """Whether orjson encodes values of annotation exactly like pydantic's JSON mode"""
+    if get_origin(annotation) in (list, dict, Union):
+        return all(json_native(arg) for arg in get_args(annotation))
+    return annotation in JSON_NATIVE_TYPES
+
+class FastListEncoder:
+    """Encodes list projections of model with orjson; absent optional fields get the model defaults"""
+    
+    def __init__(self, model: type):
+        unsupported = [name for name, field in model.model_fields.items() if not json_native(field.annotation)]
+        if unsupported:
+            raise TypeError(f"{model.__name__} fields {unsupported} are not JSON-native, use the response model path")
+        self.defaults = {
+            name: field.default for name, field in model.model_fields.items()
+            if not field.is_required() and field.default_factory is None
+        }
+    
+    def response(self, rows: List[Dict[str, Any]], response: Response) -> Response:
+        """JSON response of rows, keeping the headers set on the endpoint's response (X-Next-Cursor)"""
+        defaults = self.defaults
+        return Response(
+            content=orjson.dumps([{**defaults, **row} for row in rows]),
+            media_type='application/json', headers=dict(response.headers)
+        )
+    
+    def line(self, row: Dict[str, Any]) -> bytes:
+        """NDJSON line of one row"""
+        return json_line({**self.defaults, **row})
+
+def json_line(row: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(row, ensure_ascii=False, default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value)) + '\n').encode()
+
+# NDJSON streaming mode (Accept: application/x-ndjson or ?stream=1): one JSON document per line,
+# written while the Mongo cursor is read, so server memory stays flat and the first rows arrive early.
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+NDJSON_CHUNK_BYTES = 64 * 1024
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get('accept', '') or request.query_params.get('stream') in ('1', 'true')
+
+def ndjson_response(rows, response: Response, encode=json_line) -> StreamingResponse:
+    """Stream rows (a list or an async iterator) as NDJSON in ~64 KB chunks, keeping the endpoint's headers"""
+    async def body():
+        if not hasattr(rows, '__aiter__'):
+            for i in range(0, len(rows), 1000):
+                yield b''.join(encode(row) for row in rows[i:i + 1000])
+            return
+        buffer, size = [], 0
+        async for row in rows:
+            line = encode(row)
+            buffer.append(line)
+            size += len(line)
+            if size >= NDJSON_CHUNK_BYTES:
+                yield b''.join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b''.join(buffer)
+    
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE, headers=dict(response.headers))
+
+CONTACT_FAST_JSON = FastListEncoder(Contact)
+PASSWORD_FAST_JSON = FastListEncoder(Password)
+USER_ACCOUNT_FAST_JSON = FastListEncoder(UserAccount)
+
 class UploadStats(BaseModel):
     contacts: int
     passwords: int
     user_accounts: int
     whatsapp_groups: int = 0
+    images: int = 0
+    failed_inserts: Dict[str, int] = Field(default_factory=dict)  # per collection, documents rejected by Mongo
     upload_time: datetime
 
+class UploadJob(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "queued"  # queued, running, completed, failed
+    stage: str = "queued"  # current pipeline stage (detecting, contacts, passwords, ..., writing, derived_views)
+    filename: Optional[str] = None
+    case_number: Optional[str] = None
+    person_name: Optional[str] = None
+    records_processed: int = 0
+    throughput: float = 0.0  # records per second since the job started
+    result: Optional[UploadStats] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    worker_id: Optional[str] = None  # process running the job (INGEST_WORKER_ID)
+    heartbeat_at: Optional[datetime] = None  # refreshed while that process is alive
+
 class SearchQuery(BaseModel):
     query: str
     data_type: Optional[str] = None  # contacts, passwords, user_accounts, or None for all
+    limit: int = Field(500, ge=1, le=5000)  # max results per data type
 
 # Email Domain Extraction
 def extract_email_domain(text: str) -> Optional[str]:
@@ -323,21 +573,157 @@ def categorize_credential(application: str = '', source: str = '', username: str
     return 'Other'
 
 # XML Parsing Functions
+CELLEBRITE_NS = 'http://pa.cellebrite.com/report/2.0'
+CELLEBRITE_NSMAP = {'ns': CELLEBRITE_NS}
+_MODEL_TAG = f'{{{CELLEBRITE_NS}}}model'
+
+def iter_report_models(source, model_type: str) -> Iterator[ET.Element]:
+    """
+    Stream every <model type="model_type"> element of a Cellebrite report, in document
+    order like `findall('.//ns:model[@type=...]')`: a nested match is yielded right
+    after the model containing it, once that outermost match has been fully parsed.
+    `source` is a path or a binary file object. Every finished element outside an
+    outermost match is detached from its parent as soon as it closes, and the match is
+    detached once the caller resumes, so memory stays bounded by a single top-level
+    model no matter how large the report is.
+    """
+    stack = []
+    current = None  # the model being built, while we are inside it
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if current is None and elem.tag == _MODEL_TAG and elem.get('type') == model_type:
+                current = elem
+            stack.append(elem)
+            continue
+        
+        stack.pop()
+        if elem is current:
+            for match in elem.iter(_MODEL_TAG):
+                if match.get('type') == model_type:
+                    yield match
+            current = None
+        elif current is not None:
+            # Still inside the model - its subtree must stay intact
+            continue
+        
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+
+_FIELD_TAG = f'{{{CELLEBRITE_NS}}}field'
+_VALUE_TAG = f'{{{CELLEBRITE_NS}}}value'
+_METADATA_TAG = f'{{{CELLEBRITE_NS}}}metadata'
+_ITEM_TAG = f'{{{CELLEBRITE_NS}}}item'
+_MULTI_MODEL_FIELD_TAG = f'{{{CELLEBRITE_NS}}}multiModelField'
+
+class ModelIndex:
+    """
+    Field index of one <model> subtree, built in a single walk.
+    Replaces repeated `.//ns:field[...]` descendant searches: every extraction rule
+    reads from the name -> values map instead of rescanning the subtree.
+    """
+    __slots__ = ('element', 'type', 'parent_field', 'fields', 'direct_fields',
+                 'values_by_name', 'models', 'file_items')
+    
+    def __init__(self, element: ET.Element, parent_field: Optional[str] = None):
+        self.element = element
+        self.type = element.get('type')
+        self.parent_field = parent_field  # name of the multiModelField holding this model, if any
+        self.fields = []  # (name, <value> or None) for every descendant field, document order
+        self.direct_fields = []  # same, for direct child fields only
+        self.values_by_name = {}  # field name -> [<value> or None, ...]
+        self.models = []  # ModelIndex of every descendant model, document order
+        self.file_items = {}  # first <metadata section="File"> item per item name
+    
+    @classmethod
+    def build(cls, element: ET.Element) -> 'ModelIndex':
+        index = cls(element)
+        cls._walk(element, [index], None)
+        return index
+    
+    @classmethod
+    def _walk(cls, elem: ET.Element, chain: List['ModelIndex'], parent_field: Optional[str]):
+        # `chain` holds the index of every model enclosing `elem`, outermost first
+        owner = chain[-1]
+        for child in elem:
+            tag = child.tag
+            if tag == _FIELD_TAG:
+                entry = (child.get('name'), child.find(_VALUE_TAG))
+                for index in chain:
+                    index.fields.append(entry)
+                    index.values_by_name.setdefault(entry[0], []).append(entry[1])
+                if elem is owner.element:
+                    owner.direct_fields.append(entry)
+            elif tag == _MODEL_TAG:
+                sub = cls(child, parent_field)
+                for index in chain:
+                    index.models.append(sub)
+                cls._walk(child, chain + [sub], None)
+                continue
+            elif tag == _METADATA_TAG and child.get('section') == 'File':
+                for item in child:
+                    if item.tag == _ITEM_TAG:
+                        for index in chain:
+                            index.file_items.setdefault(item.get('name'), item)
+            
+            if len(child):
+                cls._walk(child, chain, child.get('name') if tag == _MULTI_MODEL_FIELD_TAG else None)
+    
+    def field_value(self, name: str) -> Optional[ET.Element]:
+        """<value> of the first field called `name` (find('.//field[@name]') then find('value'))"""
+        values = self.values_by_name.get(name)
+        return values[0] if values else None
+    
+    def first_value(self, name: str) -> Optional[ET.Element]:
+        """First <value> among fields called `name` (find('.//field[@name]/value'))"""
+        for value in self.values_by_name.get(name, ()):
+            if value is not None:
+                return value
+        return None
+    
+    def has_field(self, name: str) -> bool:
+        return name in self.values_by_name
+    
+    def models_of(self, model_type: str) -> List['ModelIndex']:
+        return [m for m in self.models if m.type == model_type]
+
+def _report_source(xml_content: str) -> io.BytesIO:
+    """Wrap an in-memory report so it can be fed to the streaming parsers"""
+    return io.BytesIO(xml_content.encode('utf-8'))
+
 def extract_device_from_xml(xml_content: str) -> str:
     """Extract device name from XML metadata"""
+    return extract_device_from_report(_report_source(xml_content))
+
+def extract_device_from_report(source) -> str:
+    """Extract device name from report metadata, streaming only the report header"""
     try:
-        root = ET.fromstring(xml_content)
-        
         # Try to find manufacturer and device model
         manufacturer = ''
         device_name = ''
-        
-        for item in root.findall('.//{http://pa.cellebrite.com/report/2.0}item'):
-            item_name = item.get('name')
-            if item_name == 'DeviceInfoSelectedManufacturer' and item.text:
-                manufacturer = item.text.strip()
-            elif item_name == 'DeviceInfoSelectedDeviceName' and item.text:
-                device_name = item.text.strip()
+        extraction_device = None
+        project_name = None
+        
+        # Device metadata lives before <decodedData>; stop there instead of reading the whole report
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            tag = elem.tag.rsplit('}', 1)[-1]
+            if event == 'start':
+                if project_name is None:
+                    # First element is the report root
+                    project_name = elem.get('name', '')
+                elif tag == 'decodedData':
+                    break
+                continue
+            
+            if tag == 'item':
+                item_name = elem.get('name')
+                if item_name == 'DeviceInfoSelectedManufacturer' and elem.text:
+                    manufacturer = elem.text.strip()
+                elif item_name == 'DeviceInfoSelectedDeviceName' and elem.text:
+                    device_name = elem.text.strip()
+            elif tag == 'extractionInfo' and extraction_device is None:
+                extraction_device = elem.get('deviceName', '')
+            elem.clear()
         
         # Check if device_name is a generic extraction type (not actual device model)
         generic_names = ['APPLE_IOS_FULL_FILE_SYSTEM', 'APPLE_IOS_GRAYKEY', 'ANDROID_FULL_FILE_SYSTEM']
@@ -346,15 +732,12 @@ def extract_device_from_xml(xml_content: str) -> str:
         # If it's a generic name, try to get more specific info from extractionInfo or project name
         if is_generic:
             # Try extractionInfo deviceName
-            extraction_info = root.find('.//{http://pa.cellebrite.com/report/2.0}extractionInfo')
-            if extraction_info is not None:
-                extraction_device = extraction_info.get('deviceName', '')
+            if extraction_device is not None:
                 if extraction_device and extraction_device not in generic_names:
                     device_name = extraction_device
             
             # If still generic, use project name as fallback
             if is_generic or not device_name:
-                project_name = root.get('name', '')
                 if project_name and project_name != device_name:
                     # Use project name (e.g., "Raport_iPhone")
                     return project_name.replace('_', ' ').replace('Raport ', '')
@@ -371,7 +754,6 @@ def extract_device_from_xml(xml_content: str) -> str:
             return manufacturer.capitalize()
         
         # Final fallback to project name
-        project_name = root.get('name', '')
         if project_name:
             return project_name.replace('_', ' ').replace('Raport ', '')
             
@@ -379,492 +761,993 @@ def extract_device_from_xml(xml_content: str) -> str:
         logger.error(f"Error extracting device info: {str(e)}")
     return ''
 
-def extract_device_owner_phone(temp_path: Path) -> Optional[str]:
-    """Extract device owner's phone number from folder structure"""
+def extract_device_owner_phone(member_names: List[str]) -> Optional[str]:
+    """Extract device owner's phone number from the folder structure of the ZIP member names"""
     try:
         # Look for WhatsApp folder with owner's number
-        # Pattern: WhatsApp_40752530087@s.whatsapp.net_Native
-        contacts_dirs = list(temp_path.rglob('contacts'))
-        for contacts_dir in contacts_dirs:
-            if contacts_dir.is_dir():
-                for subdir in contacts_dir.iterdir():
-                    if subdir.is_dir() and 'WhatsApp_' in subdir.name:
-                        # Extract phone number from folder name
-                        import re
-                        match = re.search(r'WhatsApp_(\d+)@s\.whatsapp\.net', subdir.name)
-                        if match:
-                            phone = match.group(1)
-                            # Format as +40... if it starts with 407
-                            if phone.startswith('407'):
-                                return f"+{phone}"
-                            elif phone.startswith('40'):
-                                return f"+{phone}"
-                            else:
-                                return phone
+        # Pattern: contacts/WhatsApp_40752530087@s.whatsapp.net_Native/...
+        for name in member_names:
+            parts = name.split('/')
+            # Only folders directly under a "contacts" folder, never the file name itself
+            for i in range(len(parts) - 2):
+                if parts[i] == 'contacts' and 'WhatsApp_' in parts[i + 1]:
+                    # Extract phone number from folder name
+                    match = re.search(r'WhatsApp_(\d+)@s\.whatsapp\.net', parts[i + 1])
+                    if match:
+                        phone = match.group(1)
+                        # Format as +40... if it starts with 407
+                        if phone.startswith('407'):
+                            return f"+{phone}"
+                        elif phone.startswith('40'):
+                            return f"+{phone}"
+                        else:
+                            return phone
     except Exception as e:
         logger.error(f"Error extracting device owner phone: {str(e)}")
     return None
 
-def parse_contacts_xml(xml_content: str) -> List[Dict[str, Any]]:
-    """Parse Contacts.xml from Cellebrite dump"""
-    contacts = []
-    try:
-        root = ET.fromstring(xml_content)
-        ns = {'ns': 'http://pa.cellebrite.com/report/2.0'}
-        
-        for contact_model in root.findall('.//ns:model[@type="Contact"]', ns):
-            contact_data = {
-                'extraction_id': contact_model.get('extractionId'),
-                'deleted_state': contact_model.get('deleted_state'),
-            }
-            
-            # Store ALL XML fields in raw_data for complete view
-            raw_fields = {}
-            for field in contact_model.findall('.//ns:field', ns):
-                field_name = field.get('name')
-                field_value = field.find('ns:value', ns)
+def _photo_refs_from_model(model: ModelIndex) -> Dict[str, str]:
+    """
+    Extract photo path from the ContactPhoto models of a contact.
+    Two possible sources: Local Path in File metadata (iOS style) or the
+    contactphoto_extracted_path field (Android style).
+    """
+    for photo_model in model.models_of('ContactPhoto'):
+        # Try Strategy 1: Local Path from metadata
+        local_path_elem = photo_model.file_items.get('Local Path')
+        if local_path_elem is not None and local_path_elem.text:
+            # Local Path format: files\Image\40721208508-1482251074.thumb
+            local_path = local_path_elem.text.replace('\\', '/')
+            # Also store full path for direct matching
+            return {'photo_filename': local_path.split('/')[-1], 'photo_local_path': local_path}
+        
+        # Try Strategy 2: contactphoto_extracted_path field
+        extracted_path_elem = photo_model.first_value('contactphoto_extracted_path')
+        if extracted_path_elem is not None and extracted_path_elem.text:
+            # Path format: contacts\WhatsApp_...\ID\filename.j
+            extracted_path = extracted_path_elem.text.replace('\\', '/')
+            return {'photo_filename': extracted_path.split('/')[-1], 'photo_extracted_path': extracted_path}
+    return {}
+
+def _contact_from_model(model: ModelIndex) -> Optional[Dict[str, Any]]:
+    """Build a contact record from one indexed Contact model, or None if it should not be stored"""
+    contact_model = model.element
+    contact_data = {
+        'extraction_id': contact_model.get('extractionId'),
+        'deleted_state': contact_model.get('deleted_state'),
+    }
+    
+    # Store ALL XML fields in raw_data for complete view
+    raw_fields = {}
+    for field_name, field_value in model.fields:
+        if field_value is not None and field_value.text:
+            raw_fields[field_name] = field_value.text
+    
+    # Store all sub-models (PhoneNumber, Email, UserID, etc.)
+    raw_models = {}
+    for sub_model in model.models:
+        model_type = sub_model.type
+        if model_type and model_type != 'Contact':
+            if model_type not in raw_models:
+                raw_models[model_type] = []
+            model_data = {}
+            for field_name, field_value in sub_model.fields:
                 if field_value is not None and field_value.text:
-                    raw_fields[field_name] = field_value.text
-            
-            # Store all sub-models (PhoneNumber, Email, UserID, etc.)
-            raw_models = {}
-            for sub_model in contact_model.findall('.//ns:model', ns):
-                model_type = sub_model.get('type')
-                if model_type and model_type != 'Contact':
-                    if model_type not in raw_models:
-                        raw_models[model_type] = []
-                    model_data = {}
-                    for field in sub_model.findall('.//ns:field', ns):
-                        field_name = field.get('name')
-                        field_value = field.find('ns:value', ns)
-                        if field_value is not None and field_value.text:
-                            model_data[field_name] = field_value.text
-                    if model_data:
-                        raw_models[model_type].append(model_data)
-            
-            # Get source
-            source_field = contact_model.find('.//ns:field[@name="Source"]', ns)
-            if source_field is not None:
-                source_value = source_field.find('ns:value', ns)
-                if source_value is not None:
-                    contact_data['source'] = source_value.text
-            
-            # Get account
-            account_field = contact_model.find('.//ns:field[@name="Account"]', ns)
-            if account_field is not None:
-                account_value = account_field.find('ns:value', ns)
-                if account_value is not None:
-                    contact_data['account'] = account_value.text
-            
-            # Get name - IMPORTANT: Only look for direct child Name field, not nested in ContactPhoto
-            # Use ns:field to only search direct children, not .//ns:field which searches all descendants
-            name_field = None
-            for field in contact_model.findall('ns:field', ns):
-                if field.get('name') == 'Name':
-                    name_value = field.find('ns:value', ns)
-                    if name_value is not None and name_value.text:
-                        # Validate this is a real name, not a photo filename or encoded placeholder
-                        name_text = name_value.text.strip()
-                        
-                        # Skip invalid names:
-                        # 1. Photo filenames (.thumb, .jpg, .j, etc.)
-                        # 2. Base64 encoded placeholders (+EAA=, +EAB=, etc.)
-                        # 3. Phone-timestamp patterns (40721208508-1482251074)
-                        is_invalid = False
-                        
-                        # Check for photo filename patterns
-                        if any(ext in name_text for ext in ['.thumb', '.jpg', '.jpeg', '.png', '.j']):
-                            is_invalid = True
-                        # Check for phone-timestamp pattern
-                        elif len(name_text) > 10 and '-' in name_text and name_text.split('-')[0].isdigit():
-                            is_invalid = True
-                        # Check for base64 encoded placeholders (like +EAA=, +EAB=, etc.)
-                        elif name_text.startswith('+') and '=' in name_text and len(name_text) < 10:
-                            is_invalid = True
-                        # Check for just "+" or empty-ish values
-                        elif name_text in ['+', '-', 'null', 'None', '']:
-                            is_invalid = True
-                        
-                        if not is_invalid:
-                            contact_data['name'] = name_text
-                    break
-            
-            # Extract photo path from ContactPhoto model
-            # Two possible sources: 
-            # 1. Local Path in metadata (iOS style): files\Image\40721208508-1482251074.thumb
-            # 2. contactphoto_extracted_path (Android style): contacts\WhatsApp_...\ID\filename.j
-            photo_models = contact_model.findall('.//ns:model[@type="ContactPhoto"]', ns)
-            if photo_models:
-                for photo_model in photo_models:
-                    # Try Strategy 1: Local Path from metadata
-                    local_path_elem = photo_model.find('.//ns:metadata[@section="File"]/ns:item[@name="Local Path"]', ns)
-                    if local_path_elem is not None and local_path_elem.text:
-                        # Local Path format: files\Image\40721208508-1482251074.thumb
-                        photo_filename = local_path_elem.text.replace('\\', '/').split('/')[-1]
-                        contact_data['photo_filename'] = photo_filename
-                        # Also store full path for direct matching
-                        contact_data['photo_local_path'] = local_path_elem.text.replace('\\', '/')
-                        break
-                    
-                    # Try Strategy 2: contactphoto_extracted_path field
-                    extracted_path_elem = photo_model.find('.//ns:field[@name="contactphoto_extracted_path"]/ns:value', ns)
-                    if extracted_path_elem is not None and extracted_path_elem.text:
-                        # Path format: contacts\WhatsApp_...\ID\filename.j
-                        extracted_path = extracted_path_elem.text.replace('\\', '/')
-                        photo_filename = extracted_path.split('/')[-1]
-                        contact_data['photo_filename'] = photo_filename
-                        contact_data['photo_extracted_path'] = extracted_path
-                        break
-            
-            # Get phone numbers
-            # For WhatsApp contacts, prioritize extracting phone from user_id
-            # because user_id contains the actual WhatsApp phone number
-            phone_from_phonenumber_model = None
-            phone_models = contact_model.findall('.//ns:model[@type="PhoneNumber"]', ns)
-            if phone_models:
-                phone_value_elem = phone_models[0].find('.//ns:field[@name="Value"]/ns:value', ns)
-                if phone_value_elem is not None:
-                    phone_from_phonenumber_model = phone_value_elem.text
-            
-            # Get email
-            email_models = contact_model.findall('.//ns:model[@type="Email"]', ns)
-            if email_models:
-                email_value_elem = email_models[0].find('.//ns:field[@name="Value"]/ns:value', ns)
-                if email_value_elem is not None:
-                    contact_data['email'] = email_value_elem.text
-            
-            # Get user IDs (Facebook ID, Instagram ID, WhatsApp ID, etc.)
-            userid_models = contact_model.findall('.//ns:model[@type="UserID"]', ns)
-            extracted_user_id = None
-            if userid_models:
-                userid_value_elem = userid_models[0].find('.//ns:field[@name="Value"]/ns:value', ns)
-                category_elem = userid_models[0].find('.//ns:field[@name="Category"]/ns:value', ns)
-                if userid_value_elem is not None:
-                    extracted_user_id = userid_value_elem.text
-                    contact_data['user_id'] = userid_value_elem.text
-                if category_elem is not None:
-                    contact_data['category'] = category_elem.text
-            
-            # Determine which phone number to use
-            # For WhatsApp contacts: Extract phone from user_id (e.g., 40751601949@s.whatsapp.net -> +40751601949)
-            # For other contacts: Use PhoneNumber model
-            source = contact_data.get('source', '')
-            if source == 'WhatsApp' and extracted_user_id and '@s.whatsapp.net' in extracted_user_id:
-                # Extract phone number from WhatsApp user_id
-                phone_digits = extracted_user_id.split('@')[0]
-                if phone_digits.isdigit():
-                    contact_data['phone'] = '+' + phone_digits
-            elif phone_from_phonenumber_model:
-                # Use phone from PhoneNumber model for non-WhatsApp contacts
-                contact_data['phone'] = phone_from_phonenumber_model
-            
-            # Extract WhatsApp group memberships from AdditionalInfo
-            whatsapp_groups = []
-            additional_info_models = contact_model.findall('.//ns:multiModelField[@name="AdditionalInfo"]/ns:model[@type="KeyValueModel"]', ns)
-            for kv_model in additional_info_models:
-                key_elem = kv_model.find('.//ns:field[@name="Key"]/ns:value', ns)
-                value_elem = kv_model.find('.//ns:field[@name="Value"]/ns:value', ns)
-                if key_elem is not None and value_elem is not None:
-                    if key_elem.text == "Group in common" and value_elem.text:
-                        # Value format: "40765261003-1601966684@g.us Group Name"
-                        whatsapp_groups.append(value_elem.text)
-            
-            if whatsapp_groups:
-                contact_data['whatsapp_groups'] = whatsapp_groups
-            
-            contact_data['raw_data'] = {
-                'xml_id': contact_model.get('id'),
-                'fields': raw_fields,
-                'models': raw_models
-            }
-            
-            # Only add contact if it has a phone number AND it's not a WhatsApp group/newsletter/broadcast/bot/lid
-            # Check both phone and user_id for group identifiers
-            phone = contact_data.get('phone', '')
-            user_id = contact_data.get('user_id', '')
-            
-            # Skip if it's a WhatsApp group/newsletter/broadcast/bot/business account
-            # Identifiers: @g.us (groups), @broadcast (broadcasts), @newsletter (channels), @lid (business), @bot (bots)
-            whatsapp_system_identifiers = ['@g.us', '@broadcast', '@newsletter', '@lid', '@bot']
-            
-            is_whatsapp_system = False
-            for identifier in whatsapp_system_identifiers:
-                if identifier in phone or identifier in user_id:
-                    is_whatsapp_system = True
-                    break
-            
-            if phone and not is_whatsapp_system:
-                contacts.append(contact_data)
+                    model_data[field_name] = field_value.text
+            if model_data:
+                raw_models[model_type].append(model_data)
+    
+    # Get source
+    source_value = model.field_value('Source')
+    if source_value is not None:
+        contact_data['source'] = source_value.text
+    
+    # Get account
+    account_value = model.field_value('Account')
+    if account_value is not None:
+        contact_data['account'] = account_value.text
+    
+    # Get name - IMPORTANT: Only look for direct child Name field, not nested in ContactPhoto
+    for field_name, name_value in model.direct_fields:
+        if field_name == 'Name':
+            if name_value is not None and name_value.text:
+                # Validate this is a real name, not a photo filename or encoded placeholder
+                name_text = name_value.text.strip()
+                
+                # Skip invalid names:
+                # 1. Photo filenames (.thumb, .jpg, .j, etc.)
+                # 2. Base64 encoded placeholders (+EAA=, +EAB=, etc.)
+                # 3. Phone-timestamp patterns (40721208508-1482251074)
+                is_invalid = False
+                
+                # Check for photo filename patterns
+                if any(ext in name_text for ext in ['.thumb', '.jpg', '.jpeg', '.png', '.j']):
+                    is_invalid = True
+                # Check for phone-timestamp pattern
+                elif len(name_text) > 10 and '-' in name_text and name_text.split('-')[0].isdigit():
+                    is_invalid = True
+                # Check for base64 encoded placeholders (like +EAA=, +EAB=, etc.)
+                elif name_text.startswith('+') and '=' in name_text and len(name_text) < 10:
+                    is_invalid = True
+                # Check for just "+" or empty-ish values
+                elif name_text in ['+', '-', 'null', 'None', '']:
+                    is_invalid = True
+                
+                if not is_invalid:
+                    contact_data['name'] = name_text
+            break
+    
+    contact_data.update(_photo_refs_from_model(model))
+    
+    # Get phone numbers
+    # For WhatsApp contacts, prioritize extracting phone from user_id
+    # because user_id contains the actual WhatsApp phone number
+    phone_from_phonenumber_model = None
+    phone_models = model.models_of('PhoneNumber')
+    if phone_models:
+        phone_value_elem = phone_models[0].first_value('Value')
+        if phone_value_elem is not None:
+            phone_from_phonenumber_model = phone_value_elem.text
+    
+    # Get email
+    email_models = model.models_of('Email')
+    if email_models:
+        email_value_elem = email_models[0].first_value('Value')
+        if email_value_elem is not None:
+            contact_data['email'] = email_value_elem.text
+    
+    # Get user IDs (Facebook ID, Instagram ID, WhatsApp ID, etc.)
+    userid_models = model.models_of('UserID')
+    extracted_user_id = None
+    if userid_models:
+        userid_value_elem = userid_models[0].first_value('Value')
+        category_elem = userid_models[0].first_value('Category')
+        if userid_value_elem is not None:
+            extracted_user_id = userid_value_elem.text
+            contact_data['user_id'] = userid_value_elem.text
+        if category_elem is not None:
+            contact_data['category'] = category_elem.text
+    
+    # Determine which phone number to use
+    # For WhatsApp contacts: Extract phone from user_id (e.g., 40751601949@s.whatsapp.net -> +40751601949)
+    # For other contacts: Use PhoneNumber model
+    source = contact_data.get('source', '')
+    if source == 'WhatsApp' and extracted_user_id and '@s.whatsapp.net' in extracted_user_id:
+        # Extract phone number from WhatsApp user_id
+        phone_digits = extracted_user_id.split('@')[0]
+        if phone_digits.isdigit():
+            contact_data['phone'] = '+' + phone_digits
+    elif phone_from_phonenumber_model:
+        # Use phone from PhoneNumber model for non-WhatsApp contacts
+        contact_data['phone'] = phone_from_phonenumber_model
+    
+    # Extract WhatsApp group memberships from AdditionalInfo
+    whatsapp_groups = []
+    for kv_model in model.models:
+        if kv_model.type != 'KeyValueModel' or kv_model.parent_field != 'AdditionalInfo':
+            continue
+        key_elem = kv_model.first_value('Key')
+        value_elem = kv_model.first_value('Value')
+        if key_elem is not None and value_elem is not None:
+            if key_elem.text == "Group in common" and value_elem.text:
+                # Value format: "40765261003-1601966684@g.us Group Name"
+                whatsapp_groups.append(value_elem.text)
+    
+    if whatsapp_groups:
+        contact_data['whatsapp_groups'] = whatsapp_groups
+    
+    contact_data['raw_data'] = {
+        'xml_id': contact_model.get('id'),
+        'fields': raw_fields,
+        'models': raw_models
+    }
+    
+    # Only add contact if it has a phone number AND it's not a WhatsApp group/newsletter/broadcast/bot/lid
+    # Check both phone and user_id for group identifiers
+    phone = contact_data.get('phone', '')
+    user_id = contact_data.get('user_id', '')
+    
+    # Skip if it's a WhatsApp group/newsletter/broadcast/bot/business account
+    # Identifiers: @g.us (groups), @broadcast (broadcasts), @newsletter (channels), @lid (business), @bot (bots)
+    whatsapp_system_identifiers = ['@g.us', '@broadcast', '@newsletter', '@lid', '@bot']
+    
+    is_whatsapp_system = False
+    for identifier in whatsapp_system_identifiers:
+        if identifier in phone or identifier in user_id:
+            is_whatsapp_system = True
+            break
+    
+    if phone and not is_whatsapp_system:
+        return contact_data
+    return None
+
+def iter_contacts_xml(source) -> Iterator[Dict[str, Any]]:
+    """Stream contact records from a Contacts.xml path or binary file object"""
+    try:
+        for contact_model in iter_report_models(source, 'Contact'):
+            contact_data = _contact_from_model(ModelIndex.build(contact_model))
+            if contact_data:
+                yield contact_data
     
     except Exception as e:
         logger.error(f"Error parsing contacts XML: {str(e)}")
+
+def parse_contacts_xml(xml_content: str) -> List[Dict[str, Any]]:
+    """Parse Contacts.xml from Cellebrite dump"""
+    return list(iter_contacts_xml(_report_source(xml_content)))
+
+def _group_from_model(model: ModelIndex) -> Optional[Dict[str, Any]]:
+    """Build a WhatsApp group record from one indexed Contact model, or None if it is not a group"""
+    group_data = {}
     
-    return contacts
+    # Get source
+    source_value = model.field_value('Source')
+    source = source_value.text if source_value is not None else None
+    
+    # Get name
+    name_value = model.field_value('Name')
+    name = name_value.text if name_value is not None else None
+    
+    # Get user IDs to find WhatsApp group ID
+    extracted_user_id = None
+    for uid_model in model.models_of('UserID'):
+        value_elem = uid_model.first_value('Value')
+        if value_elem is not None and value_elem.text:
+            extracted_user_id = value_elem.text
+            break
+    
+    # Check if this is a WhatsApp group (has @g.us in user_id)
+    if extracted_user_id and '@g.us' in extracted_user_id:
+        group_data['id'] = str(uuid.uuid4())
+        group_data['group_id'] = extracted_user_id  # e.g., "120363419157001598@g.us"
+        group_data['group_name'] = name or extracted_user_id
+        group_data['source'] = source or 'WhatsApp'
+        group_data['created_at'] = datetime.now(timezone.utc)
+        
+        # Extract photo path if available (both iOS and Android styles)
+        group_data.update(_photo_refs_from_model(model))
+        
+        logger.info(f"Found WhatsApp group: {group_data['group_name']} ({group_data['group_id']})")
+        return group_data
+    return None
 
-def parse_whatsapp_groups_xml(xml_content: str) -> List[Dict[str, Any]]:
-    """Parse WhatsApp groups from Contacts.xml - groups are contacts with @g.us in user_id"""
-    groups = []
+def iter_whatsapp_groups_xml(source) -> Iterator[Dict[str, Any]]:
+    """Stream WhatsApp group records from a Contacts.xml path or binary file object"""
     try:
-        root = ET.fromstring(xml_content)
-        ns = {'ns': 'http://pa.cellebrite.com/report/2.0'}
-        
-        for contact_model in root.findall('.//ns:model[@type="Contact"]', ns):
-            group_data = {}
-            
-            # Get source
-            source_field = contact_model.find('.//ns:field[@name="Source"]', ns)
-            source = source_field.find('ns:value', ns).text if source_field is not None and source_field.find('ns:value', ns) is not None else None
-            
-            # Get name
-            name_field = contact_model.find('.//ns:field[@name="Name"]', ns)
-            name = name_field.find('ns:value', ns).text if name_field is not None and name_field.find('ns:value', ns) is not None else None
-            
-            # Get user IDs to find WhatsApp group ID
-            user_id_models = contact_model.findall('.//ns:model[@type="UserID"]', ns)
-            extracted_user_id = None
-            for uid_model in user_id_models:
-                value_elem = uid_model.find('.//ns:field[@name="Value"]/ns:value', ns)
-                if value_elem is not None and value_elem.text:
-                    extracted_user_id = value_elem.text
-                    break
-            
-            # Check if this is a WhatsApp group (has @g.us in user_id)
-            if extracted_user_id and '@g.us' in extracted_user_id:
-                group_data['id'] = str(uuid.uuid4())
-                group_data['group_id'] = extracted_user_id  # e.g., "120363419157001598@g.us"
-                group_data['group_name'] = name or extracted_user_id
-                group_data['source'] = source or 'WhatsApp'
-                group_data['created_at'] = datetime.now(timezone.utc)
-                
-                # Extract photo path if available (both iOS and Android styles)
-                photo_models = contact_model.findall('.//ns:model[@type="ContactPhoto"]', ns)
-                if photo_models:
-                    for photo_model in photo_models:
-                        # Try Local Path (iOS style)
-                        local_path_elem = photo_model.find('.//ns:metadata[@section="File"]/ns:item[@name="Local Path"]', ns)
-                        if local_path_elem is not None and local_path_elem.text:
-                            photo_filename = local_path_elem.text.replace('\\', '/').split('/')[-1]
-                            group_data['photo_filename'] = photo_filename
-                            group_data['photo_local_path'] = local_path_elem.text.replace('\\', '/')
-                            break
-                        # Try contactphoto_extracted_path (Android style)
-                        extracted_path_elem = photo_model.find('.//ns:field[@name="contactphoto_extracted_path"]/ns:value', ns)
-                        if extracted_path_elem is not None and extracted_path_elem.text:
-                            extracted_path = extracted_path_elem.text.replace('\\', '/')
-                            photo_filename = extracted_path.split('/')[-1]
-                            group_data['photo_filename'] = photo_filename
-                            group_data['photo_extracted_path'] = extracted_path
-                            break
-                
-                groups.append(group_data)
-                logger.info(f"Found WhatsApp group: {group_data['group_name']} ({group_data['group_id']})")
+        for contact_model in iter_report_models(source, 'Contact'):
+            group_data = _group_from_model(ModelIndex.build(contact_model))
+            if group_data:
+                yield group_data
     
     except Exception as e:
         logger.error(f"Error parsing WhatsApp groups XML: {str(e)}")
-    
-    return groups
 
+def parse_whatsapp_groups_xml(xml_content: str) -> List[Dict[str, Any]]:
+    """Parse WhatsApp groups from Contacts.xml - groups are contacts with @g.us in user_id"""
+    return list(iter_whatsapp_groups_xml(_report_source(xml_content)))
 
-def parse_passwords_xml(xml_content: str) -> List[Dict[str, Any]]:
-    """Parse Passwords.xml from Cellebrite dump"""
-    passwords = []
+def iter_contacts_and_groups_xml(source) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Single pass over Contacts.xml producing both contacts and WhatsApp groups.
+    Yields ('group', record) and ('contact', record) tuples; each record is identical
+    to what parse_whatsapp_groups_xml / parse_contacts_xml produce for the same model.
+    """
+    contacts_ok = True
+    groups_ok = True
     try:
-        root = ET.fromstring(xml_content)
-        ns = {'ns': 'http://pa.cellebrite.com/report/2.0'}
-        
-        for password_model in root.findall('.//ns:model[@type="Password"]', ns):
-            password_data = {}
+        for contact_model in iter_report_models(source, 'Contact'):
+            # One index per model, shared by both record builders
+            model = ModelIndex.build(contact_model)
             
-            # Store ALL XML fields in raw_data
-            raw_fields = {}
-            for field in password_model.findall('.//ns:field', ns):
-                field_name = field.get('name')
-                field_value = field.find('ns:value', ns)
-                if field_value is not None and field_value.text:
-                    raw_fields[field_name] = field_value.text[:500] if len(field_value.text) > 500 else field_value.text
-            
-            # Get application/source
-            app_field = password_model.find('.//ns:field[@name="Application"]', ns)
-            if app_field is None:
-                app_field = password_model.find('.//ns:field[@name="Source"]', ns)
-            if app_field is not None:
-                app_value = app_field.find('ns:value', ns)
-                if app_value is not None:
-                    password_data['application'] = app_value.text
-            
-            # Get username
-            username_field = password_model.find('.//ns:field[@name="UserName"]', ns)
-            if username_field is not None:
-                username_value = username_field.find('ns:value', ns)
-                if username_value is not None:
-                    password_data['username'] = username_value.text
-            
-            # Get password or data field (base64 encoded)
-            password_field = password_model.find('.//ns:field[@name="Password"]', ns)
-            if password_field is not None:
-                password_value = password_field.find('ns:value', ns)
-                if password_value is not None:
-                    password_data['password'] = password_value.text
-            
-            # Get Data field (often base64 encoded tokens/keys)
-            data_field = password_model.find('.//ns:field[@name="Data"]', ns)
-            if data_field is not None:
-                data_value = data_field.find('ns:value', ns)
-                if data_value is not None and data_value.text:
-                    try:
-                        # Decode base64 if present
-                        decoded = base64.b64decode(data_value.text).decode('utf-8', errors='ignore')
-                        # Only store if it's reasonable length (< 100 chars for clear text passwords)
-                        if len(decoded) < 100:
-                            if not password_data.get('password'):
-                                password_data['password'] = decoded
-                            else:
-                                password_data['description'] = decoded
-                        else:
-                            # Store as token/key in description
-                            if not password_data.get('description'):
-                                password_data['description'] = decoded[:200] + '...'
-                    except Exception:
-                        # If decode fails, skip it
-                        pass
-            
-            # Get Label field
-            label_field = password_model.find('.//ns:field[@name="Label"]', ns)
-            if label_field is not None:
-                label_value = label_field.find('ns:value', ns)
-                if label_value is not None and label_value.text:
+            # A bad record stops only its own record kind, like the separate parsers did
+            if groups_ok:
+                try:
+                    group_data = _group_from_model(model)
+                except Exception as e:
+                    logger.error(f"Error parsing WhatsApp groups XML: {str(e)}")
+                    groups_ok = False
+                else:
+                    if group_data:
+                        yield 'group', group_data
+            
+            if contacts_ok:
+                try:
+                    contact_data = _contact_from_model(model)
+                except Exception as e:
+                    logger.error(f"Error parsing contacts XML: {str(e)}")
+                    contacts_ok = False
+                else:
+                    if contact_data:
+                        yield 'contact', contact_data
+            
+            if not contacts_ok and not groups_ok:
+                break
+    
+    except Exception as e:
+        logger.error(f"Error parsing contacts XML: {str(e)}")
+
+
+def _password_from_model(password_model: ET.Element) -> Dict[str, Any]:
+    """Build a password record from one Password model"""
+    ns = CELLEBRITE_NSMAP
+    
+    password_data = {}
+    
+    # Store ALL XML fields in raw_data
+    raw_fields = {}
+    for field in password_model.findall('.//ns:field', ns):
+        field_name = field.get('name')
+        field_value = field.find('ns:value', ns)
+        if field_value is not None and field_value.text:
+            raw_fields[field_name] = field_value.text[:500] if len(field_value.text) > 500 else field_value.text
+    
+    # Get application/source
+    app_field = password_model.find('.//ns:field[@name="Application"]', ns)
+    if app_field is None:
+        app_field = password_model.find('.//ns:field[@name="Source"]', ns)
+    if app_field is not None:
+        app_value = app_field.find('ns:value', ns)
+        if app_value is not None:
+            password_data['application'] = app_value.text
+    
+    # Get username
+    username_field = password_model.find('.//ns:field[@name="UserName"]', ns)
+    if username_field is not None:
+        username_value = username_field.find('ns:value', ns)
+        if username_value is not None:
+            password_data['username'] = username_value.text
+    
+    # Get password or data field (base64 encoded)
+    password_field = password_model.find('.//ns:field[@name="Password"]', ns)
+    if password_field is not None:
+        password_value = password_field.find('ns:value', ns)
+        if password_value is not None:
+            password_data['password'] = password_value.text
+    
+    # Get Data field (often base64 encoded tokens/keys)
+    data_field = password_model.find('.//ns:field[@name="Data"]', ns)
+    if data_field is not None:
+        data_value = data_field.find('ns:value', ns)
+        if data_value is not None and data_value.text:
+            try:
+                # Decode base64 if present
+                decoded = base64.b64decode(data_value.text).decode('utf-8', errors='ignore')
+                # Only store if it's reasonable length (< 100 chars for clear text passwords)
+                if len(decoded) < 100:
+                    if not password_data.get('password'):
+                        password_data['password'] = decoded
+                    else:
+                        password_data['description'] = decoded
+                else:
+                    # Store as token/key in description
                     if not password_data.get('description'):
-                        password_data['description'] = label_value.text
-            
-            # Get URL (try Url, Service, or ServiceIdentifier fields)
-            url_field = password_model.find('.//ns:field[@name="Url"]', ns)
-            if url_field is None:
-                url_field = password_model.find('.//ns:field[@name="Service"]', ns)
-            if url_field is None:
-                url_field = password_model.find('.//ns:field[@name="ServiceIdentifier"]', ns)
-            
-            if url_field is not None:
-                url_value = url_field.find('ns:value', ns)
-                if url_value is not None and url_value.text:
-                    password_data['url'] = url_value.text
-                    
-                    # Extract username from URL if it looks like an email domain
-                    url_text = url_value.text.lower()
-                    if not password_data.get('username'):
-                        # Check if URL contains email-like patterns
-                        if 'gmail' in url_text or 'yahoo' in url_text or 'hotmail' in url_text or 'outlook' in url_text:
-                            # Create a representative username from the URL
-                            if 'instagram' in url_text:
-                                password_data['username'] = 'instagram_account'
-                            elif 'facebook' in url_text:
-                                password_data['username'] = 'facebook_account'
-            
-            password_data['raw_data'] = {
-                'xml_id': password_model.get('id'),
-                'fields': raw_fields
-            }
-            passwords.append(password_data)
+                        password_data['description'] = decoded[:200] + '...'
+            except Exception:
+                # If decode fails, skip it
+                pass
+    
+    # Get Label field
+    label_field = password_model.find('.//ns:field[@name="Label"]', ns)
+    if label_field is not None:
+        label_value = label_field.find('ns:value', ns)
+        if label_value is not None and label_value.text:
+            if not password_data.get('description'):
+                password_data['description'] = label_value.text
+    
+    # Get URL (try Url, Service, or ServiceIdentifier fields)
+    url_field = password_model.find('.//ns:field[@name="Url"]', ns)
+    if url_field is None:
+        url_field = password_model.find('.//ns:field[@name="Service"]', ns)
+    if url_field is None:
+        url_field = password_model.find('.//ns:field[@name="ServiceIdentifier"]', ns)
+    
+    if url_field is not None:
+        url_value = url_field.find('ns:value', ns)
+        if url_value is not None and url_value.text:
+            password_data['url'] = url_value.text
+    
+            # Extract username from URL if it looks like an email domain
+            url_text = url_value.text.lower()
+            if not password_data.get('username'):
+                # Check if URL contains email-like patterns
+                if 'gmail' in url_text or 'yahoo' in url_text or 'hotmail' in url_text or 'outlook' in url_text:
+                    # Create a representative username from the URL
+                    if 'instagram' in url_text:
+                        password_data['username'] = 'instagram_account'
+                    elif 'facebook' in url_text:
+                        password_data['username'] = 'facebook_account'
+    
+    password_data['raw_data'] = {
+        'xml_id': password_model.get('id'),
+        'fields': raw_fields
+    }
+    return password_data
+
+def iter_passwords_xml(source) -> Iterator[Dict[str, Any]]:
+    """Stream password records from a Passwords.xml path or binary file object"""
+    try:
+        for password_model in iter_report_models(source, 'Password'):
+            yield _password_from_model(password_model)
     
     except Exception as e:
         logger.error(f"Error parsing passwords XML: {str(e)}")
+
+def parse_passwords_xml(xml_content: str) -> List[Dict[str, Any]]:
+    """Parse Passwords.xml from Cellebrite dump"""
+    return list(iter_passwords_xml(_report_source(xml_content)))
+
+def _useraccount_from_model(account_model: ET.Element) -> Dict[str, Any]:
+    """Build a user account record from one UserAccount model"""
+    ns = CELLEBRITE_NSMAP
     
-    return passwords
+    account_data = {}
+    metadata = {}  # Store rich metadata (bio, DOB, profile URLs, etc.)
+    
+    # --- Extract Basic Fields ---
+    for field in account_model.findall('.//ns:field', ns):
+        name = field.get('name')
+        value = field.find('ns:value', ns)
+        domain = field.get('domain')  # Context for the value
+    
+        if value is not None and value.text:
+            if name == 'Source': 
+                account_data['source'] = value.text
+            elif name == 'Username': 
+                account_data['username'] = value.text
+            elif name == 'UserId': 
+                account_data['user_id'] = value.text
+            elif name == 'ServiceIdentifier': 
+                account_data['service_identifier'] = value.text
+            elif name == 'ServiceType': 
+                account_data['service_type'] = value.text
+            elif name == 'Name': 
+                # Skip if it's a URL (common parsing error)
+                if value.text and not value.text.startswith('http') and 'cdninstagram' not in value.text.lower():
+                    account_data['name'] = value.text
+            elif name == 'Email': 
+                account_data['email'] = value.text
+            elif name == 'TimeCreated':
+                account_data['time_created'] = value.text
+            elif name == 'Category':
+                # Category is a label for the next Value field
+                category_label = value.text
+            elif name == 'Value' and domain:
+                # Store categorized values (User ID, Email, Profile Picture, etc.)
+                if domain not in metadata:
+                    metadata[domain] = []
+                metadata[domain].append(value.text)
+            elif name == 'Key':
+                # Key-value pairs (About, Date of Birth, etc.)
+                metadata_key = value.text
+            elif name == 'Value' and 'metadata_key' in locals():
+                # Store key-value metadata
+                if metadata_key not in metadata:
+                    metadata[metadata_key] = value.text
+                del metadata_key
+    
+    # --- Extract multiField data (Notes, URLs) ---
+    for multi_field in account_model.findall('.//ns:multiField', ns):
+        field_name = multi_field.get('name')
+        values = []
+        for value in multi_field.findall('.//ns:value', ns):
+            if value.text:
+                values.append(value.text.strip())
+    
+        if values:
+            if field_name == 'Notes':
+                account_data['notes'] = ' | '.join(values)
+            elif field_name == 'Url':
+                metadata['URLs'] = values
+    
+    # --- Extract Profile Picture Path ---
+    photo_path_node = account_model.find('.//ns:model[@type="ContactPhoto"]//ns:field[@name="contactphoto_extracted_path"]/ns:value', ns)
+    if photo_path_node is not None and photo_path_node.text:
+        clean_path = photo_path_node.text.replace('\\', '/')
+        account_data['profile_pic_path'] = clean_path
+    
+    # --- Extract User ID from Entries (if not found above) ---
+    if 'user_id' not in account_data:
+        for entry in account_model.findall('.//ns:multiModelField[@name="Entries"]/ns:model[@type="UserID"]', ns):
+            val = entry.find('.//ns:field[@name="Value"]/ns:value', ns)
+            if val is not None and val.text:
+                account_data['user_id'] = val.text
+                break
+    
+    # Store metadata and raw data
+    if metadata:
+        account_data['metadata'] = metadata
+    account_data['raw_data'] = {'xml_id': account_model.get('id')}
+    
+    return account_data
 
-def parse_useraccounts_xml(xml_content: str) -> List[Dict[str, Any]]:
-    """Parse UserAccounts.xml - Extracts ALL available data including metadata"""
-    accounts = []
+def iter_useraccounts_xml(source) -> Iterator[Dict[str, Any]]:
+    """Stream user account records from a UserAccounts.xml path or binary file object"""
     try:
-        root = ET.fromstring(xml_content)
-        ns_url = 'http://pa.cellebrite.com/report/2.0'
-        ns = {'ns': ns_url}
-        
-        for account_model in root.findall('.//ns:model[@type="UserAccount"]', ns):
-            account_data = {}
-            metadata = {}  # Store rich metadata (bio, DOB, profile URLs, etc.)
-            
-            # --- Extract Basic Fields ---
-            for field in account_model.findall('.//ns:field', ns):
-                name = field.get('name')
-                value = field.find('ns:value', ns)
-                domain = field.get('domain')  # Context for the value
-                
-                if value is not None and value.text:
-                    if name == 'Source': 
-                        account_data['source'] = value.text
-                    elif name == 'Username': 
-                        account_data['username'] = value.text
-                    elif name == 'UserId': 
-                        account_data['user_id'] = value.text
-                    elif name == 'ServiceIdentifier': 
-                        account_data['service_identifier'] = value.text
-                    elif name == 'ServiceType': 
-                        account_data['service_type'] = value.text
-                    elif name == 'Name': 
-                        # Skip if it's a URL (common parsing error)
-                        if value.text and not value.text.startswith('http') and 'cdninstagram' not in value.text.lower():
-                            account_data['name'] = value.text
-                    elif name == 'Email': 
-                        account_data['email'] = value.text
-                    elif name == 'TimeCreated':
-                        account_data['time_created'] = value.text
-                    elif name == 'Category':
-                        # Category is a label for the next Value field
-                        category_label = value.text
-                    elif name == 'Value' and domain:
-                        # Store categorized values (User ID, Email, Profile Picture, etc.)
-                        if domain not in metadata:
-                            metadata[domain] = []
-                        metadata[domain].append(value.text)
-                    elif name == 'Key':
-                        # Key-value pairs (About, Date of Birth, etc.)
-                        metadata_key = value.text
-                    elif name == 'Value' and 'metadata_key' in locals():
-                        # Store key-value metadata
-                        if metadata_key not in metadata:
-                            metadata[metadata_key] = value.text
-                        del metadata_key
-            
-            # --- Extract multiField data (Notes, URLs) ---
-            for multi_field in account_model.findall('.//ns:multiField', ns):
-                field_name = multi_field.get('name')
-                values = []
-                for value in multi_field.findall('.//ns:value', ns):
-                    if value.text:
-                        values.append(value.text.strip())
-                
-                if values:
-                    if field_name == 'Notes':
-                        account_data['notes'] = ' | '.join(values)
-                    elif field_name == 'Url':
-                        metadata['URLs'] = values
-
-            # --- Extract Profile Picture Path ---
-            photo_path_node = account_model.find('.//ns:model[@type="ContactPhoto"]//ns:field[@name="contactphoto_extracted_path"]/ns:value', ns)
-            if photo_path_node is not None and photo_path_node.text:
-                clean_path = photo_path_node.text.replace('\\', '/')
-                account_data['profile_pic_path'] = clean_path
-
-            # --- Extract User ID from Entries (if not found above) ---
-            if 'user_id' not in account_data:
-                for entry in account_model.findall('.//ns:multiModelField[@name="Entries"]/ns:model[@type="UserID"]', ns):
-                    val = entry.find('.//ns:field[@name="Value"]/ns:value', ns)
-                    if val is not None and val.text:
-                        account_data['user_id'] = val.text
-                        break
-
-            # Store metadata and raw data
-            if metadata:
-                account_data['metadata'] = metadata
-            account_data['raw_data'] = {'xml_id': account_model.get('id')}
-            
-            accounts.append(account_data)
+        for account_model in iter_report_models(source, 'UserAccount'):
+            yield _useraccount_from_model(account_model)
             
     except Exception as e:
         logger.error(f"Error parsing user accounts XML: {str(e)}")
-        import traceback
         traceback.print_exc()
+
+def parse_useraccounts_xml(xml_content: str) -> List[Dict[str, Any]]:
+    """Parse UserAccounts.xml - Extracts ALL available data including metadata"""
+    return list(iter_useraccounts_xml(_report_source(xml_content)))
+
+def iter_zip_report(zip_ref: zipfile.ZipFile, member: str, parser) -> Iterator:
+    """Stream a report XML straight out of the ZIP through one of the iter_*_xml parsers"""
+    with zip_ref.open(member) as source:
+        yield from parser(source)
+
+# Optional multi-process parsing: with INGEST_PARSE_PROCESSES > 0 the report XMLs of an
+# upload are parsed in parallel worker processes, which send their records back in batches
+# over bounded queues so the parent never holds more than a few batches per report
+PARSE_BATCH_SIZE = 1000
+PARSE_QUEUE_BATCHES = 4
+REPORT_PARSERS = {
+    'contacts': iter_contacts_and_groups_xml,
+    'passwords': iter_passwords_xml,
+    'user_accounts': iter_useraccounts_xml,
+}
+_parse_pool = None
+_parse_manager = None
+_parse_pool_lock = threading.Lock()
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared process pool for report parsing, or None when multi-process parsing is off"""
+    global _parse_pool
+    processes = int(os.environ.get('INGEST_PARSE_PROCESSES', '0'))
+    if processes <= 0:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn, not fork: the API process runs Motor/pymongo and executor threads
+            _parse_pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+        return _parse_pool
+
+def get_parse_manager():
+    """Manager serving the batch queues (plain queues cannot be passed to pool workers)"""
+    global _parse_manager
+    with _parse_pool_lock:
+        if _parse_manager is None:
+            _parse_manager = multiprocessing.get_context('spawn').Manager()
+        return _parse_manager
+
+def parse_zip_report(zip_path: str, member: str, kind: str, batches, cancelled):
+    """Process pool entry point: parse one report XML of the ZIP and send its records in batches, then None"""
+    def send(item) -> bool:
+        # Block while the ingest is behind; give up once it has abandoned the upload
+        while not cancelled.is_set():
+            try:
+                batches.put(item, timeout=1)
+                return True
+            except Full:
+                pass
+        return False
     
-    return accounts
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        batch = []
+        for record in iter_zip_report(zip_ref, member, REPORT_PARSERS[kind]):
+            batch.append(record)
+            if len(batch) >= PARSE_BATCH_SIZE:
+                if not send(batch):
+                    return
+                batch = []
+        if batch and not send(batch):
+            return
+    send(None)
+
+class ReportParser:
+    """
+    Report parsing stage of the ingest pipeline. Records stream straight out of the ZIP,
+    or, in multi-process mode, out of the batch queue of the worker parsing that report.
+    Reports are submitted up front so the workers run ahead of the write stages.
+    """
+    
+    def __init__(self, zip_ref: zipfile.ZipFile, zip_path: Path):
+        self.zip_ref = zip_ref
+        self.zip_path = zip_path
+        self.pool = get_parse_pool()
+        self._jobs = {}  # kind -> (Future, batch queue)
+        self._cancelled = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def submit(self, kind: str, member: Optional[str]):
+        if self.pool is None or not member:
+            return
+        manager = get_parse_manager()
+        if self._cancelled is None:
+            self._cancelled = manager.Event()
+        batches = manager.Queue(PARSE_QUEUE_BATCHES)
+        future = self.pool.submit(parse_zip_report, str(self.zip_path), member, kind, batches, self._cancelled)
+        self._jobs[kind] = (future, batches)
+    
+    def records(self, kind: str, member: str) -> Iterator:
+        if kind not in self._jobs:
+            return iter_zip_report(self.zip_ref, member, REPORT_PARSERS[kind])
+        return self._receive(*self._jobs[kind])
+    
+    @staticmethod
+    def _receive(future: Future, batches) -> Iterator:
+        while True:
+            try:
+                batch = batches.get(timeout=1)
+            except Empty:
+                if future.done() and future.exception() is not None:
+                    raise future.exception()
+                continue
+            if batch is None:
+                return
+            yield from batch
+    
+    def close(self):
+        # Release workers still blocked on a full queue (failed or abandoned ingest)
+        if self._cancelled is not None:
+            self._cancelled.set()
+
+# Content-addressed image store: identical images (re-uploads, avatars shared across
+# devices) are kept once under uploads/blobs/<2 hex>/<sha256><ext> and served by /images
+IMAGE_BLOB_DIR = Path('/app/uploads') / 'blobs'
+IMAGE_BLOB_PREFIX = '/images/blobs/'
+
+# Every document field that can point at an image blob
+IMAGE_REF_FIELDS = (
+    ('contacts', 'photo_path'),
+    ('whatsapp_groups', 'photo_path'),
+    ('suspect_profiles', 'profile_image_path'),
+)
+
+# Blobs modified (written or reused by an ingest) more recently than this are never
+# garbage-collected: an upload references a blob well before its documents are inserted
+IMAGE_BLOB_GC_GRACE_SECONDS = int(os.environ.get('IMAGE_BLOB_GC_GRACE_SECONDS', '3600'))
+
+def image_blob_file(photo_path: str) -> Path:
+    return IMAGE_BLOB_DIR / photo_path[len(IMAGE_BLOB_PREFIX):]
+
+def touch_image_blob(photo_path: str) -> bool:
+    """Restart the GC grace period of a blob about to be referenced; False if it has been collected"""
+    try:
+        os.utime(image_blob_file(photo_path))
+        return True
+    except FileNotFoundError:
+        return False
+
+def store_image_blob(data: bytes, ext: str = '.jpg') -> str:
+    """Store image bytes by content hash and return the /images path; existing blobs are only touched"""
+    digest = hashlib.sha256(data).hexdigest()
+    photo_path = f"{IMAGE_BLOB_PREFIX}{digest[:2]}/{digest}{ext}"
+    if not touch_image_blob(photo_path):
+        blob_path = image_blob_file(photo_path)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name so readers never see a partial blob
+        tmp_path = blob_path.with_name(f".{digest}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, blob_path)
+    return photo_path
+
+class ImageMaterializer:
+    """
+    Image copy stage of the ingest pipeline: matched ZIP members are copied into the
+    blob store by a bounded thread pool while parsing continues. Each member is copied
+    once per upload; callers resolve the returned futures before inserting documents.
+    """
+    
+    def __init__(self, zip_path: Path, workers: Optional[int] = None):
+        self.zip_path = zip_path
+        self.workers = workers or int(os.environ.get('IMAGE_COPY_WORKERS', '8'))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='images')
+        self._futures = {}  # (member, ext) -> Future[str]
+        self._members = {}  # Future -> (member, ext)
+        self._local = threading.local()
+        self._handles = []
+        self._lock = threading.Lock()
+        self.bytes_copied = 0
+        self.failed = 0
+        self._started = time.monotonic()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _zip(self) -> zipfile.ZipFile:
+        # One handle per worker thread so reads are not serialised on a shared file position
+        handle = getattr(self._local, 'zip', None)
+        if handle is None:
+            handle = self._local.zip = zipfile.ZipFile(self.zip_path)
+            with self._lock:
+                self._handles.append(handle)
+        return handle
+    
+    def _copy(self, member: str, ext: str) -> str:
+        data = self._zip().read(member)
+        with self._lock:
+            self.bytes_copied += len(data)
+        return store_image_blob(data, ext)
+    
+    def submit(self, member: str, ext: str = '.jpg') -> Future:
+        key = (member, ext)
+        if key not in self._futures:
+            future = self._futures[key] = self._executor.submit(self._copy, member, ext)
+            self._members[future] = key
+        return self._futures[key]
+    
+    def result(self, future: Future) -> Optional[str]:
+        """Blob path of a finished copy, or None if it failed; call right before the path is stored"""
+        try:
+            photo_path = future.result()
+            # A copy can be referenced long after it was made: refresh the blob, or restore it
+            # if it was garbage-collected in between
+            if not touch_image_blob(photo_path):
+                photo_path = self._copy(*self._members[future])
+            return photo_path
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logger.error(f"Failed to copy image: {e}")
+            return None
+    
+    @property
+    def copied(self) -> int:
+        return sum(1 for future in self._futures.values() if future.done() and not future.exception())
+    
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self._started
+        return (f"{self.copied} images ({self.bytes_copied / 1048576:.1f} MB) copied with "
+                f"{self.workers} workers in {elapsed:.1f}s, {self.failed} failed")
+    
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for handle in self._handles:
+            handle.close()
+
+class BulkWriter:
+    """
+    Ingest writer: documents are buffered per collection and flushed in fixed-size chunks
+    with unordered insert_many on a background thread, so Mongo writes overlap parsing.
+    At most max_pending chunks are in flight, which bounds memory; a failed chunk only
+    loses its own documents. Pending image copies are resolved right before a chunk is written,
+    and on_write (if any) is called after every chunk that stored documents.
+    """
+    
+    def __init__(self, database, images: Optional[ImageMaterializer] = None,
+                 chunk_size: Optional[int] = None, max_pending: int = 4, on_write=None):
+        self.database = database
+        self.images = images
+        self.on_write = on_write
+        self.chunk_size = chunk_size or int(os.environ.get('INGEST_BATCH_SIZE', '1000'))
+        self.max_pending = max_pending
+        self.inserted = {}  # collection -> documents inserted
+        self.failed = {}  # collection -> documents rejected
+        self._buffers = {}  # collection -> [(doc, image future or None)]
+        self._pending = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bulk-writer')
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def add(self, collection: str, doc: Dict[str, Any], image: Optional[Future] = None):
+        """Queue a document; image is a pending copy whose blob path becomes doc['photo_path']"""
+        buffer = self._buffers.setdefault(collection, [])
+        buffer.append((doc, image))
+        if len(buffer) >= self.chunk_size:
+            self._flush_buffer(collection)
+    
+    def _flush_buffer(self, collection: str):
+        chunk = self._buffers.pop(collection, None)
+        if not chunk:
+            return
+        # Back-pressure: never hold more than max_pending chunks in flight
+        while len(self._pending) >= self.max_pending:
+            self._pending.pop(0).result()
+        self._pending.append(self._executor.submit(self._write, collection, chunk))
+    
+    def _write(self, collection: str, chunk: List[Tuple[Dict[str, Any], Optional[Future]]]):
+        docs = []
+        for doc, image in chunk:
+            if image is not None:
+                doc['photo_path'] = self.images.result(image)
+            docs.append(doc)
+        
+        try:
+            inserted = len(self.database[collection].insert_many(docs, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details.get('nInserted', 0)
+            logger.error(f"{len(docs) - inserted} {collection} documents failed to insert: {e.details.get('writeErrors', [])[:1]}")
+        except Exception as e:
+            inserted = 0
+            logger.error(f"Failed to insert chunk of {len(docs)} {collection} documents: {str(e)}")
+        
+        with self._lock:
+            self.inserted[collection] = self.inserted.get(collection, 0) + inserted
+            self.failed[collection] = self.failed.get(collection, 0) + len(docs) - inserted
+        if inserted and self.on_write is not None:
+            self.on_write()
+    
+    def flush(self):
+        """Write every buffered document and wait for all chunks to finish"""
+        for collection in list(self._buffers):
+            self._flush_buffer(collection)
+        while self._pending:
+            self._pending.pop(0).result()
+    
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+
+async def image_blob_refs(collection: str, query: Dict[str, Any]) -> set:
+    """Blob paths referenced by the documents of one collection matching query"""
+    field = dict(IMAGE_REF_FIELDS)[collection]
+    return set(await db[collection].distinct(field, {**query, field: {'$regex': f'^{re.escape(IMAGE_BLOB_PREFIX)}'}}))
+
+async def release_image_blobs(candidates: set) -> int:
+    """
+    Garbage-collect blobs that lost their last reference.
+    Call after deleting documents with the blob paths they referenced; references are
+    counted from the collections themselves so the counts can never drift.
+    """
+    candidates = list(candidates)
+    still_referenced = set()
+    for i in range(0, len(candidates), 1000):
+        chunk = candidates[i:i + 1000]
+        for collection, field in IMAGE_REF_FIELDS:
+            still_referenced.update(await db[collection].distinct(field, {field: {'$in': chunk}}))
+    
+    deleted = 0
+    for photo_path in candidates:
+        if photo_path in still_referenced:
+            continue
+        blob_path = image_blob_file(photo_path)
+        # Move the blob aside before checking its age: an ingest reusing it either touched it
+        # before (and it is put back) or finds it gone and writes it again
+        graveyard_path = blob_path.with_name(f".{blob_path.name}.{uuid.uuid4().hex}.gc")
+        try:
+            os.rename(blob_path, graveyard_path)
+            if time.time() - graveyard_path.stat().st_mtime < IMAGE_BLOB_GC_GRACE_SECONDS:
+                os.replace(graveyard_path, blob_path)
+                continue
+            graveyard_path.unlink()
+            deleted += 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error deleting image blob {blob_path}: {str(e)}")
+    return deleted
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.thumb', '.j')
+
+class ImageIndex:
+    """
+    Image lookup built from the ZIP central directory names only (no extraction, no stat calls).
+    Matches report records to image members by extracted path, filename, local path or phone digits.
+    Formats: iOS files/Image/{phone}-{timestamp}.jpg or .thumb,
+    Android contacts/Source/ID/{phone}.j or files/Image/{phone}.j
+    """
+    __slots__ = ('members', 'images', 'by_phone', 'by_name', 'by_path')
+    
+    def __init__(self, members: List[str]):
+        self.members = set(members)  # every file member, for direct path checks
+        self.images = []  # image members in archive order
+        self.by_phone = {}  # phone digits -> member
+        self.by_name = {}  # filename with and without extension -> member
+        self.by_path = {}  # relative path (member name) -> member
+        for member in members:
+            name = member.rsplit('/', 1)[-1]
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                self._add(member, name)
+    
+    def _add(self, member: str, name: str):
+        self.images.append(member)
+        self.by_path[member] = member
+        
+        # Store by full filename (for exact XML matches)
+        stem = Path(name).stem  # e.g., "40721208508-1482251074" or "40743143693@s.whatsapp.net"
+        self.by_name[stem] = member
+        self.by_name[name] = member  # Also map with extension
+        
+        # Handle format 1: phone-timestamp (iOS: 40721208508-1482251074)
+        if '-' in stem and '@' not in stem:
+            phone_part = stem.split('-')[0]
+        # Handle format 2: WhatsApp ID (Android: 40743143693@s.whatsapp.net)
+        elif '@s.whatsapp.net' in stem or '@g.us' in stem:
+            phone_part = stem.split('@')[0]
+        else:
+            # Fallback: extract all digits
+            phone_part = stem
+        norm = ''.join(c for c in phone_part if c.isdigit())
+        if len(norm) >= 6:
+            self.by_phone[norm] = member
+    
+    def __contains__(self, member: str) -> bool:
+        return member in self.members
+    
+    def match_photo_refs(self, record: Dict[str, Any]) -> Optional[str]:
+        """Strategies 1-3: photo_extracted_path, photo_filename and photo_local_path from the XML"""
+        # Strategy 1: Match by extracted_path from XML (Android style)
+        extracted_path = record.get('photo_extracted_path')
+        if extracted_path and extracted_path in self.by_path:
+            return self.by_path[extracted_path]
+        
+        # Strategy 2: Match by photo_filename from XML (exact match, then without extension)
+        photo_filename = record.get('photo_filename')
+        if photo_filename:
+            if photo_filename in self.by_name:
+                return self.by_name[photo_filename]
+            base_name = photo_filename.rsplit('.', 1)[0]
+            if base_name in self.by_name:
+                return self.by_name[base_name]
+        
+        # Strategy 3: Match by local_path from XML
+        local_path = record.get('photo_local_path')
+        if local_path and local_path in self.by_path:
+            return self.by_path[local_path]
+        return None
+    
+    def match_phone(self, phone: str) -> Optional[str]:
+        """Strategy 4: match by phone digits, with country code variations"""
+        norm_phone = ''.join(c for c in phone if c.isdigit())
+        if len(norm_phone) < 6:
+            return None
+        # Try direct match
+        matched = self.by_phone.get(norm_phone)
+        if not matched:
+            # Try with country code variations
+            for code in ['40', '1', '44', '33']:
+                if (code + norm_phone) in self.by_phone:
+                    matched = self.by_phone[code + norm_phone]
+                    break
+            # Try without leading 0 or country code
+            if not matched and norm_phone.startswith('0'):
+                matched = self.by_phone.get(norm_phone[1:])
+            if not matched and norm_phone.startswith('40'):
+                matched = self.by_phone.get(norm_phone[2:])
+        return matched
+    
+    def match_contact(self, contact: Dict[str, Any]) -> Optional[str]:
+        return self.match_photo_refs(contact) or (
+            self.match_phone(contact['phone']) if contact.get('phone') else None
+        )
+    
+    def match_group(self, group: Dict[str, Any]) -> Optional[str]:
+        matched = self.match_photo_refs(group)
+        if not matched and group.get('group_id'):
+            # Strategy 4: Match by group ID digits for WhatsApp groups
+            norm_id = ''.join(c for c in group['group_id'].split('@')[0] if c.isdigit())
+            matched = self.by_phone.get(norm_id)
+        return matched
+    
+    def find_profile_image(self) -> Optional[str]:
+        """Locate the device owner's picture (me.jpg), preferring the UserAccounts folder"""
+        image_parts = [member.split('/') for member in self.images]
+        
+        # Strategy 1: me.jpg in a UserAccounts folder
+        for parts in image_parts:
+            if parts[-1] == 'me.jpg' and len(parts) > 1 and parts[-2] == 'UserAccounts':
+                return '/'.join(parts)
+        
+        # Strategy 2: ANY me.jpg in the archive
+        for parts in image_parts:
+            if parts[-1] == 'me.jpg':
+                return '/'.join(parts)
+        
+        # Strategy 3: any .jpg with 'profile' or 'me' in its name in a UserAccounts folder
+        for parts in image_parts:
+            if len(parts) > 1 and parts[-2] == 'UserAccounts' and parts[-1].endswith('.jpg'):
+                if 'me' in parts[-1].lower() or 'profile' in parts[-1].lower():
+                    return '/'.join(parts)
+        return None
 
 # API Endpoints
 @api_router.get("/")
@@ -873,611 +1756,835 @@ async def root():
 
 from fastapi import Form
 
-@api_router.post("/upload", response_model=UploadStats)
-def upload_cellebrite_dump(
-    file: UploadFile = File(...),
-    case_number: str = Form(...),
-    person_name: str = Form(...)
-):
+def ingest_cellebrite_zip(
+    zip_path: Path,
+    filename: str,
+    case_number: str,
+    person_name: str,
+    progress: 'IngestProgress',
+    view_keys: Dict[str, set]
+) -> Dict[str, Any]:
     """
-    Robust Upload Handler with Regex-based XML detection and detailed logging.
+    Ingest pipeline for one Cellebrite ZIP: extract, detect reports, parse, copy images, insert.
+    Regex-based XML detection with detailed logging. Returns the UploadStats fields.
+    view_keys collects the derived view keys as documents are queued, so a failed ingest
+    can still refresh the views for what it stored.
     """
-    if not file.filename.endswith('.zip'):
-        raise HTTPException(status_code=400, detail="Only ZIP files are supported")
-    
     # Generate unique upload session ID for this upload
     upload_session_id = str(uuid.uuid4())
     logger.info(f"Starting upload with session ID: {upload_session_id}")
     
     stats = {'contacts': 0, 'passwords': 0, 'user_accounts': 0, 'upload_time': datetime.now(timezone.utc)}
     
-    # Setup Directories
-    uploads_dir = Path('/app/uploads')
-    safe_case = "".join(c for c in case_number if c.isalnum() or c in ('_', '-'))
-    safe_person = "".join(c for c in person_name if c.isalnum() or c in ('_', '-'))
-    
     # Extract device info early from filename
-    device_info = sanitize_filename(file.filename.replace('.zip', ''))
+    device_info = sanitize_filename(filename.replace('.zip', ''))
     device_from_filename = device_info  # Store original filename-based device
-    safe_device = device_info if device_info else 'Unknown_Device'
     
-    # Create directory structure: uploads/CaseNumber/SuspectName/Device
-    case_suspect_device_dir = uploads_dir / safe_case / safe_person / safe_device
-    case_suspect_device_dir.mkdir(parents=True, exist_ok=True) 
-    
-    try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_zip_path = Path(temp_dir) / "upload.zip"
-            
-            # Stream file to disk
-            with open(temp_zip_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            with zipfile.ZipFile(temp_zip_path) as zip_ref:
-                zip_ref.extractall(temp_dir)
-            
-            temp_path = Path(temp_dir)
-            
-            # --- IMPROVED FILE DETECTION (REGEX) ---
-            xml_files = list(temp_path.rglob('*.xml'))
-            contacts_file = None
-            passwords_file = None
-            accounts_file = None
-            
-            logger.info(f"Scanning {len(xml_files)} XML files...")
-            
-            for xml_path in xml_files:
-                try:
-                    # Read first 50KB to identify file type (optimization)
-                    with open(xml_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        start_content = f.read(50000)
+    # Nothing is extracted: report XMLs and images are located from the ZIP
+    # central directory and only the members we ingest are streamed out
+    # Matched images are copied to the blob store and documents are written in chunks,
+    # both in the background while parsing continues
+    with zipfile.ZipFile(zip_path) as zip_ref, \
+            ReportParser(zip_ref, zip_path) as reports, \
+            ImageMaterializer(zip_path) as images, \
+            BulkWriter(sync_db, images, on_write=bump_generation_sync) as writer:
+        member_names = zip_ref.namelist()
+        file_members = [info.filename for info in zip_ref.infolist() if not info.is_dir()]
+        
+        # --- IMPROVED FILE DETECTION (REGEX) ---
+        progress.set_stage('detecting')
+        xml_files = [name for name in file_members if name.endswith('.xml')]
+        contacts_file = None
+        passwords_file = None
+        accounts_file = None
+        
+        logger.info(f"Scanning {len(xml_files)} XML files...")
+        
+        for xml_path in xml_files:
+            try:
+                # Read first 50KB to identify file type (optimization)
+                with zip_ref.open(xml_path) as f:
+                    start_content = f.read(50000).decode('utf-8', errors='ignore')
+                
+                # Use Regex to match tags regardless of attribute order
+                # Matches: <model ... type="UserAccount" ... >
+                if re.search(r'<model\s+[^>]*type=["\']Contact["\']', start_content, re.IGNORECASE):
+                    contacts_file = xml_path
+                    logger.info(f"Found CONTACTS file: {xml_path}")
+                
+                if re.search(r'<model\s+[^>]*type=["\']Password["\']', start_content, re.IGNORECASE):
+                    passwords_file = xml_path
+                    logger.info(f"Found PASSWORDS file: {xml_path}")
                     
-                    # Use Regex to match tags regardless of attribute order
-                    # Matches: <model ... type="UserAccount" ... >
-                    if re.search(r'<model\s+[^>]*type=["\']Contact["\']', start_content, re.IGNORECASE):
-                        contacts_file = xml_path
-                        logger.info(f"Found CONTACTS file: {xml_path.name}")
+                if re.search(r'<model\s+[^>]*type=["\']UserAccount["\']', start_content, re.IGNORECASE):
+                    accounts_file = xml_path
+                    logger.info(f"Found ACCOUNTS file: {xml_path}")
                     
-                    if re.search(r'<model\s+[^>]*type=["\']Password["\']', start_content, re.IGNORECASE):
-                        passwords_file = xml_path
-                        logger.info(f"Found PASSWORDS file: {xml_path.name}")
-                        
-                    if re.search(r'<model\s+[^>]*type=["\']UserAccount["\']', start_content, re.IGNORECASE):
-                        accounts_file = xml_path
-                        logger.info(f"Found ACCOUNTS file: {xml_path.name}")
-                        
-                except Exception as e:
-                    logger.warning(f"Skipping file {xml_path.name}: {e}")
-
-            # Extract device info from XML metadata (manufacturer + model)
-            # Try UserAccounts.xml first, then fallback to Contacts.xml if not found
-            if accounts_file:
-                xml_content = accounts_file.read_text(encoding='utf-8')
-                extracted_device = extract_device_from_xml(xml_content)
-                if extracted_device:
-                    device_info = extracted_device
-                    safe_device = sanitize_filename(device_info)
-                    # Update directory path with proper device name
-                    case_suspect_device_dir = uploads_dir / safe_case / safe_person / safe_device
-                    case_suspect_device_dir.mkdir(parents=True, exist_ok=True)
-                    logger.info(f"Device extracted from XML (UserAccounts): {device_info}")
-            
-            # Fallback: Try to extract device from Contacts.xml if not extracted yet
-            if not accounts_file and contacts_file and device_info == device_from_filename:
-                logger.info("No UserAccounts.xml found, trying to extract device from Contacts.xml...")
-                xml_content = contacts_file.read_text(encoding='utf-8')
-                extracted_device = extract_device_from_xml(xml_content)
-                if extracted_device:
-                    device_info = extracted_device
-                    safe_device = sanitize_filename(device_info)
-                    # Update directory path with proper device name
-                    case_suspect_device_dir = uploads_dir / safe_case / safe_person / safe_device
-                    case_suspect_device_dir.mkdir(parents=True, exist_ok=True)
-                    logger.info(f"Device extracted from XML (Contacts): {device_info}")
-            
-            # Extract suspect phone
-            suspect_phone = extract_device_owner_phone(temp_path)
-            
-            # --- PROCESS CONTACTS ---
-            if contacts_file:
-                logger.info("Processing Contacts...")
-                xml_content = contacts_file.read_text(encoding='utf-8')
-                contacts_data = parse_contacts_xml(xml_content)
+            except Exception as e:
+                logger.warning(f"Skipping file {xml_path}: {e}")
+
+        # Extract device info from XML metadata (manufacturer + model)
+        # Try UserAccounts.xml first, then fallback to Contacts.xml if not found
+        if accounts_file:
+            with zip_ref.open(accounts_file) as source:
+                extracted_device = extract_device_from_report(source)
+            if extracted_device:
+                device_info = extracted_device
+                logger.info(f"Device extracted from XML (UserAccounts): {device_info}")
+        
+        # Fallback: Try to extract device from Contacts.xml if not extracted yet
+        if not accounts_file and contacts_file and device_info == device_from_filename:
+            logger.info("No UserAccounts.xml found, trying to extract device from Contacts.xml...")
+            with zip_ref.open(contacts_file) as source:
+                extracted_device = extract_device_from_report(source)
+            if extracted_device:
+                device_info = extracted_device
+                logger.info(f"Device extracted from XML (Contacts): {device_info}")
+        
+        # Multi-process mode: start parsing every report now, consume the records in order below
+        for kind, member in (('contacts', contacts_file), ('passwords', passwords_file), ('user_accounts', accounts_file)):
+            reports.submit(kind, member)
+        if reports.pool is not None:
+            logger.info("Parsing reports in worker processes")
+        
+        # Extract suspect phone
+        suspect_phone = extract_device_owner_phone(member_names)
+        
+        # Link graph: this upload's device and number belong to the suspect
+        graph_links = set()  # (type, source, target) edges written by this upload
+        add_graph_edges(writer, ownership_edges({
+            'case_number': case_number, 'person_name': person_name,
+            'device_info': device_info, 'upload_session_id': upload_session_id
+        }, suspect_phone), graph_links)
+        
+        # One name-based image index shared by contacts, groups and the suspect profile
+        image_index = ImageIndex(file_members)
+        logger.info(f"Total images indexed: {len(image_index.by_phone)} by phone, {len(image_index.by_name)} by filename, {len(image_index.by_path)} by path")
+        
+        # --- PROCESS CONTACTS & WHATSAPP GROUPS (single pass over Contacts.xml) ---
+        groups_data = []
+        dedup_keys = view_keys['contacts_dedup']  # contacts_dedup rows touched by this upload
+        password_keys = view_keys['password_usage']  # password_usage rows touched by this upload
+        group_keys = view_keys['whatsapp_group_summary']  # whatsapp_group_summary rows touched by this upload
+        if contacts_file:
+            logger.info("Processing Contacts and WhatsApp Groups...")
+            progress.set_stage('contacts')
+            
+            for record_kind, contact_dict in reports.records('contacts', contacts_file):
+                progress.advance()
+                if record_kind == 'group':
+                    # Groups are few - keep them for the group stage below
+                    groups_data.append(contact_dict)
+                    continue
                 
-                # Image Indexing - Handle multiple formats:
-                # iOS: files/Image/{phone}-{timestamp}.jpg or .thumb
-                # Android: contacts/Source/ID/{phone}.j or files/Image/{phone}.j
-                image_files = {}
-                image_by_full_name = {}  # Map by complete filename for exact matching
-                image_by_path = {}  # Map by relative path for extracted_path matching
+                contact_dict.update({
+                    'case_number': case_number, 'person_name': person_name,
+                    'device_info': device_info, 'suspect_phone': suspect_phone,
+                    'upload_session_id': upload_session_id,
+                    **phone_keys(contact_dict.get('phone'))
+                })
                 
-                for img_path in temp_path.rglob('*'):
-                    if img_path.is_file() and not img_path.name.endswith('.xml'):
-                        # Check if it's an image file (.jpg, .jpeg, .png, .thumb, .j)
-                        if any(img_path.name.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.thumb', '.j']):
-                            # Store by full filename (for exact XML matches)
-                            base_name = img_path.stem  # e.g., "40721208508-1482251074" or "40743143693@s.whatsapp.net"
-                            image_by_full_name[base_name] = img_path
-                            image_by_full_name[img_path.name] = img_path  # Also map with extension
-                            
-                            # Store relative path for extracted_path matching
-                            try:
-                                rel_path = str(img_path.relative_to(temp_path))
-                                image_by_path[rel_path.replace('\\', '/')] = img_path
-                            except:
-                                pass
-                            
-                            fname = img_path.stem
-                            # Handle format 1: phone-timestamp (iOS: 40721208508-1482251074)
-                            if '-' in fname and '@' not in fname:
-                                phone_part = fname.split('-')[0]
-                                norm = ''.join(c for c in phone_part if c.isdigit())
-                                if norm and len(norm) >= 6:
-                                    image_files[norm] = img_path
-                            # Handle format 2: WhatsApp ID (Android: 40743143693@s.whatsapp.net)
-                            elif '@s.whatsapp.net' in fname or '@g.us' in fname:
-                                phone_part = fname.split('@')[0]
-                                norm = ''.join(c for c in phone_part if c.isdigit())
-                                if norm and len(norm) >= 6:
-                                    image_files[norm] = img_path
-                            else:
-                                # Fallback: extract all digits
-                                norm = ''.join(c for c in fname if c.isdigit())
-                                if norm and len(norm) >= 6:
-                                    image_files[norm] = img_path
+                # Photo Match Logic - extracted path, filename, local path, phone
+                matched_img = image_index.match_contact(contact_dict)
                 
-                logger.info(f"Total images indexed: {len(image_files)} by phone, {len(image_by_full_name)} by filename, {len(image_by_path)} by path")
-
-                batch_contacts = []
-                for contact_dict in contacts_data:
-                    contact_dict.update({
-                        'case_number': case_number, 'person_name': person_name,
-                        'device_info': device_info, 'suspect_phone': suspect_phone,
-                        'upload_session_id': upload_session_id
-                    })
-                    
-                    # Photo Match Logic - Multiple strategies:
-                    matched_img = None
-                    
-                    # Strategy 1: Match by extracted_path from XML (Android style)
-                    extracted_path = contact_dict.get('photo_extracted_path')
-                    if extracted_path and extracted_path in image_by_path:
-                        matched_img = image_by_path[extracted_path]
-                    
-                    # Strategy 2: Match by photo_filename from XML (exact match)
-                    if not matched_img:
-                        photo_filename = contact_dict.get('photo_filename')
-                        if photo_filename:
-                            # Try exact match with full name
-                            if photo_filename in image_by_full_name:
-                                matched_img = image_by_full_name[photo_filename]
-                            else:
-                                # Try without extension
-                                base_name = photo_filename.rsplit('.', 1)[0]
-                                if base_name in image_by_full_name:
-                                    matched_img = image_by_full_name[base_name]
-                    
-                    # Strategy 3: Match by local_path from XML
-                    if not matched_img:
-                        local_path = contact_dict.get('photo_local_path')
-                        if local_path and local_path in image_by_path:
-                            matched_img = image_by_path[local_path]
-                    
-                    # Strategy 4: Match by phone number (fallback)
-                    if not matched_img:
-                        phone = contact_dict.get('phone', '')
-                        if phone:
-                            norm_phone = ''.join(c for c in phone if c.isdigit())
-                            if len(norm_phone) >= 6:
-                                # Try direct match
-                                matched_img = image_files.get(norm_phone)
-                                if not matched_img:
-                                    # Try with country code variations
-                                    for code in ['40', '1', '44', '33']:
-                                        if (code + norm_phone) in image_files:
-                                            matched_img = image_files[code + norm_phone]
-                                            break
-                                    # Try without leading 0 or country code
-                                    if not matched_img and norm_phone.startswith('0'):
-                                        matched_img = image_files.get(norm_phone[1:])
-                                    if not matched_img and norm_phone.startswith('40'):
-                                        matched_img = image_files.get(norm_phone[2:])
-                    
-                    # Copy matched image
-                    if matched_img:
-                        try:
-                            img_name = f"{contact_dict.get('id', uuid.uuid4())}.jpg"
-                            shutil.copy(matched_img, case_suspect_device_dir / img_name)
-                            contact_dict['photo_path'] = f"/images/{safe_case}/{safe_person}/{safe_device}/{img_name}"
-                            logger.info(f"Copied image for contact: {contact_dict.get('name', 'Unknown')} -> {img_name}")
-                        except Exception as e:
-                            logger.error(f"Failed to copy image: {e}")
-
-                    contact = Contact(**contact_dict)
-                    doc = contact.model_dump()
-                    if doc.get('created_at'): doc['created_at'] = doc['created_at'].replace(tzinfo=timezone.utc)
-                    batch_contacts.append(doc)
+                contact = Contact(**contact_dict)
+                doc = contact.model_dump()
+                if doc.get('created_at'): doc['created_at'] = doc['created_at'].replace(tzinfo=timezone.utc)
+                if doc.get('phone'):
+                    dedup_keys.add(doc['normalized_phone'] or '')
+                # Matched image is copied by the image stage before the chunk is written
+                doc['search_terms'] = search_terms('contacts', doc)
+                writer.add('contacts', doc, images.submit(matched_img) if matched_img else None)
+                memberships = group_membership_edges(doc)
+                for edge in memberships:
+                    writer.add('group_memberships', edge)
+                    group_keys.add(edge['group_id'])
+                add_graph_edges(writer, contact_link_edges(doc, [edge['group_id'] for edge in memberships]), graph_links)
+        
+        # --- PROCESS WHATSAPP GROUPS ---
+        if groups_data:
+            logger.info(f"Processing {len(groups_data)} WhatsApp Groups...")
+            progress.set_stage('whatsapp_groups')
+            
+            for group_dict in groups_data:
+                group_dict.update({
+                    'case_number': case_number, 
+                    'person_name': person_name,
+                    'device_info': device_info, 
+                    'suspect_phone': suspect_phone,
+                    'upload_session_id': upload_session_id
+                })
                 
-                if batch_contacts:
-                    sync_db.contacts.insert_many(batch_contacts)
-                    stats['contacts'] = len(batch_contacts)
-            
-            # --- PROCESS WHATSAPP GROUPS ---
-            if contacts_file:
-                logger.info("Processing WhatsApp Groups...")
-                xml_content = contacts_file.read_text(encoding='utf-8')
-                groups_data = parse_whatsapp_groups_xml(xml_content)
+                # Photo Match Logic - same strategies as contacts, group ID digits instead of phone
+                matched_img = image_index.match_group(group_dict)
                 
-                batch_groups = []
-                for group_dict in groups_data:
-                    group_dict.update({
-                        'case_number': case_number, 
-                        'person_name': person_name,
-                        'device_info': device_info, 
-                        'suspect_phone': suspect_phone,
-                        'upload_session_id': upload_session_id
-                    })
-                    
-                    # Photo Match Logic - Multiple strategies (same as contacts)
-                    matched_img = None
-                    
-                    # Strategy 1: Match by extracted_path
-                    extracted_path = group_dict.get('photo_extracted_path')
-                    if extracted_path and image_by_path and extracted_path in image_by_path:
-                        matched_img = image_by_path[extracted_path]
-                    
-                    # Strategy 2: Match by filename
-                    if not matched_img:
-                        photo_filename = group_dict.get('photo_filename')
-                        if photo_filename and image_by_full_name:
-                            if photo_filename in image_by_full_name:
-                                matched_img = image_by_full_name[photo_filename]
-                            else:
-                                base_name = photo_filename.rsplit('.', 1)[0]
-                                if base_name in image_by_full_name:
-                                    matched_img = image_by_full_name[base_name]
-                    
-                    # Strategy 3: Match by local_path
-                    if not matched_img:
-                        local_path = group_dict.get('photo_local_path')
-                        if local_path and image_by_path and local_path in image_by_path:
-                            matched_img = image_by_path[local_path]
-                    
-                    # Strategy 4: Match by group_id for WhatsApp groups
-                    if not matched_img:
-                        group_id = group_dict.get('group_id', '')
-                        if group_id and image_files:
-                            # Try matching by group ID digits
-                            norm_id = ''.join(c for c in group_id.split('@')[0] if c.isdigit())
-                            if norm_id in image_files:
-                                matched_img = image_files[norm_id]
-                    
-                    # Copy matched image
-                    if matched_img:
-                        try:
-                            img_name = f"group_{group_dict.get('id', uuid.uuid4())}.jpg"
-                            shutil.copy(matched_img, case_suspect_device_dir / img_name)
-                            group_dict['photo_path'] = f"/images/{safe_case}/{safe_person}/{safe_device}/{img_name}"
-                            logger.info(f"Copied group image: {group_dict.get('group_name', 'Unknown')} -> {img_name}")
-                        except Exception as e:
-                            logger.error(f"Failed to copy group image: {e}")
-                    
-                    group = WhatsAppGroup(**group_dict)
-                    doc = group.model_dump()
-                    if doc.get('created_at'): 
-                        doc['created_at'] = doc['created_at'].replace(tzinfo=timezone.utc)
-                    batch_groups.append(doc)
+                group = WhatsAppGroup(**group_dict)
+                doc = group.model_dump()
+                if doc.get('created_at'): 
+                    doc['created_at'] = doc['created_at'].replace(tzinfo=timezone.utc)
+                writer.add('whatsapp_groups', doc, images.submit(matched_img) if matched_img else None)
+                if doc.get('group_id'):
+                    group_keys.add(doc['group_id'])
+
+        # --- PROCESS PASSWORDS ---
+        if passwords_file:
+            logger.info("Processing Passwords...")
+            progress.set_stage('passwords')
+            pass_data = reports.records('passwords', passwords_file)
+            
+            for pwd_dict in pass_data:
+                progress.advance()
+                if not any([pwd_dict.get('username'), pwd_dict.get('password'), pwd_dict.get('url')]): continue
                 
-                if batch_groups:
-                    sync_db.whatsapp_groups.insert_many(batch_groups)
-                    stats['whatsapp_groups'] = len(batch_groups)
-                    logger.info(f"Stored {len(batch_groups)} WhatsApp groups")
-
-            # --- PROCESS PASSWORDS ---
-            if passwords_file:
-                logger.info("Processing Passwords...")
-                pass_content = passwords_file.read_text(encoding='utf-8')
-                pass_data = parse_passwords_xml(pass_content)
-                batch_passwords = []
+                pwd_dict.update({
+                    'case_number': case_number, 'person_name': person_name, 'device_info': device_info,
+                    'upload_session_id': upload_session_id,
+                    'email_domain': extract_email_domain(pwd_dict.get('username', '')),
+                    'category': categorize_credential(pwd_dict.get('application', ''), pwd_dict.get('username', ''), '', pwd_dict.get('password', ''))
+                })
                 
-                for pwd_dict in pass_data:
-                    if not any([pwd_dict.get('username'), pwd_dict.get('password'), pwd_dict.get('url')]): continue
-                    
-                    pwd_dict.update({
+                pwd = Password(**pwd_dict)
+                doc = pwd.model_dump()
+                if doc.get('created_at'): doc['created_at'] = doc['created_at'].replace(tzinfo=timezone.utc)
+                doc['search_terms'] = search_terms('passwords', doc)
+                doc['credential_key'] = credential_key('passwords', doc)
+                doc['password_key'] = password_key('passwords', doc)
+                if doc['password_key']:
+                    password_keys.add(doc['password_key'])
+                writer.add('passwords', doc)
+
+        # --- PROCESS ACCOUNTS & SUSPECT PROFILE ---
+        if accounts_file:
+            logger.info(f"Processing Accounts from {accounts_file}")
+            progress.set_stage('user_accounts')
+            
+            profile_accounts = []  # account docs kept for the suspect profile
+            all_emails = set()
+            suspect_image_source_path = None
+            parsed_accounts = 0
+            
+            for acc_dict in reports.records('user_accounts', accounts_file):
+                parsed_accounts += 1
+                progress.advance()
+                if any([acc_dict.get('username'), acc_dict.get('email'), acc_dict.get('user_id')]):
+                    acc_dict.update({
                         'case_number': case_number, 'person_name': person_name, 'device_info': device_info,
                         'upload_session_id': upload_session_id,
-                        'email_domain': extract_email_domain(pwd_dict.get('username', '')),
-                        'category': categorize_credential(pwd_dict.get('application', ''), pwd_dict.get('username', ''), '', pwd_dict.get('password', ''))
+                        'email_domain': extract_email_domain(acc_dict.get('email', '')),
+                        'category': categorize_credential(acc_dict.get('source', ''), acc_dict.get('username', ''), acc_dict.get('email', ''))
                     })
                     
-                    pwd = Password(**pwd_dict)
-                    doc = pwd.model_dump()
+                    # Collect emails from both email and username fields
+                    if acc_dict.get('email'): 
+                        all_emails.add(acc_dict['email'])
+                    # Also check if username looks like an email
+                    username = acc_dict.get('username', '')
+                    if username and '@' in username and '.' in username:
+                        all_emails.add(username)
+                    
+                    # Suspect Image Logic
+                    src = (acc_dict.get('source') or '').lower()
+                    path = acc_dict.get('profile_pic_path')
+                    if path:
+                        # Fix path slashes
+                        full_path = path.replace('\\', '/')
+                        if full_path in image_index:
+                            if 'whatsapp' in src: suspect_image_source_path = full_path
+                            elif 'instagram' in src and not suspect_image_source_path: suspect_image_source_path = full_path
+                            elif not suspect_image_source_path: suspect_image_source_path = full_path
+
+                    acc = UserAccount(**acc_dict)
+                    doc = acc.model_dump()
                     if doc.get('created_at'): doc['created_at'] = doc['created_at'].replace(tzinfo=timezone.utc)
-                    batch_passwords.append(doc)
-                
-                if batch_passwords:
-                    sync_db.passwords.insert_many(batch_passwords)
-                    stats['passwords'] = len(batch_passwords)
-
-            # --- PROCESS ACCOUNTS & SUSPECT PROFILE ---
-            if accounts_file:
-                logger.info(f"Processing Accounts from {accounts_file.name}")
-                acc_content = accounts_file.read_text(encoding='utf-8')
-                
-                # --- Debugging: Check for UserAccount tag manually ---
-                if 'UserAccount' not in acc_content:
-                    logger.error("CRITICAL: 'UserAccount' string not found in file content!")
-                
-                acc_data = parse_useraccounts_xml(acc_content)
-                logger.info(f"Parsed {len(acc_data)} accounts.")
-                
-                batch_accounts = []
-                all_emails = set()
-                suspect_image_source_path = None
-                
-                for acc_dict in acc_data:
-                    if any([acc_dict.get('username'), acc_dict.get('email'), acc_dict.get('user_id')]):
-                        acc_dict.update({
-                            'case_number': case_number, 'person_name': person_name, 'device_info': device_info,
-                            'upload_session_id': upload_session_id,
-                            'email_domain': extract_email_domain(acc_dict.get('email', '')),
-                            'category': categorize_credential(acc_dict.get('source', ''), acc_dict.get('username', ''), acc_dict.get('email', ''))
-                        })
-                        
-                        # Collect emails from both email and username fields
-                        if acc_dict.get('email'): 
-                            all_emails.add(acc_dict['email'])
-                        # Also check if username looks like an email
-                        username = acc_dict.get('username', '')
-                        if username and '@' in username and '.' in username:
-                            all_emails.add(username)
-                        
-                        # Suspect Image Logic
-                        src = (acc_dict.get('source') or '').lower()
-                        path = acc_dict.get('profile_pic_path')
-                        if path:
-                            # Fix path slashes
-                            clean_path = path.replace('\\', '/')
-                            full_path = temp_path / clean_path
-                            if full_path.exists():
-                                if 'whatsapp' in src: suspect_image_source_path = full_path
-                                elif 'instagram' in src and not suspect_image_source_path: suspect_image_source_path = full_path
-                                elif not suspect_image_source_path: suspect_image_source_path = full_path
-
-                        acc = UserAccount(**acc_dict)
-                        doc = acc.model_dump()
-                        if doc.get('created_at'): doc['created_at'] = doc['created_at'].replace(tzinfo=timezone.utc)
-                        batch_accounts.append(doc)
-                
-                if batch_accounts:
-                    sync_db.user_accounts.insert_many(batch_accounts)
-                    stats['user_accounts'] = len(batch_accounts)
+                    doc['search_terms'] = search_terms('user_accounts', doc)
+                    doc['credential_key'] = credential_key('user_accounts', doc)
+                    doc['password_key'] = password_key('user_accounts', doc)
+                    if doc['password_key']:
+                        password_keys.add(doc['password_key'])
+                    writer.add('user_accounts', doc)
+                    profile_accounts.append(doc)
+            
+            logger.info(f"Parsed {parsed_accounts} accounts.")
+            if not parsed_accounts:
+                logger.error("CRITICAL: no UserAccount models found in accounts file!")
+            
+            
+            # --- CREATE SUSPECT PROFILE ---
+            progress.set_stage('suspect_profile')
+            final_profile_path = None
+            
+            # First, try to find me.jpg in UserAccounts folder OR anywhere in the ZIP
+            if not suspect_image_source_path:
+                logger.info("Looking for me.jpg in ZIP members...")
+                suspect_image_source_path = image_index.find_profile_image()
+                if suspect_image_source_path:
+                    logger.info(f"Found profile image at: {suspect_image_source_path}")
+            
+            # Copy suspect image if found
+            if suspect_image_source_path:
+                ext = Path(suspect_image_source_path).suffix or '.jpg'
+                final_profile_path = images.result(images.submit(suspect_image_source_path, ext))
+                if final_profile_path:
+                    logger.info(f"Suspect image saved: {final_profile_path}")
+
+            # Prepare user accounts for suspect profile (include all rich data)
+            user_accounts_for_profile = [
+                {
+                    'username': acc.get('username'),
+                    'email': acc.get('email'),
+                    'name': acc.get('name'),
+                    'user_id': acc.get('user_id'),
+                    'source': acc.get('source'),
+                    'service_type': acc.get('service_type'),
+                    'service_identifier': acc.get('service_identifier'),
+                    'notes': acc.get('notes'),
+                    'time_created': acc.get('time_created'),
+                    'metadata': acc.get('metadata')
+                } 
+                for acc in profile_accounts
+            ]
+            
+            profile = SuspectProfile(
+                case_number=case_number, person_name=person_name, device_info=device_info,
+                upload_session_id=upload_session_id,
+                profile_image_path=final_profile_path, suspect_phone=suspect_phone, 
+                emails=list(all_emails), user_accounts=user_accounts_for_profile
+            )
+            
+            doc = profile.model_dump()
+            if doc.get('created_at'): doc['created_at'] = doc['created_at'].replace(tzinfo=timezone.utc)
+            if doc.get('updated_at'): doc['updated_at'] = doc['updated_at'].replace(tzinfo=timezone.utc)
+
+            # Check if profiles already exist for this case/person/device combination
+            # Find ALL existing profiles and get the most recent one
+            existing_profiles = list(sync_db.suspect_profiles.find({
+                'case_number': case_number,
+                'person_name': person_name,
+                'device_info': device_info
+            }).sort('created_at', -1))
+            
+            # If existing profiles found, check if this is a retry or new upload session
+            if existing_profiles:
+                # Get the most recent profile
+                most_recent = existing_profiles[0]
+                existing_time = most_recent.get('created_at')
+                new_time = doc.get('created_at')
                 
-                # --- CREATE SUSPECT PROFILE ---
-                final_profile_path = None
+                logger.info(f"Found {len(existing_profiles)} existing profile(s). Most recent: {existing_time}, New: {new_time}")
                 
-                # First, try to find me.jpg in UserAccounts folder OR anywhere in the ZIP
-                if not suspect_image_source_path:
-                    logger.info("Looking for me.jpg in extracted files...")
-                    
-                    # Strategy 1: Search in UserAccounts folder first
-                    for user_accounts_dir in temp_path.rglob('UserAccounts'):
-                        if user_accounts_dir.is_dir():
-                            me_jpg_path = user_accounts_dir / 'me.jpg'
-                            if me_jpg_path.exists():
-                                suspect_image_source_path = me_jpg_path
-                                logger.info(f"Found me.jpg in UserAccounts at: {me_jpg_path}")
-                                break
-                    
-                    # Strategy 2: If not found, search for ANY me.jpg file in the entire extraction
-                    if not suspect_image_source_path:
-                        me_files = list(temp_path.rglob('me.jpg'))
-                        if me_files:
-                            suspect_image_source_path = me_files[0]
-                            logger.info(f"Found me.jpg at: {suspect_image_source_path}")
+                # If more than 5 minutes apart, treat as new upload session
+                if existing_time and new_time:
+                    from datetime import timedelta
                     
-                    # Strategy 3: If still not found, look for any file with 'profile' or 'me' in name in useraccounts
-                    if not suspect_image_source_path:
-                        for user_accounts_dir in temp_path.rglob('UserAccounts'):
-                            if user_accounts_dir.is_dir():
-                                for img_file in user_accounts_dir.glob('*.jpg'):
-                                    if 'me' in img_file.name.lower() or 'profile' in img_file.name.lower():
-                                        suspect_image_source_path = img_file
-                                        logger.info(f"Found potential profile image: {suspect_image_source_path}")
-                                        break
-                                if suspect_image_source_path:
-                                    break
-                
-                # Copy suspect image if found
-                if suspect_image_source_path and suspect_image_source_path.exists():
-                    try:
-                        ext = suspect_image_source_path.suffix or '.jpg'
-                        new_name = f"profile_{uuid.uuid4().hex[:8]}{ext}"
-                        shutil.copy(suspect_image_source_path, case_suspect_device_dir / new_name)
-                        final_profile_path = f"/images/{safe_case}/{safe_person}/{safe_device}/{new_name}"
-                        logger.info(f"Suspect image saved: {final_profile_path}")
-                    except Exception as e:
-                        logger.error(f"Failed copy suspect image: {e}")
-
-                # Prepare user accounts for suspect profile (include all rich data)
-                user_accounts_for_profile = [
-                    {
-                        'username': acc.get('username'),
-                        'email': acc.get('email'),
-                        'name': acc.get('name'),
-                        'user_id': acc.get('user_id'),
-                        'source': acc.get('source'),
-                        'service_type': acc.get('service_type'),
-                        'service_identifier': acc.get('service_identifier'),
-                        'notes': acc.get('notes'),
-                        'time_created': acc.get('time_created'),
-                        'metadata': acc.get('metadata')
-                    } 
-                    for acc in batch_accounts
-                ]
-                
-                profile = SuspectProfile(
-                    case_number=case_number, person_name=person_name, device_info=device_info,
-                    upload_session_id=upload_session_id,
-                    profile_image_path=final_profile_path, suspect_phone=suspect_phone, 
-                    emails=list(all_emails), user_accounts=user_accounts_for_profile
-                )
-                
-                doc = profile.model_dump()
-                if doc.get('created_at'): doc['created_at'] = doc['created_at'].replace(tzinfo=timezone.utc)
-                if doc.get('updated_at'): doc['updated_at'] = doc['updated_at'].replace(tzinfo=timezone.utc)
-
-                # Check if profiles already exist for this case/person/device combination
-                # Find ALL existing profiles and get the most recent one
-                existing_profiles = list(sync_db.suspect_profiles.find({
-                    'case_number': case_number,
-                    'person_name': person_name,
-                    'device_info': device_info
-                }).sort('created_at', -1))
-                
-                # If existing profiles found, check if this is a retry or new upload session
-                if existing_profiles:
-                    # Get the most recent profile
-                    most_recent = existing_profiles[0]
-                    existing_time = most_recent.get('created_at')
-                    new_time = doc.get('created_at')
+                    # Ensure both datetimes are timezone-aware for comparison
+                    if existing_time.tzinfo is None:
+                        existing_time = existing_time.replace(tzinfo=timezone.utc)
+                    if new_time.tzinfo is None:
+                        new_time = new_time.replace(tzinfo=timezone.utc)
                     
-                    logger.info(f"Found {len(existing_profiles)} existing profile(s). Most recent: {existing_time}, New: {new_time}")
+                    time_diff = abs((new_time - existing_time).total_seconds())
+                    logger.info(f"Time difference: {time_diff} seconds")
                     
-                    # If more than 5 minutes apart, treat as new upload session
-                    if existing_time and new_time:
-                        from datetime import timedelta
-                        
-                        # Ensure both datetimes are timezone-aware for comparison
-                        if existing_time.tzinfo is None:
-                            existing_time = existing_time.replace(tzinfo=timezone.utc)
-                        if new_time.tzinfo is None:
-                            new_time = new_time.replace(tzinfo=timezone.utc)
-                        
-                        time_diff = abs((new_time - existing_time).total_seconds())
-                        logger.info(f"Time difference: {time_diff} seconds")
-                        
-                        if time_diff > 300:  # 5 minutes
-                            # New upload session - ALWAYS insert as new profile
-                            logger.info(f"New upload session (>{time_diff}s apart) - inserting new profile with session {upload_session_id}")
-                            sync_db.suspect_profiles.insert_one(doc)
-                        else:
-                            # Same upload session (retry/re-upload within 5 minutes)
-                            # Update THE MOST RECENT profile only, preserve its upload_session_id
-                            logger.info(f"Retry detected (<{time_diff}s apart) - updating most recent profile")
-                            # Don't overwrite upload_session_id - keep the original one
-                            update_doc = {k: v for k, v in doc.items() if k != 'upload_session_id'}
-                            sync_db.suspect_profiles.update_one({
-                                '_id': most_recent['_id']
-                            }, {'$set': update_doc})
+                    if time_diff > 300:  # 5 minutes
+                        # New upload session - ALWAYS insert as new profile
+                        logger.info(f"New upload session (>{time_diff}s apart) - inserting new profile with session {upload_session_id}")
+                        sync_db.suspect_profiles.insert_one(doc)
                     else:
-                        # Can't determine time difference - treat as retry, update most recent
-                        logger.warning("Can't determine time difference - updating most recent profile")
+                        # Same upload session (retry/re-upload within 5 minutes)
+                        # Update THE MOST RECENT profile only, preserve its upload_session_id
+                        logger.info(f"Retry detected (<{time_diff}s apart) - updating most recent profile")
+                        # Don't overwrite upload_session_id - keep the original one
                         update_doc = {k: v for k, v in doc.items() if k != 'upload_session_id'}
                         sync_db.suspect_profiles.update_one({
                             '_id': most_recent['_id']
                         }, {'$set': update_doc})
                 else:
-                    # No existing profile - insert new one
-                    logger.info(f"No existing profile - inserting first profile with session {upload_session_id}")
-                    sync_db.suspect_profiles.insert_one(doc)
+                    # Can't determine time difference - treat as retry, update most recent
+                    logger.warning("Can't determine time difference - updating most recent profile")
+                    update_doc = {k: v for k, v in doc.items() if k != 'upload_session_id'}
+                    sync_db.suspect_profiles.update_one({
+                        '_id': most_recent['_id']
+                    }, {'$set': update_doc})
+            else:
+                # No existing profile - insert new one
+                logger.info(f"No existing profile - inserting first profile with session {upload_session_id}")
+                sync_db.suspect_profiles.insert_one(doc)
+        
+        progress.set_stage('writing')
+    
+    # Both background stages have drained once the with block exits
+    stats.update(writer.inserted)
+    stats['failed_inserts'] = {coll: count for coll, count in writer.failed.items() if count}
+    stats['images'] = images.copied
+    logger.info(f"Inserted {writer.inserted}, rejected {writer.failed}")
+    logger.info(f"Image stage: {images.summary()}")
+    
+    # Incrementally update the derived views with the keys this upload touched
+    progress.set_stage('derived_views')
+    refresh_derived_views(view_keys)
+    bump_generation_sync()
+    return stats
+
+# Background ingest: uploads are staged to disk and processed by a bounded worker pool.
+# Job state lives in Mongo (upload_jobs) so every uvicorn worker can answer status polls.
+ingest_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('INGEST_WORKERS', '2')),
+    thread_name_prefix='ingest'
+)
+
+# The executor is in-process: a restart loses its queued and running jobs. Every process
+# heartbeats the jobs it owns, and jobs whose heartbeat went stale are marked failed
+# (at startup and when polled), so clients polling them always reach a terminal status.
+INGEST_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+JOB_HEARTBEAT_SECONDS = 30
+JOB_STALE_SECONDS = 120
+ACTIVE_JOB_STATUSES = ['queued', 'running']
+
+def stale_jobs_query() -> Dict[str, Any]:
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=JOB_STALE_SECONDS)
+    return {
+        'status': {'$in': ACTIVE_JOB_STATUSES},
+        'worker_id': {'$ne': INGEST_WORKER_ID},
+        '$or': [{'heartbeat_at': {'$lt': cutoff}}, {'heartbeat_at': None}]
+    }
+
+async def fail_interrupted_jobs(query: Dict[str, Any]) -> int:
+    now = datetime.now(timezone.utc)
+    result = await db.upload_jobs.update_many(query, {'$set': {
+        'status': 'failed', 'error': 'Upload interrupted by a server restart',
+        'finished_at': now, 'updated_at': now
+    }})
+    return result.modified_count
+
+async def heartbeat_upload_jobs():
+    """Keep the jobs of this process alive for stale_jobs_query"""
+    while True:
+        try:
+            await db.upload_jobs.update_many(
+                {'worker_id': INGEST_WORKER_ID, 'status': {'$in': ACTIVE_JOB_STATUSES}},
+                {'$set': {'heartbeat_at': datetime.now(timezone.utc)}}
+            )
+        except Exception as e:
+            logger.warning(f"Could not heartbeat upload jobs: {e}")
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
 
+class IngestProgress:
+    """Reports stage, processed records and throughput of one upload job to upload_jobs"""
+    REPORT_INTERVAL = 1.0  # seconds between progress writes
+    
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.stage = 'queued'
+        self.records = 0
+        self._started = time.monotonic()
+        self._last_report = 0.0
+    
+    def _write(self, fields: Dict[str, Any]):
+        fields['updated_at'] = datetime.now(timezone.utc)
+        try:
+            sync_db.upload_jobs.update_one({'id': self.job_id}, {'$set': fields})
+        except Exception as e:
+            # Progress reporting must never break the ingest itself
+            logger.warning(f"Could not update upload job {self.job_id}: {e}")
+    
+    def _counters(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        return {
+            'stage': self.stage,
+            'records_processed': self.records,
+            'throughput': round(self.records / elapsed, 1) if elapsed > 0 else 0.0
+        }
+    
+    def start(self):
+        self._started = time.monotonic()
+        self._write({'status': 'running', 'started_at': datetime.now(timezone.utc)})
+    
+    def set_stage(self, stage: str):
+        self.stage = stage
+        logger.info(f"Upload job {self.job_id}: stage {stage}")
+        self._last_report = time.monotonic()
+        self._write(self._counters())
+    
+    def advance(self, count: int = 1):
+        self.records += count
+        now = time.monotonic()
+        if now - self._last_report >= self.REPORT_INTERVAL:
+            self._last_report = now
+            self._write(self._counters())
+    
+    def complete(self, stats: UploadStats):
+        self.stage = 'completed'
+        self._write({**self._counters(), 'status': 'completed', 'result': stats.model_dump(),
+                     'finished_at': datetime.now(timezone.utc)})
+    
+    def fail(self, error: str):
+        self._write({**self._counters(), 'status': 'failed', 'error': error,
+                     'finished_at': datetime.now(timezone.utc)})
+
+def run_upload_job(job_id: str, zip_path: Path, filename: str, case_number: str, person_name: str):
+    """Worker entry point: run the ingest pipeline for a staged upload and record the outcome"""
+    progress = IngestProgress(job_id)
+    progress.start()
+    view_keys = {'contacts_dedup': set(), 'password_usage': set(), 'whatsapp_group_summary': set()}
+    try:
+        stats = ingest_cellebrite_zip(zip_path, filename, case_number, person_name, progress, view_keys)
+        progress.complete(UploadStats(**stats))
+        logger.info(f"Upload job {job_id} completed: {stats}")
     except zipfile.BadZipFile:
-        raise HTTPException(status_code=400, detail="Invalid ZIP file")
+        progress.fail("Invalid ZIP file")
     except Exception as e:
         logger.error(f"Error processing upload: {str(e)}")
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+        # Part of the upload may already be stored: bring the derived views in line with it
+        try:
+            refresh_derived_views(view_keys)
+        except Exception as refresh_error:
+            logger.error(f"Error refreshing derived views after a failed upload: {str(refresh_error)}")
+        bump_generation_sync()
+        progress.fail(f"Error processing file: {str(e)}")
+    finally:
+        shutil.rmtree(zip_path.parent, ignore_errors=True)
+
+def _stage_upload(upload_file, destination: Path):
+    """Copy the request body to our own staging file so it outlives the request"""
+    with open(destination, "wb") as buffer:
+        shutil.copyfileobj(upload_file, buffer, 16 * 1024 * 1024)
+
+@api_router.post("/upload", response_model=UploadJob, status_code=202)
+async def upload_cellebrite_dump(
+    file: UploadFile = File(...),
+    case_number: str = Form(...),
+    person_name: str = Form(...)
+):
+    """
+    Queue a Cellebrite ZIP for background ingest and return the job right away.
+    Poll /upload/jobs/{job_id} for stage, records processed and throughput.
+    """
+    if not file.filename.endswith('.zip'):
+        raise HTTPException(status_code=400, detail="Only ZIP files are supported")
+    
+    staging_dir = Path(tempfile.mkdtemp(prefix='upload_'))
+    zip_path = staging_dir / "upload.zip"
+    try:
+        # Stream file to disk
+        await run_in_threadpool(_stage_upload, file.file, zip_path)
+        if not zipfile.is_zipfile(zip_path):
+            raise HTTPException(status_code=400, detail="Invalid ZIP file")
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    
+    job = UploadJob(filename=file.filename, case_number=case_number, person_name=person_name,
+                    worker_id=INGEST_WORKER_ID, heartbeat_at=datetime.now(timezone.utc))
+    await db.upload_jobs.insert_one(job.model_dump())
+    ingest_executor.submit(run_upload_job, job.id, zip_path, file.filename, case_number, person_name)
+    logger.info(f"Queued upload job {job.id} for {file.filename}")
+    
+    return job
+
+@api_router.get("/upload/jobs/{job_id}", response_model=UploadJob)
+async def get_upload_job(job_id: str):
+    """Get the status of a background upload job"""
+    job = await db.upload_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    if job['status'] in ACTIVE_JOB_STATUSES and await fail_interrupted_jobs({**stale_jobs_query(), 'id': job_id}):
+        job = await db.upload_jobs.find_one({"id": job_id}, {"_id": 0})
+    return job
+
+# --- List endpoints: filters, sorting and keyset pagination pushed into Mongo ---
+MAX_PAGE_SIZE = 5000
+
+# Filter parameter -> stored field (same dimensions as /filters/{data_type})
+LIST_FILTER_FIELDS = {
+    'case': 'case_number',
+    'suspect': 'person_name',
+    'device': 'device_info',
+    'source': 'source',
+    'category': 'category',
+    'email_domain': 'email_domain',
+    'application': 'application'
+}
+# Merged (deduplicated) rows also match on the values collected from all their duplicates
+MERGED_FILTER_FIELDS = {'case_number': 'cases', 'device_info': 'devices', 'person_name': 'suspects', 'source': 'sources'}
+
+class ListQuery:
+    """
+    Filter, sort and page parameters shared by the list endpoints.
+    Without limit the full (filtered) list is returned; with limit the response carries
+    an X-Next-Cursor header while more rows remain, pass it back as cursor for the next page.
+    """
+    def __init__(
+        self,
+        case: Optional[str] = None,
+        suspect: Optional[str] = None,
+        device: Optional[str] = None,
+        source: Optional[str] = None,
+        category: Optional[str] = None,
+        email_domain: Optional[str] = None,
+        application: Optional[str] = None,
+        sort: Optional[str] = None,
+        order: str = Query('asc', pattern='^(asc|desc)$'),
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None
+    ):
+        values = {'case': case, 'suspect': suspect, 'device': device, 'source': source,
+                  'category': category, 'email_domain': email_domain, 'application': application}
+        self.filters = {LIST_FILTER_FIELDS[name]: value for name, value in values.items() if value}
+        self.sort = sort
+        self.descending = order == 'desc'
+        self.limit = limit
+        self.cursor = self._decode_cursor(cursor) if cursor else None
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> list:
+        try:
+            decoded = json_util.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # Every cursor we issue is [sort value, tie value]
+        if not (isinstance(decoded, list) and len(decoded) == 2):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return decoded
+    
+    @staticmethod
+    def _encode_cursor(values: list) -> str:
+        return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode()
+    
+    def sort_field(self, sort_fields: Dict[str, str], default: str) -> str:
+        if self.sort is None:
+            return default
+        if self.sort not in sort_fields:
+            raise HTTPException(status_code=400, detail=f"Invalid sort key, use one of: {', '.join(sorted(sort_fields))}")
+        return sort_fields[self.sort]
+    
+    def mongo_filter(self, merged: bool = False) -> Dict[str, Any]:
+        """Mongo filter for the active filters (merged rows also match their collected values)"""
+        clauses = []
+        for field, value in self.filters.items():
+            if merged and field in MERGED_FILTER_FIELDS:
+                clauses.append({'$or': [{field: value}, {MERGED_FILTER_FIELDS[field]: value}]})
+            else:
+                clauses.append({field: value})
+        return {'$and': clauses} if clauses else {}
+    
+    def _after_cursor(self, field: str, tie: str) -> Dict[str, Any]:
+        """Keyset condition: rows sorting after the cursor (nulls sort first, as in Mongo)"""
+        value, tie_value = self.cursor
+        op = '$lt' if self.descending else '$gt'
+        if field == tie:
+            return {tie: {op: tie_value}}
+        same_value = {field: value, tie: {op: tie_value}}
+        if value is None:
+            return same_value if self.descending else {'$or': [same_value, {field: {'$ne': None}}]}
+        clauses = [{field: {op: value}}, same_value]
+        if self.descending:
+            clauses.append({field: None})
+        return {'$or': clauses}
+    
+    def _cursor(self, collection, projection: Dict[str, Any], sort_fields: Dict[str, str], default_sort: str,
+                tie: str, merged: bool, query: Optional[Dict[str, Any]]):
+        """Filtered and sorted Mongo cursor, with the sort field and the fields to drop from its rows"""
+        field = self.sort_field(sort_fields, default_sort)
+        filters = [clause for clause in (query, self.mongo_filter(merged)) if clause]
+        query = {'$and': filters} if len(filters) > 1 else (filters[0] if filters else {})
+        if self.cursor is not None:
+            query = {'$and': [query, self._after_cursor(field, tie)]} if query else self._after_cursor(field, tie)
+        direction = -1 if self.descending else 1
+        sort = [(field, direction)] if field == tie else [(field, direction), (tie, direction)]
+        
+        # Sort and tie fields are read for the cursor, then dropped if the caller excluded them
+        hidden = [f for f in {field, tie} if projection.get(f) == 0]
+        projection = {k: v for k, v in projection.items() if k not in hidden}
+        return db[collection].find(query, projection).sort(sort), field, hidden
+    
+    async def find(self, collection, response: Response, projection: Dict[str, Any],
+                   sort_fields: Dict[str, str], default_sort: str = '_id', tie: str = '_id',
+                   merged: bool = False, query: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Run the filtered, sorted and paged query (within query); sets X-Next-Cursor when more rows remain"""
+        cursor, field, hidden = self._cursor(collection, projection, sort_fields, default_sort, tie, merged, query)
+        if self.limit is None:
+            rows = await cursor.to_list(None)
+        else:
+            rows = await cursor.limit(self.limit + 1).to_list(None)
+            if len(rows) > self.limit:
+                rows = rows[:self.limit]
+                last = rows[-1]
+                response.headers['X-Next-Cursor'] = self._encode_cursor([last.get(field), last.get(tie)])
+        for row in rows:
+            for f in hidden:
+                row.pop(f, None)
+        return rows
+    
+    async def stream(self, collection, response: Response, projection: Dict[str, Any],
+                     sort_fields: Dict[str, str], encode=json_line, default_sort: str = '_id', tie: str = '_id',
+                     merged: bool = False, query: Optional[Dict[str, Any]] = None) -> StreamingResponse:
+        """NDJSON variant of find: unpaged results are streamed from the Mongo cursor as they arrive"""
+        if self.limit is not None:
+            # A page is bounded by MAX_PAGE_SIZE and X-Next-Cursor must be known before the body starts
+            return ndjson_response(await self.find(
+                collection, response, projection, sort_fields, default_sort, tie, merged, query
+            ), response, encode)
+        
+        cursor, _, hidden = self._cursor(collection, projection, sort_fields, default_sort, tie, merged, query)
+        async def rows():
+            async for row in cursor:
+                for f in hidden:
+                    row.pop(f, None)
+                yield row
+        return ndjson_response(rows(), response, encode)
+    
+    def matches(self, row: Dict[str, Any]) -> bool:
+        """In-memory counterpart of mongo_filter(merged=True)"""
+        for field, value in self.filters.items():
+            if row.get(field) == value:
+                continue
+            if value in (row.get(MERGED_FILTER_FIELDS.get(field)) or []):
+                continue
+            return False
+        return True
     
-    return UploadStats(**stats)
+    def page(self, rows: List[Dict[str, Any]], response: Response, sort_fields: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Filter, sort and page a list merged in Python (default order is the list's own order)"""
+        field = self.sort_field(sort_fields, None)
+        keyed = []
+        for position, row in enumerate(rows):
+            if not self.matches(row):
+                continue
+            # Same ordering as Mongo: nulls first, list position breaks ties
+            value = row.get(field) if field else None
+            key = [value is not None, value if value is not None else ''] if field else []
+            keyed.append((key, position, row))
+        keyed.sort(key=lambda item: (item[0], item[1]), reverse=self.descending)
+        if self.cursor is not None:
+            resume = (self.cursor[0], self.cursor[1])
+            try:
+                keyed = [item for item in keyed if ((item[0], item[1]) < resume if self.descending else (item[0], item[1]) > resume)]
+            except TypeError:
+                # Decodes fine but was not issued for this list / sort key
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        if self.limit is not None and len(keyed) > self.limit:
+            keyed = keyed[:self.limit]
+            response.headers['X-Next-Cursor'] = self._encode_cursor([keyed[-1][0], keyed[-1][1]])
+        return [row for _, _, row in keyed]
+
+CONTACT_SORT_FIELDS = {
+    'name': 'name', 'phone': 'phone', 'case': 'case_number', 'suspect': 'person_name',
+    'device': 'device_info', 'source': 'source', 'created_at': 'created_at'
+}
+PASSWORD_SORT_FIELDS = {
+    'username': 'username', 'application': 'application', 'case': 'case_number', 'suspect': 'person_name',
+    'device': 'device_info', 'category': 'category', 'email_domain': 'email_domain', 'created_at': 'created_at'
+}
+USER_ACCOUNT_SORT_FIELDS = {
+    'username': 'username', 'email': 'email', 'source': 'source', 'case': 'case_number', 'suspect': 'person_name',
+    'device': 'device_info', 'category': 'category', 'email_domain': 'email_domain', 'created_at': 'created_at'
+}
 
 @api_router.get("/contacts", response_model=List[Contact])
-async def get_contacts():
-    """Get all contacts"""
-    contacts = await db.contacts.find({}, {"_id": 0}).to_list(None)
+async def get_contacts(response: Response, q: ListQuery = Depends(), fast: bool = False, stream: bool = Depends(wants_ndjson)):
+    """Get contacts (filterable, sortable, paged - see ListQuery; fast=true skips response validation, NDJSON with stream=1)"""
+    if stream:
+        return await q.stream('contacts', response, CONTACT_LIST_PROJECTION, CONTACT_SORT_FIELDS, CONTACT_FAST_JSON.line)
+    contacts = await q.find('contacts', response, CONTACT_LIST_PROJECTION, CONTACT_SORT_FIELDS)
+    if fast and orjson:
+        return CONTACT_FAST_JSON.response(contacts, response)
     for contact in contacts:
         if isinstance(contact.get('created_at'), str):
             contact['created_at'] = datetime.fromisoformat(contact['created_at'])
     return contacts
 
 @api_router.get("/passwords", response_model=List[Password])
-async def get_passwords():
-    """Get all passwords"""
-    passwords = await db.passwords.find({}, {"_id": 0}).to_list(None)
+async def get_passwords(response: Response, q: ListQuery = Depends(), fast: bool = False, stream: bool = Depends(wants_ndjson)):
+    """Get passwords (filterable, sortable, paged - see ListQuery; fast=true skips response validation, NDJSON with stream=1)"""
+    if stream:
+        return await q.stream('passwords', response, PASSWORD_LIST_PROJECTION, PASSWORD_SORT_FIELDS, PASSWORD_FAST_JSON.line)
+    passwords = await q.find('passwords', response, PASSWORD_LIST_PROJECTION, PASSWORD_SORT_FIELDS)
+    if fast and orjson:
+        return PASSWORD_FAST_JSON.response(passwords, response)
     for password in passwords:
         if isinstance(password.get('created_at'), str):
             password['created_at'] = datetime.fromisoformat(password['created_at'])
     return passwords
 
 @api_router.get("/user-accounts", response_model=List[UserAccount])
-async def get_user_accounts():
-    """Get all user accounts"""
-    accounts = await db.user_accounts.find({}, {"_id": 0}).to_list(None)
+async def get_user_accounts(response: Response, q: ListQuery = Depends(), fast: bool = False, stream: bool = Depends(wants_ndjson)):
+    """Get user accounts (filterable, sortable, paged - see ListQuery; fast=true skips response validation, NDJSON with stream=1)"""
+    if stream:
+        return await q.stream('user_accounts', response, USER_ACCOUNT_LIST_PROJECTION, USER_ACCOUNT_SORT_FIELDS, USER_ACCOUNT_FAST_JSON.line)
+    accounts = await q.find('user_accounts', response, USER_ACCOUNT_LIST_PROJECTION, USER_ACCOUNT_SORT_FIELDS)
+    if fast and orjson:
+        return USER_ACCOUNT_FAST_JSON.response(accounts, response)
     for account in accounts:
         if isinstance(account.get('created_at'), str):
             account['created_at'] = datetime.fromisoformat(account['created_at'])
     return accounts
 
+async def suspect_photos_by_phone(suspect_phones: set) -> Dict[str, str]:
+    """Map each suspect phone to the photo of the first contact stored with that normalized number"""
+    photos = {}
+    for suspect_phone in suspect_phones:
+        normalized = normalize_phone(suspect_phone)
+        if not normalized:
+            continue
+        contact = await db.contacts.find_one(
+            {'normalized_phone': normalized, 'photo_path': {'$nin': [None, '']}},
+            {'_id': 0, 'photo_path': 1}, sort=[('_id', 1)]
+        )
+        if contact:
+            photos[suspect_phone] = contact['photo_path']
+    return photos
+
 @api_router.post("/search")
-async def search_data(search: SearchQuery):
-    """Search across all data types"""
-    query = search.query.lower()
+async def search_data(search: SearchQuery, response: Response, stream: bool = Depends(wants_ndjson)):
+    """Search across all data types (prefix / phone-fragment matches on the search_terms index)
+
+    With stream=1 the results are NDJSON lines tagged with their data_type: the merged contacts
+    first, then passwords and user accounts straight from their Mongo cursors.
+    """
     results = {
         'contacts': [],
         'passwords': [],
         'user_accounts': []
     }
+    query_filter = search_filter(search.query)
+    if query_filter is None:
+        return ndjson_response([], response) if stream else results
     
     if not search.data_type or search.data_type == 'contacts':
-        # Search contacts
-        contacts = await db.contacts.find({}, {"_id": 0}).to_list(None)
-        matched_contacts = []
-        
-        # Build phone-to-photo mapping for suspect lookup
-        phone_to_photo = {}
-        for contact in contacts:
-            if contact.get('photo_path') and contact.get('phone'):
-                normalized = normalize_phone(contact.get('phone'))
-                if normalized and normalized not in phone_to_photo:
-                    phone_to_photo[normalized] = contact.get('photo_path')
-        
-        for contact in contacts:
-            # Search in all fields including normalized phone
-            phone = contact.get('phone', '')
-            normalized_phone = normalize_phone(phone)
-            normalized_query = normalize_phone(query)
-            
-            searchable_text = ' '.join([
-                str(contact.get('name', '')),
-                str(contact.get('source', '')),
-                str(phone),
-                str(normalized_phone),
-                str(contact.get('email', '')),
-                str(contact.get('user_id', '')),
-                str(contact.get('account', '')),
-                str(contact.get('category', ''))
-            ]).lower()
-            
-            if query in searchable_text or normalized_query in normalized_phone:
-                if isinstance(contact.get('created_at'), str):
-                    contact['created_at'] = datetime.fromisoformat(contact['created_at'])
-                matched_contacts.append(contact)
+        # First `limit` matching phone numbers, then every matching contact with those numbers
+        contact_filter = {'$and': [query_filter, {'phone': {'$nin': [None, '']}}]}
+        keys = [row['_id'] async for row in db.contacts.aggregate([
+            {'$match': contact_filter},
+            {'$group': {'_id': '$normalized_phone', 'first': {'$min': '$_id'}}},
+            {'$sort': {'first': 1}},
+            {'$limit': search.limit}
+        ])]
+        matched_contacts = await db.contacts.find(
+            {'$and': [contact_filter, {'normalized_phone': {'$in': keys}}]}, CONTACT_LIST_PROJECTION
+        ).sort('_id', 1).to_list(None)
+        for contact in matched_contacts:
+            if isinstance(contact.get('created_at'), str):
+                contact['created_at'] = datetime.fromisoformat(contact['created_at'])
         
         # Merge duplicates by normalized phone (prioritize name and photo)
         grouped = {}
         for contact in matched_contacts:
-            phone = contact.get('phone', '')
-            
-            if not phone:
+            if not contact.get('phone'):
                 continue
             
-            normalized_phone = normalize_phone(phone)
+            normalized_phone = contact.get('normalized_phone') or ''
             
             if normalized_phone not in grouped:
                 grouped[normalized_phone] = []
             
             grouped[normalized_phone].append(contact)
         
+        # Suspect photos: first photo stored for each suspect's number (indexed lookups)
+        phone_to_photo = await suspect_photos_by_phone(
+            {c.get('suspect_phone') for c in matched_contacts if c.get('suspect_phone')}
+        )
+        
         # For each group, merge best information from all contacts
         final_contacts = []
         for normalized_phone, contacts in grouped.items():
@@ -1526,10 +2633,8 @@ async def search_data(search: SearchQuery):
             
             # Add suspect photo if suspect_phone exists
             suspect_phone = merged_contact.get('suspect_phone')
-            if suspect_phone:
-                normalized_suspect = normalize_phone(suspect_phone)
-                if normalized_suspect in phone_to_photo:
-                    merged_contact['suspect_photo_path'] = phone_to_photo[normalized_suspect]
+            if suspect_phone and suspect_phone in phone_to_photo:
+                merged_contact['suspect_photo_path'] = phone_to_photo[suspect_phone]
             
             final_contacts.append(merged_contact)
         
@@ -1537,38 +2642,24 @@ async def search_data(search: SearchQuery):
         # Sort by name
         results['contacts'].sort(key=lambda x: (x.get('name') or '').lower())
     
-    if not search.data_type or search.data_type == 'passwords':
-        # Search passwords
-        passwords = await db.passwords.find({}, {"_id": 0}).to_list(None)
-        for password in passwords:
-            searchable_text = ' '.join([
-                str(password.get('application', '')),
-                str(password.get('username', '')),
-                str(password.get('url', '')),
-                str(password.get('description', ''))
-            ]).lower()
-            
-            if query in searchable_text:
-                if isinstance(password.get('created_at'), str):
-                    password['created_at'] = datetime.fromisoformat(password['created_at'])
-                results['passwords'].append(password)
-    
-    if not search.data_type or search.data_type == 'user_accounts':
-        # Search user accounts
-        accounts = await db.user_accounts.find({}, {"_id": 0}).to_list(None)
-        for account in accounts:
-            searchable_text = ' '.join([
-                str(account.get('source', '')),
-                str(account.get('username', '')),
-                str(account.get('user_id', '')),
-                str(account.get('email', '')),
-                str(account.get('name', ''))
-            ]).lower()
-            
-            if query in searchable_text:
-                if isinstance(account.get('created_at'), str):
-                    account['created_at'] = datetime.fromisoformat(account['created_at'])
-                results['user_accounts'].append(account)
+    other_types = [(data_type, projection) for data_type, projection in
+                   (('passwords', PASSWORD_LIST_PROJECTION), ('user_accounts', USER_ACCOUNT_LIST_PROJECTION))
+                   if not search.data_type or search.data_type == data_type]
+    if stream:
+        async def rows():
+            for contact in results['contacts']:
+                yield {'data_type': 'contacts', **contact}
+            for data_type, projection in other_types:
+                async for doc in db[data_type].find(query_filter, projection).limit(search.limit):
+                    yield {'data_type': data_type, **doc}
+        return ndjson_response(rows(), response)
+    
+    for data_type, projection in other_types:
+        docs = await db[data_type].find(query_filter, projection).limit(search.limit).to_list(None)
+        for doc in docs:
+            if isinstance(doc.get('created_at'), str):
+                doc['created_at'] = datetime.fromisoformat(doc['created_at'])
+        results[data_type] = docs
     
     return results
 
@@ -1629,6 +2720,7 @@ async def nuclear_wipe_database(secret_key: str = None):
             'user_accounts_deleted': 0,
             'suspect_profiles_deleted': 0,
             'whatsapp_groups_deleted': 0,
+            'image_blobs_deleted': 0,
             'timestamp': datetime.now(timezone.utc).isoformat()
         }
         
@@ -1647,6 +2739,15 @@ async def nuclear_wipe_database(secret_key: str = None):
         
         groups_result = await db.whatsapp_groups.delete_many({})
         result['whatsapp_groups_deleted'] = groups_result.deleted_count
+        await db.group_memberships.delete_many({})
+        await db.graph_edges.delete_many({})
+        await clear_derived_views()
+        await bump_generation()
+        
+        # No references survive the wipe, so every image blob is garbage
+        if IMAGE_BLOB_DIR.exists():
+            result['image_blobs_deleted'] = sum(1 for blob in IMAGE_BLOB_DIR.glob('*/*') if blob.is_file())
+            shutil.rmtree(IMAGE_BLOB_DIR, ignore_errors=True)
         
         total_deleted = sum([
             result['contacts_deleted'],
@@ -1709,149 +2810,224 @@ async def get_image(file_path: str):
     
     return FileResponse(image_path)
 
+# --- contacts_dedup materialized view ---
+# One row per normalized phone with the merged contact shown by /contacts/deduplicated.
+# Uploads refresh the keys they touched, deletions recompute only the keys they affected.
+DEDUP_REFRESH_BATCH = 500
+
+def merge_contact_group(contacts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge the best information from all contacts sharing one normalized phone"""
+    # Start with the first contact as base
+    merged_contact = dict(contacts[0])
+    if '_id' in merged_contact:
+        del merged_contact['_id']
+    
+    # Collect all phone variants, sources, unique names, and devices
+    all_phones = []
+    sources = []
+    all_names = []  # Track all unique names
+    devices = []  # Track all unique devices
+    cases = []  # Track all unique cases
+    
+    # Merge information from all duplicates, prioritizing filled fields
+    # PRIORITY: Best name wins (longest meaningful name, not phone numbers or service names)
+    best_name = merged_contact.get('name', '')
+    best_name_score = 0  # Score based on length and meaningfulness
+    
+    for c in contacts:
+        # Track unique devices (where this contact appears)
+        device = c.get('device_info')
+        if device and device not in devices:
+            devices.append(device)
+        
+        # Track unique cases
+        case = c.get('case_number')
+        if case and case not in cases:
+            cases.append(case)
+        
+        # Collect all unique names with device info
+        current_name = c.get('name', '')
+        if current_name and current_name != '-' and current_name.strip():
+            # Skip if name looks like a phone number (all digits/dashes/spaces)
+            if current_name.replace('-', '').replace(' ', '').replace('+', '').isdigit():
+                continue
+            
+            # Skip service names like "WhatsApp", "facebook", etc
+            service_keywords = ['whatsapp', 'facebook', 'instagram', 'telegram', 'viber']
+            if any(keyword in current_name.lower() for keyword in service_keywords):
+                # Only skip if it's JUST the service name or very short
+                if len(current_name.strip()) < 6:
+                    continue
+            
+            # Add to unique names list with device/case info
+            name_entry = {
+                'name': current_name,
+                'device': c.get('device_info', 'Unknown'),
+                'case': c.get('case_number', 'Unknown'),
+                'source': c.get('source', 'Agenda Telefon')
+            }
+            
+            # Check if we already have this exact name
+            if not any(n['name'] == current_name for n in all_names):
+                all_names.append(name_entry)
+            
+            # Also track best name for primary display
+            name_score = len(current_name.strip())
+            if any(char.isalpha() for char in current_name):
+                name_score += 50  # Bonus for having letters
+            
+            if name_score > best_name_score:
+                best_name = current_name
+                best_name_score = name_score
+                merged_contact['name'] = current_name
+        
+        # Prioritize photo if current is empty
+        if not merged_contact.get('photo_path') and c.get('photo_path'):
+            merged_contact['photo_path'] = c.get('photo_path')
+        
+        # Prioritize email if current is empty
+        if not merged_contact.get('email') and c.get('email'):
+            merged_contact['email'] = c.get('email')
+        
+        # Collect phones and sources
+        p = c.get('phone', '')
+        if p and p not in all_phones:
+            all_phones.append(p)
+        s = c.get('source')
+        # Replace None/null with "Agenda Telefon"
+        if not s:
+            s = 'Agenda Telefon'
+        if s not in sources:
+            sources.append(s)
+    
+    # Replace None source with "Agenda Telefon"
+    if not merged_contact.get('source'):
+        merged_contact['source'] = 'Agenda Telefon'
+    
+    # Track duplicates: total records AND unique devices
+    merged_contact['duplicate_count'] = len(contacts)  # Total records
+    merged_contact['device_count'] = len(devices)  # How many different phones
+    merged_contact['devices'] = devices  # List of all devices
+    merged_contact['cases'] = cases  # List of all cases
+    merged_contact['all_phones'] = all_phones
+    merged_contact['all_names'] = all_names  # All unique names with device info
+    merged_contact['sources'] = sources
+    
+    # Ensure 'phone' field is populated with primary phone (first in list)
+    if all_phones:
+        merged_contact['phone'] = all_phones[0]
+    
+    return merged_contact
+
+def refresh_contacts_dedup(keys) -> int:
+    """Recompute the contacts_dedup rows of the given normalized phones (sync, runs off the event loop)"""
+    keys = sorted({key or '' for key in keys})
+    refreshed = 0
+    for i in range(0, len(keys), DEDUP_REFRESH_BATCH):
+        chunk = keys[i:i + DEDUP_REFRESH_BATCH]
+        # Contacts without a stored normalized phone are grouped under the empty key
+        match = chunk + [None] if '' in chunk else chunk
+        grouped = {}
+        for contact in sync_db.contacts.find(
+            {'normalized_phone': {'$in': match}, 'phone': {'$nin': [None, '']}}, {'search_terms': 0, 'raw_data': 0}
+        ).sort('_id', 1):
+            grouped.setdefault(contact.get('normalized_phone') or '', []).append(contact)
+        
+        operations = []
+        for key, contacts in grouped.items():
+            row = merge_contact_group(contacts)
+            row.update({
+                'dedup_key': key,
+                'sort_name': (row.get('name') or '').lower(),
+                'first_id': contacts[0]['_id']
+            })
+            operations.append(ReplaceOne({'dedup_key': key}, row, upsert=True))
+        stale = [key for key in chunk if key not in grouped]
+        if stale:
+            operations.append(DeleteMany({'dedup_key': {'$in': stale}}))
+        if operations:
+            sync_db.contacts_dedup.bulk_write(operations, ordered=False)
+        refreshed += len(chunk)
+    return refreshed
+
+def rebuild_contacts_dedup() -> int:
+    """Recompute the whole contacts_dedup view"""
+    keys = [row['_id'] for row in sync_db.contacts.aggregate([
+        {'$match': {'phone': {'$nin': [None, '']}}},
+        {'$group': {'_id': '$normalized_phone'}}
+    ])]
+    sync_db.contacts_dedup.delete_many({'dedup_key': {'$nin': [key or '' for key in keys]}})
+    return refresh_contacts_dedup(keys)
+
+def derived_view_keys(query: Dict[str, Any],
+                      collections: Tuple[str, ...] = ('contacts', 'passwords', 'user_accounts', 'whatsapp_groups')) -> Dict[str, set]:
+    """Keys of the derived views that depend on the documents matching query - collect before deleting them"""
+    keys = {'contacts_dedup': set(), 'password_usage': set(), 'whatsapp_group_summary': set()}
+    if 'contacts' in collections:
+        keys['contacts_dedup'] = {row['_id'] or '' for row in sync_db.contacts.aggregate([
+            {'$match': {**query, 'phone': {'$nin': [None, '']}}},
+            {'$group': {'_id': '$normalized_phone'}}
+        ])}
+        # Groups whose membership edges go with the contacts (edges carry the session fields)
+        if set(query) <= set(GRAPH_SESSION_FIELDS):
+            keys['whatsapp_group_summary'] = set(sync_db.group_memberships.distinct('group_id', query))
+        else:
+            contact_ids = sync_db.contacts.distinct('id', query)
+            for i in range(0, len(contact_ids), DEDUP_REFRESH_BATCH):
+                keys['whatsapp_group_summary'].update(sync_db.group_memberships.distinct(
+                    'group_id', {'contact_id': {'$in': contact_ids[i:i + DEDUP_REFRESH_BATCH]}}
+                ))
+    if 'whatsapp_groups' in collections:
+        keys['whatsapp_group_summary'].update(sync_db.whatsapp_groups.distinct('group_id', query))
+    for collection in ('passwords', 'user_accounts'):
+        if collection in collections:
+            keys['password_usage'] |= {row['_id'] for row in sync_db[collection].aggregate([
+                {'$match': {**query, 'password_key': {'$ne': None}}},
+                {'$group': {'_id': '$password_key'}}
+            ])}
+    return keys
+
+def refresh_derived_views(keys: Dict[str, set]):
+    """Recompute the derived view rows collected by derived_view_keys"""
+    refresh_contacts_dedup(keys.get('contacts_dedup', ()))
+    refresh_password_usage(keys.get('password_usage', ()))
+    refresh_group_summary(keys.get('whatsapp_group_summary', ()))
+
+async def clear_derived_views():
+    """Empty the derived views (whole-database wipes)"""
+    await db.contacts_dedup.delete_many({})
+    await db.password_usage.delete_many({})
+    await db.whatsapp_group_summary.delete_many({})
+
+DEDUP_CONTACT_SORT_FIELDS = {
+    'name': 'sort_name', 'phone': 'dedup_key', 'duplicate_count': 'duplicate_count', 'device_count': 'device_count'
+}
+
 @api_router.get("/contacts/deduplicated")
-async def get_deduplicated_contacts():
-    """Get contacts grouped by normalized phone number (deduplicated)"""
-    # Get all contacts (no limit)
-    all_contacts = await db.contacts.find().to_list(None)
+async def get_deduplicated_contacts(response: Response, q: ListQuery = Depends()):
+    """Get contacts grouped by normalized phone number (deduplicated), read from the contacts_dedup view"""
+    results = await q.find(
+        'contacts_dedup', response, {'_id': 0, 'dedup_key': 0, 'sort_name': 0, 'first_id': 0, 'raw_data': 0},
+        DEDUP_CONTACT_SORT_FIELDS, default_sort='sort_name', tie='first_id', merged=True
+    )
     
-    # Build a phone-to-photo mapping for suspect lookup
+    # Suspect photo: photo of the merged contact with the suspect's own number
+    suspect_keys = {normalize_phone(c['suspect_phone']) for c in results if c.get('suspect_phone')}
+    suspect_keys.discard('')
     phone_to_photo = {}
-    for contact in all_contacts:
-        if contact.get('photo_path') and contact.get('phone'):
-            normalized = normalize_phone(contact.get('phone'))
-            if normalized and normalized not in phone_to_photo:
-                phone_to_photo[normalized] = contact.get('photo_path')
-    
-    # Group by normalized phone only
-    grouped = {}
-    for contact in all_contacts:
-        phone = contact.get('phone', '')
-        
-        if not phone:
-            continue
-        
-        normalized_phone = normalize_phone(phone)
-        
-        if normalized_phone not in grouped:
-            grouped[normalized_phone] = []
-        
-        grouped[normalized_phone].append(contact)
-    
-    # For each group, merge best information from all contacts
-    results = []
-    for normalized_phone, contacts in grouped.items():
-        # Start with the first contact as base
-        merged_contact = dict(contacts[0])
-        if '_id' in merged_contact:
-            del merged_contact['_id']
-        
-        # Collect all phone variants, sources, unique names, and devices
-        all_phones = []
-        sources = []
-        all_names = []  # Track all unique names
-        devices = []  # Track all unique devices
-        cases = []  # Track all unique cases
-        
-        # Merge information from all duplicates, prioritizing filled fields
-        # PRIORITY: Best name wins (longest meaningful name, not phone numbers or service names)
-        best_name = merged_contact.get('name', '')
-        best_name_score = 0  # Score based on length and meaningfulness
-        
-        for c in contacts:
-            # Track unique devices (where this contact appears)
-            device = c.get('device_info')
-            if device and device not in devices:
-                devices.append(device)
-            
-            # Track unique cases
-            case = c.get('case_number')
-            if case and case not in cases:
-                cases.append(case)
-            
-            # Collect all unique names with device info
-            current_name = c.get('name', '')
-            if current_name and current_name != '-' and current_name.strip():
-                # Skip if name looks like a phone number (all digits/dashes/spaces)
-                if current_name.replace('-', '').replace(' ', '').replace('+', '').isdigit():
-                    continue
-                
-                # Skip service names like "WhatsApp", "facebook", etc
-                service_keywords = ['whatsapp', 'facebook', 'instagram', 'telegram', 'viber']
-                if any(keyword in current_name.lower() for keyword in service_keywords):
-                    # Only skip if it's JUST the service name or very short
-                    if len(current_name.strip()) < 6:
-                        continue
-                
-                # Add to unique names list with device/case info
-                name_entry = {
-                    'name': current_name,
-                    'device': c.get('device_info', 'Unknown'),
-                    'case': c.get('case_number', 'Unknown'),
-                    'source': c.get('source', 'Agenda Telefon')
-                }
-                
-                # Check if we already have this exact name
-                if not any(n['name'] == current_name for n in all_names):
-                    all_names.append(name_entry)
-                
-                # Also track best name for primary display
-                name_score = len(current_name.strip())
-                if any(char.isalpha() for char in current_name):
-                    name_score += 50  # Bonus for having letters
-                
-                if name_score > best_name_score:
-                    best_name = current_name
-                    best_name_score = name_score
-                    merged_contact['name'] = current_name
-            
-            # Prioritize photo if current is empty
-            if not merged_contact.get('photo_path') and c.get('photo_path'):
-                merged_contact['photo_path'] = c.get('photo_path')
-            
-            # Prioritize email if current is empty
-            if not merged_contact.get('email') and c.get('email'):
-                merged_contact['email'] = c.get('email')
-            
-            # Collect phones and sources
-            p = c.get('phone', '')
-            if p and p not in all_phones:
-                all_phones.append(p)
-            s = c.get('source')
-            # Replace None/null with "Agenda Telefon"
-            if not s:
-                s = 'Agenda Telefon'
-            if s not in sources:
-                sources.append(s)
-        
-        # Replace None source with "Agenda Telefon"
-        if not merged_contact.get('source'):
-            merged_contact['source'] = 'Agenda Telefon'
-        
-        # Track duplicates: total records AND unique devices
-        merged_contact['duplicate_count'] = len(contacts)  # Total records
-        merged_contact['device_count'] = len(devices)  # How many different phones
-        merged_contact['devices'] = devices  # List of all devices
-        merged_contact['cases'] = cases  # List of all cases
-        merged_contact['all_phones'] = all_phones
-        merged_contact['all_names'] = all_names  # All unique names with device info
-        merged_contact['sources'] = sources
-        
-        # Ensure 'phone' field is populated with primary phone (first in list)
-        if all_phones:
-            merged_contact['phone'] = all_phones[0]
-        
-        # Add suspect photo if suspect_phone exists
+    if suspect_keys:
+        async for row in db.contacts_dedup.find(
+            {'dedup_key': {'$in': list(suspect_keys)}, 'photo_path': {'$nin': [None, '']}},
+            {'_id': 0, 'dedup_key': 1, 'photo_path': 1}
+        ):
+            phone_to_photo[row['dedup_key']] = row['photo_path']
+    
+    for merged_contact in results:
         suspect_phone = merged_contact.get('suspect_phone')
         if suspect_phone:
             normalized_suspect = normalize_phone(suspect_phone)
             if normalized_suspect in phone_to_photo:
                 merged_contact['suspect_photo_path'] = phone_to_photo[normalized_suspect]
-        
-        results.append(merged_contact)
-    
-    # Sort by name
-    results.sort(key=lambda x: (x.get('name') or '').lower())
     
     return results
 
@@ -1862,6 +3038,9 @@ async def get_deduplicated_passwords():
         {
             "$sort": {"created_at": -1}
         },
+        {
+            "$project": PASSWORD_LIST_PROJECTION
+        },
         {
             "$group": {
                 "_id": {
@@ -1883,7 +3062,7 @@ async def get_deduplicated_passwords():
             }
         },
         {
-            "$project": {"_id": 0}
+            "$project": DOC_PROJECTION
         }
     ]
     
@@ -1900,6 +3079,9 @@ async def get_deduplicated_accounts():
         {
             "$sort": {"created_at": -1}
         },
+        {
+            "$project": USER_ACCOUNT_LIST_PROJECTION
+        },
         {
             "$group": {
                 "_id": {
@@ -1921,7 +3103,7 @@ async def get_deduplicated_accounts():
             }
         },
         {
-            "$project": {"_id": 0}
+            "$project": DOC_PROJECTION
         }
     ]
     
@@ -1931,91 +3113,107 @@ async def get_deduplicated_accounts():
             result['created_at'] = datetime.fromisoformat(result['created_at'])
     return results
 
+def first_nonempty(*fields: str) -> Dict[str, Any]:
+    """Aggregation expression for Python's `a or b or ''` over string fields"""
+    expr = ''
+    for field in reversed(fields):
+        expr = {'$cond': [{'$eq': [{'$ifNull': [field, '']}, '']}, expr, field]}
+    return expr
+
+def ordered_unique(array: str) -> Dict[str, Any]:
+    """Aggregation expression: truthy values of array, deduplicated in first-seen order"""
+    return {'$reduce': {
+        'input': array,
+        'initialValue': [],
+        'in': {'$cond': [
+            {'$or': [{'$in': ['$$this', [None, '']]}, {'$in': ['$$this', '$$value']}]},
+            '$$value',
+            {'$concatArrays': ['$$value', ['$$this']]}
+        ]}
+    }}
+
+CREDENTIAL_SKIP_SERVICE_TYPES = ['key', 'secret', 'token']
+
+def deduplicated_credentials_pipeline() -> List[Dict[str, Any]]:
+    """
+    Passwords then user accounts (Key/Secret/Token accounts skipped), grouped by credential_key.
+    A group starts at its first record with a username; every later record with the same key
+    counts as a duplicate. Groups come out in the order of their first record.
+    """
+    def tagged(src: int, projection: Dict[str, int], username_fields: Tuple[str, ...]) -> Dict[str, Any]:
+        return {'$project': {
+            **projection, '_id': 1, 'credential_key': 1,
+            'src': {'$literal': src},
+            'has_username': {'$ne': [first_nonempty(*username_fields), '']}
+        }}
+    
+    return [
+        tagged(0, PASSWORD_LIST_PROJECTION, ('$username', '$password')),
+        {'$unionWith': {'coll': 'user_accounts', 'pipeline': [
+            {'$match': {'service_type': {'$not': re.compile(f"^({'|'.join(CREDENTIAL_SKIP_SERVICE_TYPES)})$", re.IGNORECASE)}}},
+            tagged(1, USER_ACCOUNT_LIST_PROJECTION, ('$username', '$email'))
+        ]}},
+        # Records seen before the first one with a username do not belong to the group
+        {'$setWindowFields': {
+            'partitionBy': '$credential_key',
+            'sortBy': {'src': 1, '_id': 1},
+            'output': {'key_seen': {'$max': '$has_username', 'window': {'documents': ['unbounded', 'current']}}}
+        }},
+        {'$match': {'key_seen': True}},
+        {'$sort': {'src': 1, '_id': 1}},
+        {'$group': {
+            '_id': '$credential_key',
+            'doc': {'$first': '$$ROOT'},
+            'duplicate_count': {'$sum': 1},
+            'cases': {'$push': {'$ifNull': ['$case_number', None]}},
+            'devices': {'$push': {'$ifNull': ['$device_info', None]}},
+            'suspects': {'$push': {'$ifNull': ['$person_name', None]}}
+        }},
+        {'$sort': {'doc.src': 1, 'doc._id': 1}},
+        {'$replaceRoot': {'newRoot': {'$mergeObjects': ['$doc', {
+            'duplicate_count': '$duplicate_count',
+            'cases': ordered_unique('$cases'),
+            'devices': ordered_unique('$devices'),
+            'suspects': ordered_unique('$suspects')
+        }]}}},
+        {'$project': {'_id': 0, 'credential_key': 0, 'src': 0, 'has_username': 0, 'key_seen': 0}}
+    ]
+
+DEDUP_CREDENTIAL_SORT_FIELDS = {
+    'username': 'username', 'application': 'application', 'case': 'case_number',
+    'suspect': 'person_name', 'device': 'device_info', 'duplicate_count': 'duplicate_count'
+}
+
 @api_router.get("/credentials/deduplicated")
-async def get_deduplicated_credentials():
+async def get_deduplicated_credentials(response: Response, q: ListQuery = Depends(), stream: bool = Depends(wants_ndjson)):
     """Get credentials grouped by username+application (deduplicated) - Only shows Type: Default"""
-    # Get both passwords and accounts (no limit)
-    passwords = await db.passwords.find({}, {"_id": 0}).to_list(None)
-    accounts = await db.user_accounts.find({}, {"_id": 0}).to_list(None)
-    
-    # Combine and deduplicate with cases tracking
-    all_creds = []
-    seen = {}
-    
-    for pwd in passwords:
-        username = pwd.get('username') or pwd.get('password') or ''
-        app = pwd.get('application', '')
-        key = f"{username}_{app}".lower()
-        
-        if key not in seen and username:
-            pwd['duplicate_count'] = 1
-            pwd['cases'] = [pwd.get('case_number')] if pwd.get('case_number') else []
-            pwd['devices'] = [pwd.get('device_info')] if pwd.get('device_info') else []
-            pwd['suspects'] = [pwd.get('person_name')] if pwd.get('person_name') else []
-            seen[key] = len(all_creds)
-            all_creds.append(pwd)
-        elif key in seen:
-            idx = seen[key]
-            all_creds[idx]['duplicate_count'] = all_creds[idx].get('duplicate_count', 1) + 1
-            # Track all unique cases, devices, and suspects
-            case = pwd.get('case_number')
-            if case and case not in all_creds[idx].get('cases', []):
-                all_creds[idx].setdefault('cases', []).append(case)
-            device = pwd.get('device_info')
-            if device and device not in all_creds[idx].get('devices', []):
-                all_creds[idx].setdefault('devices', []).append(device)
-            suspect = pwd.get('person_name')
-            if suspect and suspect not in all_creds[idx].get('suspects', []):
-                all_creds[idx].setdefault('suspects', []).append(suspect)
-    
-    for acc in accounts:
-        # Filter: Only include Type: Default (skip Key, Secret, Token)
-        service_type = acc.get('service_type', '') or ''
-        service_type = service_type.lower()
-        if service_type and service_type in ['key', 'secret', 'token']:
-            continue
-        
-        username = acc.get('username') or acc.get('email') or ''
-        app = acc.get('source', '')
-        key = f"{username}_{app}".lower()
-        
-        if key not in seen and username:
-            acc['duplicate_count'] = 1
-            acc['cases'] = [acc.get('case_number')] if acc.get('case_number') else []
-            acc['devices'] = [acc.get('device_info')] if acc.get('device_info') else []
-            acc['suspects'] = [acc.get('person_name')] if acc.get('person_name') else []
-            seen[key] = len(all_creds)
-            all_creds.append(acc)
-        elif key in seen:
-            idx = seen[key]
-            all_creds[idx]['duplicate_count'] = all_creds[idx].get('duplicate_count', 1) + 1
-            # Track all unique cases, devices, and suspects
-            case = acc.get('case_number')
-            if case and case not in all_creds[idx].get('cases', []):
-                all_creds[idx].setdefault('cases', []).append(case)
-            device = acc.get('device_info')
-            if device and device not in all_creds[idx].get('devices', []):
-                all_creds[idx].setdefault('devices', []).append(device)
-            suspect = acc.get('person_name')
-            if suspect and suspect not in all_creds[idx].get('suspects', []):
-                all_creds[idx].setdefault('suspects', []).append(suspect)
+    credentials = db.passwords.aggregate(deduplicated_credentials_pipeline(), allowDiskUse=True)
+    if stream and q.sort is None and q.limit is None and q.cursor is None:
+        # Pipeline order: filter the rows while streaming them from the aggregation cursor
+        async def matching():
+            async for cred in credentials:
+                if q.matches(cred):
+                    yield cred
+        return ndjson_response(matching(), response)
+    all_creds = await credentials.to_list(None)
     
     for cred in all_creds:
         if isinstance(cred.get('created_at'), str):
             cred['created_at'] = datetime.fromisoformat(cred['created_at'])
     
-    return all_creds
+    rows = q.page(all_creds, response, DEDUP_CREDENTIAL_SORT_FIELDS)
+    return ndjson_response(rows, response) if stream else rows
 
 @api_router.get("/credentials/{credential_id}/details")
 async def get_credential_details(credential_id: str):
     """Get all records for a specific credential (including duplicates)"""
     # Try to find in passwords first
-    credential = await db.passwords.find_one({"id": credential_id}, {"_id": 0})
+    credential = await db.passwords.find_one({"id": credential_id}, DOC_PROJECTION)
     is_password = True
     
     # If not found, try user_accounts
     if not credential:
-        credential = await db.user_accounts.find_one({"id": credential_id}, {"_id": 0})
+        credential = await db.user_accounts.find_one({"id": credential_id}, DOC_PROJECTION)
         is_password = False
     
     if not credential:
@@ -2036,7 +3234,7 @@ async def get_credential_details(credential_id: str):
                     {"password": username, "application": application}
                 ]
             }
-            all_creds = await db.passwords.find(query, {"_id": 0}).to_list(1000)
+            all_creds = await db.passwords.find(query, DOC_PROJECTION).to_list(1000)
         else:
             query = {
                 "$or": [
@@ -2044,145 +3242,120 @@ async def get_credential_details(credential_id: str):
                     {"email": username, "source": application}
                 ]
             }
-            all_creds = await db.user_accounts.find(query, {"_id": 0}).to_list(1000)
+            all_creds = await db.user_accounts.find(query, DOC_PROJECTION).to_list(1000)
         
         for c in all_creds:
             if isinstance(c.get('created_at'), str):
-                c['created_at'] = datetime.fromisoformat(c['created_at'])
-        
-        all_credentials = all_creds
-    
-    return {
-        "main_credential": credential,
-        "all_records": all_credentials if all_credentials else [credential],
-        "total_duplicates": len(all_credentials) if all_credentials else 1,
-        "is_password": is_password
-    }
-
-@api_router.get("/credentials/password-analysis")
-async def get_password_analysis():
-    """Analyze password reuse across services - Shows how many times each password is used and where"""
-    # Get all passwords and accounts
-    passwords = await db.passwords.find({}, {"_id": 0}).to_list(None)
-    accounts = await db.user_accounts.find({}, {"_id": 0}).to_list(None)
-    
-    # Build password usage map
-    password_usage = {}  # password -> list of {service, username, case, device}
-    
-    for pwd in passwords:
-        password_value = (pwd.get('password', '') or '').strip()
-        username = pwd.get('username', '') or '-'
-        # Prioritize URL for service identification, fall back to application
-        # This ensures different URLs are treated as different services
-        url = pwd.get('url', '').strip() if pwd.get('url') else ''
-        application = pwd.get('application', '').strip() if pwd.get('application') else ''
-        
-        # Use URL if available and meaningful, otherwise use application
-        if url and url not in ['', '-', 'None', 'Multiple Accounts']:
-            service = url
-        elif application:
-            service = application
-        else:
-            service = pwd.get('raw_data', {}).get('fields', {}).get('ServiceIdentifier', '') or '-'
-            
-        case_number = pwd.get('case_number', '-')
-        device = pwd.get('device_info', '-')
-        suspect = pwd.get('person_name', '-')
-        record_id = pwd.get('id', '')
-        category = pwd.get('category', 'Other')
-        raw_data = pwd.get('raw_data', {})
-        
-        # Skip empty passwords or very short ones (likely not real passwords)
-        if not password_value or len(password_value) < 2:
-            continue
-            
-        # Skip if password looks like a username/email
-        if '@' in password_value and '.' in password_value:
-            continue
-        
-        if password_value not in password_usage:
-            password_usage[password_value] = []
-        
-        password_usage[password_value].append({
-            'id': record_id,
-            'service': service,
-            'username': username,
-            'case_number': case_number,
-            'device': device,
-            'suspect': suspect,
-            'url': url,
-            'category': category,
-            'raw_data': raw_data,
-            'type': 'password'
-        })
-    
-    for acc in accounts:
-        # Check if account has a password-like field
-        user_id = (acc.get('user_id', '') or '').strip()
-        
-        # Skip if empty or looks like a numeric ID
-        if not user_id or len(user_id) < 4 or user_id.isdigit():
-            continue
-        
-        # Only include if it looks like it could be a password (has mixed characters)
-        # Skip pure emails or usernames
-        if '@' in user_id or len(user_id) < 6:
-            continue
-        
-        username = acc.get('username') or acc.get('email', '') or '-'
-        service = acc.get('source') or acc.get('service_identifier', '') or '-'
-        case_number = acc.get('case_number', '-')
-        device = acc.get('device_info', '-')
-        suspect = acc.get('person_name', '-')
-        record_id = acc.get('id', '')
-        category = acc.get('category', 'Other')
-        raw_data = acc.get('raw_data', {})
-        
-        if user_id not in password_usage:
-            password_usage[user_id] = []
-        
-        password_usage[user_id].append({
-            'id': record_id,
-            'service': service,
-            'username': username,
-            'case_number': case_number,
-            'device': device,
-            'suspect': suspect,
-            'url': service,  # For accounts, URL is same as service
-            'category': category,
-            'raw_data': raw_data,
-            'type': 'account'
-        })
-    
-    # Build result: only passwords used more than once OR interesting single uses
-    results = []
-    for password, usages in password_usage.items():
-        usage_count = len(usages)
-        
-        # Group by service + username + case to avoid showing exact duplicates
-        # But keep different services separate even if username is the same
-        unique_services = {}
-        for usage in usages:
-            # Create a unique key that includes service, username, case, and device
-            # This prevents duplicate rows but keeps different services separate
-            service_key = f"{usage['service']}_{usage['username']}_{usage['case_number']}_{usage['device']}"
-            if service_key not in unique_services:
-                unique_services[service_key] = usage
-        
-        unique_usages = list(unique_services.values())
-        unique_count = len(unique_usages)
-        
-        results.append({
-            'password': password,
-            'usage_count': unique_count,
-            'usages': unique_usages,
-            'is_reused': unique_count > 1
-        })
+                c['created_at'] = datetime.fromisoformat(c['created_at'])
+        
+        all_credentials = all_creds
     
-    # Sort by usage count (most reused first)
-    results.sort(key=lambda x: x['usage_count'], reverse=True)
+    return {
+        "main_credential": credential,
+        "all_records": all_credentials if all_credentials else [credential],
+        "total_duplicates": len(all_credentials) if all_credentials else 1,
+        "is_password": is_password
+    }
+
+# --- password_usage materialized view ---
+# One row per password value with its distinct usages (service + username + case + device),
+# maintained like contacts_dedup: uploads refresh their keys, deletions the keys they affected.
+
+def password_usage_entry(collection: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Usage entry of a password / account (raw_data trimmed to the fields list views read)"""
+    raw_data = {'fields': ((doc.get('raw_data') or {}).get('fields') or {})}
+    if collection == 'passwords':
+        # Prioritize URL for service identification, fall back to application
+        # This ensures different URLs are treated as different services
+        url = doc.get('url', '').strip() if doc.get('url') else ''
+        application = doc.get('application', '').strip() if doc.get('application') else ''
+        if url and url not in ['', '-', 'None', 'Multiple Accounts']:
+            service = url
+        elif application:
+            service = application
+        else:
+            service = raw_data['fields'].get('ServiceIdentifier', '') or '-'
+        username = doc.get('username', '') or '-'
+        usage_type = 'password'
+    else:
+        service = doc.get('source') or doc.get('service_identifier', '') or '-'
+        url = service  # For accounts, URL is same as service
+        username = doc.get('username') or doc.get('email', '') or '-'
+        usage_type = 'account'
     
-    return results
+    return {
+        'id': doc.get('id', ''),
+        'service': service,
+        'username': username,
+        'case_number': doc.get('case_number', '-'),
+        'device': doc.get('device_info', '-'),
+        'suspect': doc.get('person_name', '-'),
+        'url': url,
+        'category': doc.get('category', 'Other'),
+        'raw_data': raw_data,
+        'type': usage_type
+    }
+
+def refresh_password_usage(keys) -> int:
+    """Recompute the password_usage rows of the given password values (sync, runs off the event loop)"""
+    keys = sorted(set(keys))
+    for i in range(0, len(keys), DEDUP_REFRESH_BATCH):
+        chunk = keys[i:i + DEDUP_REFRESH_BATCH]
+        usages = {}
+        # Passwords first, then accounts, each in insertion order
+        for collection, projection in (('passwords', PASSWORD_LIST_PROJECTION), ('user_accounts', USER_ACCOUNT_LIST_PROJECTION)):
+            for doc in sync_db[collection].find({'password_key': {'$in': chunk}}, {**projection, 'password_key': 1}).sort('_id', 1):
+                usages.setdefault(doc['password_key'], []).append(password_usage_entry(collection, doc))
+        
+        operations = []
+        for password, entries in usages.items():
+            # Keep one usage per service + username + case + device
+            unique_services = {}
+            for usage in entries:
+                service_key = f"{usage['service']}_{usage['username']}_{usage['case_number']}_{usage['device']}"
+                if service_key not in unique_services:
+                    unique_services[service_key] = usage
+            unique_usages = list(unique_services.values())
+            operations.append(ReplaceOne({'password': password}, {
+                'password': password,
+                'usage_count': len(unique_usages),
+                'usages': unique_usages,
+                'is_reused': len(unique_usages) > 1
+            }, upsert=True))
+        stale = [key for key in chunk if key not in usages]
+        if stale:
+            operations.append(DeleteMany({'password': {'$in': stale}}))
+        if operations:
+            sync_db.password_usage.bulk_write(operations, ordered=False)
+    return len(keys)
+
+def rebuild_password_usage() -> int:
+    """Recompute the whole password_usage view"""
+    keys = set()
+    for collection in ('passwords', 'user_accounts'):
+        keys |= {row['_id'] for row in sync_db[collection].aggregate([
+            {'$match': {'password_key': {'$ne': None}}},
+            {'$group': {'_id': '$password_key'}}
+        ])}
+    sync_db.password_usage.delete_many({'password': {'$nin': list(keys)}})
+    return refresh_password_usage(keys)
+
+@api_router.get("/credentials/password-analysis")
+async def get_password_analysis(
+    response: Response,
+    min_usage: int = Query(1, ge=1),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """
+    Password reuse across services, read from the password_usage view: most reused first.
+    min_usage=2 keeps only reused passwords; limit/cursor page like the other list endpoints.
+    """
+    q = ListQuery(sort='usage_count', order='desc', limit=limit, cursor=cursor)
+    return await q.find(
+        'password_usage', response, {'_id': 0}, {'usage_count': 'usage_count'},
+        tie='password', query={'usage_count': {'$gte': min_usage}}
+    )
 
 @api_router.put("/credentials/{credential_id}/category")
 async def update_credential_category(credential_id: str, request: dict):
@@ -2208,6 +3381,12 @@ async def update_credential_category(credential_id: str, request: dict):
         if pwd_result.modified_count == 0 and acc_result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Credential not found")
         
+        # Usage entries carry the category
+        await run_in_threadpool(refresh_derived_views, await run_in_threadpool(
+            derived_view_keys, {"id": credential_id}, ('passwords', 'user_accounts')
+        ))
+        await bump_generation()
+        
         return {"success": True, "message": "Category updated successfully"}
         
     except Exception as e:
@@ -2219,7 +3398,7 @@ async def update_credential_category(credential_id: str, request: dict):
 async def get_contact_details(contact_id: str):
     """Get all records for a specific contact (by phone or ID) including WhatsApp groups"""
     # First try to find by ID
-    contact = await db.contacts.find_one({"id": contact_id}, {"_id": 0})
+    contact = await db.contacts.find_one({"id": contact_id}, DOC_PROJECTION)
     
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
@@ -2231,15 +3410,13 @@ async def get_contact_details(contact_id: str):
     all_identities = []
     
     if phone:
-        # Normalize the phone to match against all variants
-        normalized = normalize_phone(phone)
-        
-        # Find all contacts with this phone or any variant
-        all_raw_contacts = await db.contacts.find({}, {"_id": 0}).to_list(None)
+        # Find all contacts with this phone or any variant (indexed normalized_phone)
+        all_raw_contacts = await db.contacts.find(
+            {"normalized_phone": normalize_phone(phone)}, DOC_PROJECTION
+        ).to_list(None)
         
         for c in all_raw_contacts:
-            c_phone = c.get('phone')
-            if c_phone and normalize_phone(c_phone) == normalized:
+            if c.get('phone'):
                 all_contacts.append(c)
                 if isinstance(c.get('created_at'), str):
                     c['created_at'] = datetime.fromisoformat(c['created_at'])
@@ -2343,165 +3520,158 @@ async def get_filters(data_type: str):
     else:
         raise HTTPException(status_code=400, detail="Invalid data type")
 
+# --- whatsapp_group_summary materialized view ---
+# One row per group_id merging every upload of the group (name, photo, cases, devices, suspects,
+# member and upload counts), so /whatsapp-groups filters, sorts and pages with indexed queries.
+# Maintained like contacts_dedup: uploads refresh the groups they touched, deletions the groups
+# they affected.
+
+def group_summary_order_key(group_name: Optional[str], group_id: str, first_id) -> str:
+    """Default list order: named groups by name (case-insensitive), then unnamed ones, then upload order"""
+    name = group_name or ''
+    # Groups with @g.us in the name are unnamed, sort them last
+    sort_name = f"1{name}" if '@g.us' in name else f"0{name.lower()}"
+    return f"{sort_name}\x00{first_id}"
+
+def refresh_group_summary(group_ids) -> int:
+    """Recompute the whatsapp_group_summary rows of the given group ids (sync, runs off the event loop)"""
+    group_ids = sorted({group_id for group_id in group_ids if group_id})
+    refreshed = 0
+    for i in range(0, len(group_ids), DEDUP_REFRESH_BATCH):
+        chunk = group_ids[i:i + DEDUP_REFRESH_BATCH]
+        uploads = {}
+        for group in sync_db.whatsapp_groups.find({'group_id': {'$in': chunk}}, {'search_terms': 0}).sort('_id', 1):
+            uploads.setdefault(group['group_id'], []).append(group)
+        
+        # Members: one per phone; names, cases, devices and suspects of every edge
+        memberships = {row['_id']: row for row in sync_db.group_memberships.aggregate([
+            {'$match': {'group_id': {'$in': chunk}}},
+            {'$sort': {'_id': 1}},
+            {'$group': {
+                '_id': '$group_id',
+                'phones': {'$addToSet': '$phone'},
+                'names': {'$push': '$group_name'},
+                'cases': {'$addToSet': '$case_number'},
+                'devices': {'$addToSet': '$device_info'},
+                'suspects': {'$addToSet': '$person_name'}
+            }}
+        ], allowDiskUse=True)}
+        
+        operations = []
+        for group_id, groups in uploads.items():
+            first = groups[0]
+            edges = memberships.get(group_id, {})
+            group_name = first.get('group_name', group_id)
+            if group_name == group_id:
+                # No real name: first non-empty name from the member contacts' whatsapp_groups strings
+                group_name = next((name for name in edges.get('names', []) if name), group_name)
+            created_at = first.get('created_at')
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at)
+            
+            row = {
+                'group_id': group_id,
+                'group_name': group_name,
+                'photo_path': next((g['photo_path'] for g in groups if g.get('photo_path')), None),
+                'source': first.get('source', 'WhatsApp'),
+                'created_at': created_at,
+                'cases': sorted({g['case_number'] for g in groups if g.get('case_number')} | set(filter(None, edges.get('cases', [])))),
+                'devices': sorted({g['device_info'] for g in groups if g.get('device_info')} | set(filter(None, edges.get('devices', [])))),
+                'suspects': sorted({g['person_name'] for g in groups if g.get('person_name')} | set(filter(None, edges.get('suspects', [])))),
+                'member_count': len(edges.get('phones', [])),
+                'upload_count': len(groups),  # How many times this group was uploaded
+                'first_id': first['_id'],
+                'order_key': group_summary_order_key(group_name, group_id, first['_id'])
+            }
+            operations.append(ReplaceOne({'group_id': group_id}, row, upsert=True))
+        stale = [group_id for group_id in chunk if group_id not in uploads]
+        if stale:
+            operations.append(DeleteMany({'group_id': {'$in': stale}}))
+        if operations:
+            sync_db.whatsapp_group_summary.bulk_write(operations, ordered=False)
+        refreshed += len(chunk)
+    return refreshed
+
+def rebuild_group_summary() -> int:
+    """Recompute the whole whatsapp_group_summary view"""
+    group_ids = [group_id for group_id in sync_db.whatsapp_groups.distinct('group_id') if group_id]
+    sync_db.whatsapp_group_summary.delete_many({'group_id': {'$nin': group_ids}})
+    return refresh_group_summary(group_ids)
+
+WHATSAPP_GROUP_SORT_FIELDS = {'name': 'group_name', 'member_count': 'member_count', 'upload_count': 'upload_count'}
+
 @api_router.get("/whatsapp-groups")
-async def get_whatsapp_groups():
+async def get_whatsapp_groups(response: Response, q: ListQuery = Depends()):
     """
     Get WhatsApp groups with identity-level aggregation and case-based filtering.
-    Groups with the same group_id across multiple uploads are merged into one logical group.
+    Groups with the same group_id across multiple uploads are merged into one logical group
+    (whatsapp_group_summary); members are only resolved for the groups of the requested page.
     """
     try:
-        # Fetch all groups from the whatsapp_groups collection
-        all_groups = await db.whatsapp_groups.find(
-            {},
-            {"_id": 0}
-        ).to_list(None)
-        
-        # Fetch all contacts that have whatsapp_groups to find members
-        contacts_with_groups = await db.contacts.find(
-            {"whatsapp_groups": {"$exists": True, "$ne": []}},
-            {"_id": 0, "id": 1, "name": 1, "phone": 1, "photo_path": 1, "person_name": 1, 
-             "case_number": 1, "device_info": 1, "whatsapp_groups": 1}
-        ).to_list(100000)
+        groups = await q.find(
+            'whatsapp_group_summary', response, {'_id': 0, 'first_id': 0, 'order_key': 0},
+            WHATSAPP_GROUP_SORT_FIELDS, default_sort='order_key', tie='order_key', merged=True
+        )
         
-        # Step 1: Aggregate groups by group_id (identity-level aggregation)
-        aggregated_groups = {}
+        # Members of the page's groups: one per phone (the first contact in ingest order)
+        page_ids = [group['group_id'] for group in groups]
+        member_rows = []
+        for i in range(0, len(page_ids), DEDUP_REFRESH_BATCH):
+            member_rows += await db.group_memberships.aggregate([
+                {'$match': {'group_id': {'$in': page_ids[i:i + DEDUP_REFRESH_BATCH]}}},
+                {'$sort': {'_id': 1}},
+                {'$group': {
+                    '_id': {'group_id': '$group_id', 'phone': '$phone'},
+                    'first_edge': {'$first': '$_id'},
+                    'contact_id': {'$first': '$contact_id'}
+                }},
+                {'$sort': {'first_edge': 1}}
+            ], allowDiskUse=True).to_list(None)
+        
+        member_contacts = {}
+        contact_ids = [row['contact_id'] for row in member_rows]
+        for i in range(0, len(contact_ids), DEDUP_REFRESH_BATCH):
+            async for contact in db.contacts.find(
+                {"id": {"$in": contact_ids[i:i + DEDUP_REFRESH_BATCH]}},
+                {"_id": 0, "id": 1, "name": 1, "phone": 1, "photo_path": 1, "person_name": 1,
+                 "case_number": 1, "device_info": 1}
+            ):
+                member_contacts[contact['id']] = contact
         
-        for group in all_groups:
-            group_id = group.get('group_id')
-            if not group_id:
-                continue
-            
-            # Convert datetime if needed
-            if isinstance(group.get('created_at'), str):
-                group['created_at'] = datetime.fromisoformat(group['created_at'])
-            
-            if group_id not in aggregated_groups:
-                # First instance of this group
-                aggregated_groups[group_id] = {
-                    'group_id': group_id,
-                    'group_name': group.get('group_name', group_id),
-                    'photo_path': group.get('photo_path'),
-                    'source': group.get('source', 'WhatsApp'),
-                    'created_at': group.get('created_at'),
-                    'cases': set(),
-                    'devices': set(),
-                    'suspects': set(),
-                    'sources': []  # Track all upload sources
-                }
-            
-            # Aggregate case, device, and suspect info from this upload instance
-            if group.get('case_number'):
-                aggregated_groups[group_id]['cases'].add(group['case_number'])
-            if group.get('device_info'):
-                aggregated_groups[group_id]['devices'].add(group['device_info'])
-            if group.get('person_name'):
-                aggregated_groups[group_id]['suspects'].add(group['person_name'])
-            
-            # Track source info for detailed view
-            aggregated_groups[group_id]['sources'].append({
-                'case_number': group.get('case_number'),
-                'person_name': group.get('person_name'),
-                'device_info': group.get('device_info')
-            })
-            
-            # Prefer photo from first upload if not set
-            if not aggregated_groups[group_id]['photo_path'] and group.get('photo_path'):
-                aggregated_groups[group_id]['photo_path'] = group['photo_path']
-        
-        # Step 2: Build a mapping of group_id -> group_name from contacts' whatsapp_groups
-        # Format in contacts: "120363212727307534@g.us BLOC DE BAȘTINĂ (bdb)"
-        group_names_from_contacts = {}
-        for contact in contacts_with_groups:
-            for group_str in (contact.get('whatsapp_groups') or []):
-                if '@g.us' in group_str:
-                    parts = group_str.split('@g.us', 1)
-                    if len(parts) == 2:
-                        group_id = parts[0] + '@g.us'
-                        group_name = parts[1].strip()
-                        if group_name and group_id not in group_names_from_contacts:
-                            group_names_from_contacts[group_id] = group_name
-        
-        # Step 3: Build a mapping of group_id -> members (with case info)
         group_members = {}
-        for contact in contacts_with_groups:
-            for group_str in (contact.get('whatsapp_groups') or []):
-                if '@g.us' in group_str:
-                    parts = group_str.split('@g.us', 1)
-                    group_id = parts[0] + '@g.us'
-                    
-                    if group_id not in group_members:
-                        group_members[group_id] = []
-                    
-                    # Add member info with case association
-                    member_info = {
-                        'id': contact.get('id'),
-                        'name': contact.get('name'),
-                        'phone': contact.get('phone'),
-                        'photo_path': contact.get('photo_path'),
-                        'person_name': contact.get('person_name'),
-                        'case_number': contact.get('case_number'),
-                        'device_info': contact.get('device_info')
-                    }
-                    
-                    # Add case and device to aggregated group
-                    if group_id in aggregated_groups:
-                        if contact.get('case_number'):
-                            aggregated_groups[group_id]['cases'].add(contact['case_number'])
-                        if contact.get('device_info'):
-                            aggregated_groups[group_id]['devices'].add(contact['device_info'])
-                        if contact.get('person_name'):
-                            aggregated_groups[group_id]['suspects'].add(contact['person_name'])
-                    
-                    # Avoid duplicate members (same phone in same group)
-                    existing_phones = [m.get('phone') for m in group_members[group_id]]
-                    if contact.get('phone') not in existing_phones:
-                        group_members[group_id].append(member_info)
+        for row in member_rows:
+            contact = member_contacts.get(row['contact_id'], {})
+            group_members.setdefault(row['_id']['group_id'], []).append({
+                'id': row['contact_id'],
+                'name': contact.get('name'),
+                'phone': row['_id'].get('phone'),
+                'photo_path': contact.get('photo_path'),
+                'person_name': contact.get('person_name'),
+                'case_number': contact.get('case_number'),
+                'device_info': contact.get('device_info')
+            })
         
-        # Step 4: Format aggregated groups for frontend
         groups_list = []
-        for group_id, group_data in aggregated_groups.items():
-            group_name = group_data['group_name']
-            
-            # If group_name is just the group_id (no real name), try to get it from contacts
-            if group_name == group_id and group_id in group_names_from_contacts:
-                group_name = group_names_from_contacts[group_id]
-            
-            # Get members for this group
-            members = group_members.get(group_id, [])
-            
-            # Convert sets to sorted lists
-            cases_list = sorted(list(group_data['cases']))
-            devices_list = sorted(list(group_data['devices']))
-            suspects_list = sorted(list(group_data['suspects']))
-            
-            group_entry = {
-                'group_id': group_id,
-                'group_name': group_name,
-                'photo_path': group_data['photo_path'],
-                'source': group_data['source'],
-                'created_at': group_data['created_at'],
-                'cases': cases_list,
-                'devices': devices_list,
-                'suspects': suspects_list,
-                'members': members,
-                'member_count': len(members),
-                'upload_count': len(group_data['sources'])  # How many times this group was uploaded
-            }
-            groups_list.append(group_entry)
-        
-        # Sort by group name (put groups with real names first, then those with just IDs)
-        def sort_key(x):
-            name = x.get('group_name', '')
-            # Groups with @g.us in name are unnamed, sort them last
-            if '@g.us' in name:
-                return (1, name)
-            return (0, name.lower())
-        
-        groups_list.sort(key=sort_key)
+        for group in groups:
+            groups_list.append({
+                'group_id': group['group_id'],
+                'group_name': group.get('group_name'),
+                'photo_path': group.get('photo_path'),
+                'source': group.get('source'),
+                'created_at': group.get('created_at'),
+                'cases': group.get('cases', []),
+                'devices': group.get('devices', []),
+                'suspects': group.get('suspects', []),
+                'members': group_members.get(group['group_id'], []),
+                'member_count': group.get('member_count', 0),
+                'upload_count': group.get('upload_count', 0)
+            })
         
         logger.info(f"Returning {len(groups_list)} aggregated WhatsApp groups (identity-level) with members")
         return groups_list
         
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         logger.error(f"Error getting WhatsApp groups: {str(e)}\n{traceback.format_exc()}")
@@ -2511,11 +3681,12 @@ async def get_whatsapp_groups():
 async def get_group_members(group_id: str):
     """Get all members of a specific WhatsApp group"""
     try:
-        # Find all contacts that belong to this group
+        # Member contacts come from the indexed group_memberships edges
+        contact_ids = await db.group_memberships.distinct('contact_id', {"group_id": group_id})
         contacts = await db.contacts.find(
-            {"whatsapp_groups": {"$regex": f"^{group_id}"}},
-            {"_id": 0}
-        ).to_list(None)
+            {"id": {"$in": contact_ids}},
+            CONTACT_LIST_PROJECTION
+        ).sort('_id', 1).to_list(None)
         
         # Convert datetime strings
         for contact in contacts:
@@ -2529,13 +3700,248 @@ async def get_group_members(group_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# --- Link graph ---
+# Cross-device links between suspect, device, phone and group nodes:
+#   suspect -is_owner-> device, suspect -is_owner-> phone (the device owner's number),
+#   device -has_contact-> phone, phone -member_of-> group.
+# Every upload writes its own edges (one per link and upload session), so deletions drop
+# them with the same case / session queries as the documents they came from.
+GRAPH_SESSION_FIELDS = ('case_number', 'person_name', 'device_info', 'upload_session_id')
+MAX_GRAPH_HOPS = 3
+MAX_GRAPH_NODES = 2000
+
+def graph_node(kind: str, *key: Optional[str]) -> str:
+    """Node id: 'suspect:<name>', 'device:<suspect>/<device>', 'phone:<normalized phone>', 'group:<group id>'"""
+    return f"{kind}:{'/'.join(k or '' for k in key)}"
+
+def graph_edge(edge_type: str, source: str, target: str, session: Dict[str, Any]) -> Dict[str, Any]:
+    return {'type': edge_type, 'source': source, 'target': target,
+            **{field: session.get(field) for field in GRAPH_SESSION_FIELDS}}
+
+def ownership_edges(session: Dict[str, Any], suspect_phone: Optional[str]) -> List[Dict[str, Any]]:
+    """is_owner edges of an upload session: the suspect owns the device and its phone number"""
+    suspect = graph_node('suspect', session.get('person_name'))
+    edges = [graph_edge('is_owner', suspect, graph_node('device', session.get('person_name'), session.get('device_info')), session)]
+    owner_phone = normalize_phone(suspect_phone) if suspect_phone else None
+    if owner_phone:
+        edges.append(graph_edge('is_owner', suspect, graph_node('phone', owner_phone), session))
+    return edges
+
+def contact_link_edges(contact: Dict[str, Any], group_ids: Iterable[str]) -> List[Dict[str, Any]]:
+    """has_contact / member_of edges of one stored contact (contacts without a phone are not linked)"""
+    if not contact.get('normalized_phone'):
+        return []
+    phone = graph_node('phone', contact['normalized_phone'])
+    device = graph_node('device', contact.get('person_name'), contact.get('device_info'))
+    return [graph_edge('has_contact', device, phone, contact)] + [
+        graph_edge('member_of', phone, graph_node('group', group_id), contact) for group_id in group_ids
+    ]
+
+def add_graph_edges(writer: BulkWriter, edges: List[Dict[str, Any]], seen: set):
+    """Queue the edges an upload has not written yet"""
+    for edge in edges:
+        key = (edge['type'], edge['source'], edge['target'])
+        if key not in seen:
+            seen.add(key)
+            writer.add('graph_edges', edge)
+
+def stored_contact_link_edges(match: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """has_contact / member_of edges of the stored contacts and memberships matching match, one per session"""
+    session_key = {field: f'${field}' for field in GRAPH_SESSION_FIELDS}
+    for row in sync_db.contacts.aggregate([
+        {'$match': {**match, 'normalized_phone': {'$nin': [None, '']}}},
+        {'$group': {'_id': {**session_key, 'normalized_phone': '$normalized_phone'}}}
+    ], allowDiskUse=True):
+        yield from contact_link_edges(row['_id'], ())
+    for row in sync_db.group_memberships.aggregate([
+        {'$match': {**match, 'normalized_phone': {'$nin': [None, '']}}},
+        {'$group': {'_id': {**session_key, 'normalized_phone': '$normalized_phone', 'group_id': '$group_id'}}}
+    ], allowDiskUse=True):
+        yield from contact_link_edges(row['_id'], (row['_id']['group_id'],))[1:]
+
+def insert_graph_edges(edges: Iterable[Dict[str, Any]]) -> int:
+    inserted = 0
+    batch = []
+    for edge in edges:
+        batch.append(edge)
+        if len(batch) >= 1000:
+            sync_db.graph_edges.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        sync_db.graph_edges.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+def refresh_phone_links(phones) -> int:
+    """Recompute the has_contact / member_of edges of the given normalized phones after contacts were removed"""
+    phones = sorted(phone for phone in set(phones) if phone)
+    for i in range(0, len(phones), DEDUP_REFRESH_BATCH):
+        chunk = phones[i:i + DEDUP_REFRESH_BATCH]
+        nodes = [graph_node('phone', phone) for phone in chunk]
+        sync_db.graph_edges.delete_many({'$or': [
+            {'type': 'has_contact', 'target': {'$in': nodes}},
+            {'type': 'member_of', 'source': {'$in': nodes}}
+        ]})
+        insert_graph_edges(stored_contact_link_edges({'normalized_phone': {'$in': chunk}}))
+    return len(phones)
+
+LINK_GRAPH_STATE_ID = 'link_graph'
+
+def rebuild_link_graph() -> int:
+    """Recompute the whole link graph from the stored uploads"""
+    # built stays False until the last edge is in, so startup redoes an interrupted rebuild
+    sync_db.meta.update_one({'_id': LINK_GRAPH_STATE_ID}, {'$set': {'built': False}}, upsert=True)
+    sessions = {}
+    for collection in ('contacts', 'passwords', 'user_accounts'):
+        for row in sync_db[collection].aggregate([
+            {'$group': {'_id': {field: f'${field}' for field in GRAPH_SESSION_FIELDS},
+                        'suspect_phone': {'$max': '$suspect_phone'}}}
+        ], allowDiskUse=True):
+            key = tuple(row['_id'].get(field) for field in GRAPH_SESSION_FIELDS)
+            if key not in sessions or not sessions[key][1]:
+                sessions[key] = (row['_id'], row.get('suspect_phone'))
+    
+    sync_db.graph_edges.delete_many({})
+    ownership = (edge for session, suspect_phone in sessions.values() for edge in ownership_edges(session, suspect_phone))
+    inserted = insert_graph_edges(ownership) + insert_graph_edges(stored_contact_link_edges({}))
+    sync_db.meta.update_one({'_id': LINK_GRAPH_STATE_ID}, {'$set': {'built': True}})
+    return inserted
+
+def graph_node_query(node: str) -> str:
+    """Accept raw phone numbers in phone node ids ('phone:+40 721 000 000' -> 'phone:0721000000')"""
+    kind, _, key = node.partition(':')
+    if kind == 'phone':
+        return graph_node('phone', normalize_phone(key))
+    return node
+
+@api_router.get("/graph/neighbourhood")
+async def get_graph_neighbourhood(
+    node: str,
+    hops: int = Query(1, ge=1, le=MAX_GRAPH_HOPS),
+    case: Optional[str] = None,
+    max_nodes: int = Query(500, ge=1, le=MAX_GRAPH_NODES)
+):
+    """
+    Nodes and edges within `hops` links of a node, e.g. node=phone:0721000000, node=suspect:Ion Pop,
+    node=group:120363212727307534@g.us. Expansion stops at max_nodes nodes (truncated=true).
+    """
+    try:
+        start = graph_node_query(node)
+        nodes = {start: 0}  # node -> hops from start
+        labels = {}
+        links = {}
+        truncated = False
+        frontier = [start]
+        for hop in range(1, hops + 1):
+            next_frontier = []
+            for i in range(0, len(frontier), DEDUP_REFRESH_BATCH):
+                chunk = frontier[i:i + DEDUP_REFRESH_BATCH]
+                query = {'$or': [{'source': {'$in': chunk}}, {'target': {'$in': chunk}}]}
+                if case:
+                    query['case_number'] = case
+                async for edge in db.graph_edges.find(query, {'_id': 0, 'upload_session_id': 0}):
+                    for other in (edge['source'], edge['target']):
+                        if other in nodes:
+                            continue
+                        if len(nodes) >= max_nodes:
+                            truncated = True
+                            continue
+                        nodes[other] = hop
+                        next_frontier.append(other)
+                    if edge['source'] not in nodes or edge['target'] not in nodes:
+                        continue
+                    for end in (edge['source'], edge['target']):
+                        if end.startswith('device:'):
+                            labels[end] = edge.get('device_info')
+                    link = links.setdefault((edge['type'], edge['source'], edge['target']), {
+                        'type': edge['type'], 'source': edge['source'], 'target': edge['target'], 'cases': set()
+                    })
+                    if edge.get('case_number'):
+                        link['cases'].add(edge['case_number'])
+            frontier = next_frontier
+            if not frontier:
+                break
+        
+        # Group nodes are labelled with their group name when one is known
+        group_ids = [n[len('group:'):] for n in nodes if n.startswith('group:')]
+        for i in range(0, len(group_ids), DEDUP_REFRESH_BATCH):
+            async for group in db.whatsapp_groups.find(
+                {'group_id': {'$in': group_ids[i:i + DEDUP_REFRESH_BATCH]}}, {'_id': 0, 'group_id': 1, 'group_name': 1}
+            ):
+                if group.get('group_name') and group['group_name'] != group['group_id']:
+                    labels.setdefault(f"group:{group['group_id']}", group['group_name'])
+        
+        return {
+            'node': start,
+            'nodes': [
+                {'id': n, 'type': n.partition(':')[0], 'label': labels.get(n) or n.partition(':')[2], 'hops': distance}
+                for n, distance in sorted(nodes.items(), key=lambda item: (item[1], item[0]))
+            ],
+            'edges': [
+                {**link, 'cases': sorted(link['cases'])}
+                for _, link in sorted(links.items())
+            ],
+            'truncated': truncated
+        }
+        
+    except Exception as e:
+        logger.error(f"Error getting graph neighbourhood: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/graph/shared-phones")
+async def get_shared_phones(
+    min_suspects: int = Query(2, ge=1),
+    case: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Phones linked to at least min_suspects suspects (as a contact or as their own number), most shared first"""
+    try:
+        match = {'target': {'$regex': '^phone:'}}
+        if case:
+            match['case_number'] = case
+        rows = await db.graph_edges.aggregate([
+            {'$match': match},
+            {'$group': {
+                '_id': '$target',
+                'suspects': {'$addToSet': '$person_name'},
+                'owners': {'$addToSet': {'$cond': [{'$eq': ['$type', 'is_owner']}, '$person_name', None]}},
+                'devices': {'$addToSet': '$device_info'},
+                'cases': {'$addToSet': '$case_number'}
+            }},
+            {'$project': {'suspects': 1, 'owners': 1, 'devices': 1, 'cases': 1, 'suspect_count': {'$size': '$suspects'}}},
+            {'$match': {'suspect_count': {'$gte': min_suspects}}},
+            {'$sort': {'suspect_count': -1, '_id': 1}},
+            {'$limit': limit}
+        ], allowDiskUse=True).to_list(None)
+        
+        # Display names from the contacts_dedup view
+        phones = [row['_id'][len('phone:'):] for row in rows]
+        names = {}
+        async for contact in db.contacts_dedup.find({'dedup_key': {'$in': phones}}, {'_id': 0, 'dedup_key': 1, 'name': 1}):
+            names[contact['dedup_key']] = contact.get('name')
+        
+        return [{
+            'phone': phone,
+            'name': names.get(phone),
+            'suspect_count': row['suspect_count'],
+            'suspects': sorted(filter(None, row['suspects'])),
+            'owners': sorted(filter(None, row['owners'])),
+            'devices': sorted(filter(None, row['devices'])),
+            'cases': sorted(filter(None, row['cases']))
+        } for phone, row in zip(phones, rows)]
+        
+    except Exception as e:
+        logger.error(f"Error getting shared phones: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.get("/discord-accounts")
 async def get_discord_accounts():
     """Get all Discord accounts"""
     try:
         accounts = await db.user_accounts.find(
             {"source": "Discord"},
-            {"_id": 0}
+            USER_ACCOUNT_LIST_PROJECTION
         ).to_list(None)
         return accounts
     except Exception as e:
@@ -2584,7 +3990,7 @@ async def export_passwords(request: ExportRequest):
         if request.application and request.application != "all":
             pwd_query["application"] = request.application
             
-        passwords = await db.passwords.find(pwd_query, {"_id": 0}).to_list(None)
+        passwords = await db.passwords.find(pwd_query, DOC_PROJECTION).to_list(None)
         
         # 4. Fetch User Accounts
         # (Map 'application' filter to 'source' or 'service_identifier' for accounts)
@@ -2607,7 +4013,7 @@ async def export_passwords(request: ExportRequest):
                     {"service_identifier": request.application}
                 ]
             
-        accounts = await db.user_accounts.find(acc_query, {"_id": 0}).to_list(None)
+        accounts = await db.user_accounts.find(acc_query, DOC_PROJECTION).to_list(None)
 
         # 5. Generate Output
         output = io.StringIO()
@@ -2700,41 +4106,61 @@ async def export_passwords(request: ExportRequest):
 async def get_suspect_info():
     """Get suspect information for all cases"""
     try:
-        # Get all unique cases with their suspect phones
-        contacts = await db.contacts.find({}, {"_id": 0, "case_number": 1, "person_name": 1, "suspect_phone": 1, "phone": 1, "photo_path": 1, "device_info": 1}).to_list(None)
+        # One row per (case, suspect phone) pair; the earliest pair of a case describes it
+        pairs = await db.contacts.aggregate([
+            {"$match": {"case_number": {"$nin": [None, ""]}, "suspect_phone": {"$nin": [None, ""]}}},
+            {"$sort": {"_id": 1}},
+            {"$group": {
+                "_id": {"case_number": "$case_number", "suspect_phone": "$suspect_phone"},
+                "first_id": {"$min": "$_id"},
+                "person_name": {"$first": "$person_name"},
+                "device_info": {"$first": "$device_info"}
+            }},
+            {"$sort": {"first_id": 1}}
+        ]).to_list(None)
         
         # Build a map of case -> suspect info
         case_suspects = {}
+        pair_keys = {}  # (case, suspect phone) -> phone_keys of the suspect phone
         
-        for contact in contacts:
-            case_number = contact.get('case_number')
-            suspect_phone = contact.get('suspect_phone')
-            
-            if not case_number or not suspect_phone:
-                continue
+        for pair in pairs:
+            case_number = pair['_id']['case_number']
+            suspect_phone = pair['_id']['suspect_phone']
             
             # Initialize case entry if not exists
             if case_number not in case_suspects:
                 case_suspects[case_number] = {
                     'case_number': case_number,
-                    'person_name': contact.get('person_name'),
-                    'device_info': contact.get('device_info'),
+                    'person_name': pair.get('person_name'),
+                    'device_info': pair.get('device_info'),
                     'suspect_phone': suspect_phone,
                     'suspect_photo_path': None
                 }
-            
-            # Check if this contact IS the suspect (phone matches suspect_phone)
-            contact_phone = contact.get('phone', '')
-            if contact_phone and contact.get('photo_path'):
-                # Normalize both phones for comparison
-                normalized_contact = normalize_phone(contact_phone)
-                normalized_suspect = normalize_phone(suspect_phone)
-                
-                # If phones match, this is the suspect's photo
-                if normalized_contact == normalized_suspect or \
-                   (len(normalized_contact) >= 9 and len(normalized_suspect) >= 9 and \
-                    normalized_contact[-9:] == normalized_suspect[-9:]):
-                    case_suspects[case_number]['suspect_photo_path'] = contact.get('photo_path')
+            keys = phone_keys(suspect_phone)
+            if keys['normalized_phone']:
+                pair_keys[(case_number, suspect_phone)] = keys
+        
+        # The suspect's photo: latest contact of a pair whose own phone matches the suspect phone.
+        # Candidates for every pair come from one query on the indexed phone keys.
+        normalized = {keys['normalized_phone'] for keys in pair_keys.values()}
+        suffixes = {keys['phone_suffix9'] for keys in pair_keys.values() if keys['phone_suffix9']}
+        latest_photo_id = {}
+        if pair_keys:
+            async for contact in db.contacts.find(
+                {"case_number": {"$in": list(case_suspects)},
+                 "suspect_phone": {"$in": list({phone for _, phone in pair_keys})},
+                 "photo_path": {"$nin": [None, ""]},
+                 "$or": [{"normalized_phone": {"$in": list(normalized)}}, {"phone_suffix9": {"$in": list(suffixes)}}]},
+                {"_id": 1, "photo_path": 1, "case_number": 1, "suspect_phone": 1, "normalized_phone": 1, "phone_suffix9": 1}
+            ):
+                keys = pair_keys.get((contact['case_number'], contact['suspect_phone']))
+                if not keys or not (contact.get('normalized_phone') == keys['normalized_phone'] or (
+                        keys['phone_suffix9'] and contact.get('phone_suffix9') == keys['phone_suffix9'])):
+                    continue
+                case_number = contact['case_number']
+                if case_number not in latest_photo_id or contact['_id'] > latest_photo_id[case_number]:
+                    latest_photo_id[case_number] = contact['_id']
+                    case_suspects[case_number]['suspect_photo_path'] = contact['photo_path']
         
         return list(case_suspects.values())
         
@@ -2749,7 +4175,7 @@ async def get_contacts_by_photo(case_number: str):
         # Get all contacts for this case with photos
         contacts = await db.contacts.find(
             {"case_number": case_number, "photo_path": {"$ne": None}},
-            {"_id": 0}
+            CONTACT_LIST_PROJECTION
         ).to_list(None)
         
         # Group contacts by photo
@@ -2773,12 +4199,9 @@ async def get_contacts_by_photo(case_number: str):
                     'contains_suspect_number': False
                 }
             
-            # Check if this contact has the suspect's phone number
-            if suspect_phone and contact.get('phone'):
-                normalized_contact = normalize_phone(contact.get('phone'))
-                normalized_suspect = normalize_phone(suspect_phone)
-                if (len(normalized_contact) >= 9 and len(normalized_suspect) >= 9 and 
-                    normalized_contact[-9:] == normalized_suspect[-9:]):
+            # Check if this contact has the suspect's phone number (stored last-9-digit key)
+            if suspect_phone and contact.get('phone_suffix9'):
+                if contact['phone_suffix9'] == phone_keys(suspect_phone)['phone_suffix9']:
                     photo_groups[photo]['contains_suspect_number'] = True
             
             photo_groups[photo]['contacts'].append({
@@ -2802,26 +4225,29 @@ async def get_contacts_by_photo(case_number: str):
 async def cleanup_incorrect_photos():
     """Remove photos from contacts that incorrectly have the suspect's photo"""
     try:
-        # Get all contacts
-        contacts = await db.contacts.find({}, {"_id": 0}).to_list(None)
-        
         cleaned_count = 0
         total_with_photos = 0
         
-        # Group contacts by case to get suspect phone for each case
+        # First suspect phone stored for each case
         case_suspect_phones = {}
-        for contact in contacts:
-            case_number = contact.get('case_number')
-            suspect_phone = contact.get('suspect_phone')
-            if case_number and suspect_phone and case_number not in case_suspect_phones:
-                case_suspect_phones[case_number] = suspect_phone
+        async for row in db.contacts.aggregate([
+            {"$match": {"case_number": {"$nin": [None, ""]}, "suspect_phone": {"$nin": [None, ""]}}},
+            {"$sort": {"_id": 1}},
+            {"$group": {"_id": "$case_number", "suspect_phone": {"$first": "$suspect_phone"}}}
+        ]):
+            case_suspect_phones[row['_id']] = row['suspect_phone']
+        
+        # Only contacts with photos matter (indexed photo_path)
+        contacts = await db.contacts.find(
+            {"photo_path": {"$nin": [None, ""]}},
+            {"_id": 0, "id": 1, "name": 1, "phone": 1, "normalized_phone": 1, "phone_suffix9": 1, "case_number": 1,
+             "photo_path": 1}
+        ).to_list(None)
+        dedup_keys = set()
+        image_refs = set()
         
         # Process each contact
         for contact in contacts:
-            photo_path = contact.get('photo_path')
-            if not photo_path:
-                continue
-            
             total_with_photos += 1
             contact_phone = contact.get('phone', '')
             case_number = contact.get('case_number')
@@ -2830,16 +4256,10 @@ async def cleanup_incorrect_photos():
             if not contact_phone or not suspect_phone:
                 continue
             
-            # Normalize phones for comparison
-            normalized_contact = normalize_phone(contact_phone)
-            normalized_suspect = normalize_phone(suspect_phone)
-            
             # Check if this contact IS the suspect
-            is_suspect = False
-            if len(normalized_contact) >= 9 and len(normalized_suspect) >= 9:
-                # Compare last 9 digits (to handle different country code formats)
-                if normalized_contact[-9:] == normalized_suspect[-9:]:
-                    is_suspect = True
+            # Compare last 9 digits (to handle different country code formats)
+            suspect_suffix = phone_keys(suspect_phone)['phone_suffix9']
+            is_suspect = bool(suspect_suffix) and contact.get('phone_suffix9') == suspect_suffix
             
             # If this contact is NOT the suspect but has a photo, it might be wrong
             # We'll be conservative: only remove photos from contacts that are definitely not the suspect
@@ -2871,12 +4291,20 @@ async def cleanup_incorrect_photos():
                         {'$unset': {'photo_path': ''}}
                     )
                     cleaned_count += 1
+                    dedup_keys.add(contact.get('normalized_phone') or '')
+                    if (contact.get('photo_path') or '').startswith(IMAGE_BLOB_PREFIX):
+                        image_refs.add(contact['photo_path'])
                     logger.info(f"Removed photo from contact: {contact.get('name')} ({contact.get('phone')})")
         
+        await run_in_threadpool(refresh_contacts_dedup, dedup_keys)
+        await bump_generation()
+        deleted_blobs = await release_image_blobs(image_refs)
+        
         return {
             'success': True,
             'total_contacts_with_photos': total_with_photos,
             'photos_removed': cleaned_count,
+            'image_blobs_deleted': deleted_blobs,
             'message': f'Successfully cleaned {cleaned_count} incorrect photos from {total_with_photos} contacts with photos'
         }
         
@@ -2956,11 +4384,19 @@ async def clear_entire_database():
         accounts_result = await db.user_accounts.delete_many({})
         profiles_result = await db.suspect_profiles.delete_many({})
         groups_result = await db.whatsapp_groups.delete_many({})
+        await db.group_memberships.delete_many({})
+        await db.graph_edges.delete_many({})
+        await clear_derived_views()
+        await bump_generation()
         
         # Delete all uploaded images
         uploads_dir = Path('/app/uploads')
         deleted_images = 0
         if uploads_dir.exists():
+            # No references survive a full wipe, so every image blob is garbage
+            if IMAGE_BLOB_DIR.exists():
+                deleted_images += sum(1 for blob in IMAGE_BLOB_DIR.glob('*/*') if blob.is_file())
+            
             for img_file in uploads_dir.glob('*.jpg'):
                 try:
                     img_file.unlink()
@@ -2968,7 +4404,7 @@ async def clear_entire_database():
                 except Exception as e:
                     logger.error(f"Error deleting image {img_file}: {str(e)}")
             
-            # Also delete case directories
+            # Also delete case directories (and the blob store)
             for case_dir in uploads_dir.iterdir():
                 if case_dir.is_dir():
                     try:
@@ -3011,105 +4447,77 @@ async def admin_login(credentials: dict):
     else:
         raise HTTPException(status_code=401, detail='Invalid credentials')
 
+UPLOAD_SESSION_FIELDS = ('case_number', 'person_name', 'device_info', 'upload_session_id')
+
+def cases_overview_pipeline() -> List[Dict[str, Any]]:
+    """
+    Per upload session record counts of contacts, passwords and user_accounts plus the session's
+    suspect profile, in one aggregation (the session fields are covered by the session index)
+    """
+    def session_rows(counter: str) -> List[Dict[str, Any]]:
+        return [
+            {'$match': {'case_number': {'$nin': [None, '']}}},
+            {'$project': {'_id': 0, **{field: 1 for field in UPLOAD_SESSION_FIELDS}, counter: {'$literal': 1}}}
+        ]
+    
+    return session_rows('contacts') + [
+        {'$unionWith': {'coll': 'passwords', 'pipeline': session_rows('passwords')}},
+        {'$unionWith': {'coll': 'user_accounts', 'pipeline': session_rows('user_accounts')}},
+        {'$group': {
+            '_id': {field: f'${field}' for field in UPLOAD_SESSION_FIELDS},
+            'contacts': {'$sum': '$contacts'},
+            'passwords': {'$sum': '$passwords'},
+            'user_accounts': {'$sum': '$user_accounts'}
+        }},
+        {'$lookup': {
+            'from': 'suspect_profiles',
+            'localField': '_id.upload_session_id',
+            'foreignField': 'upload_session_id',
+            'pipeline': [{'$project': {'_id': 0, 'id': 1, 'created_at': 1}}],
+            'as': 'profiles'
+        }},
+        {'$sort': {f'_id.{field}': 1 for field in UPLOAD_SESSION_FIELDS}}
+    ]
+
 @api_router.get("/admin/cases")
 async def get_all_cases():
     """Get all cases with their upload sessions"""
     try:
-        # Get all unique cases from contacts, passwords, and user_accounts
-        contacts_pipeline = [
-            {"$group": {
-                "_id": {
-                    "case_number": "$case_number",
-                    "person_name": "$person_name",
-                    "device_info": "$device_info",
-                    "upload_session_id": "$upload_session_id"
-                }
-            }}
-        ]
-        
-        contact_sessions = await db.contacts.aggregate(contacts_pipeline).to_list(1000)
+        session_rows = await db.contacts.aggregate(cases_overview_pipeline(), allowDiskUse=True).to_list(None)
         
         # Build cases map
         cases_map = {}
         
-        for session_doc in contact_sessions:
-            session_info = session_doc['_id']
-            case = session_info.get('case_number')
-            if not case:
-                continue
-            
-            person_name = session_info.get('person_name')
-            device = session_info.get('device_info')
-            upload_session_id = session_info.get('upload_session_id')
-            
-            if case not in cases_map:
-                cases_map[case] = {
-                    'case_number': case,
-                    'sessions': []
-                }
-            
-            # Count records for this session
-            if upload_session_id:
-                contacts_count = await db.contacts.count_documents({
-                    "upload_session_id": upload_session_id
-                })
-                
-                passwords_count = await db.passwords.count_documents({
-                    "upload_session_id": upload_session_id
-                })
-                
-                accounts_count = await db.user_accounts.count_documents({
-                    "upload_session_id": upload_session_id
-                })
-            else:
-                contacts_count = await db.contacts.count_documents({
-                    "case_number": case,
-                    "person_name": person_name,
-                    "device_info": device
-                })
-                
-                passwords_count = await db.passwords.count_documents({
-                    "case_number": case,
-                    "person_name": person_name,
-                    "device_info": device
-                })
-                
-                accounts_count = await db.user_accounts.count_documents({
-                    "case_number": case,
-                    "person_name": person_name,
-                    "device_info": device
-                })
-            
-            # Get suspect profile if it exists
-            suspect_profile = await db.suspect_profiles.find_one({
-                "upload_session_id": upload_session_id
-            }, {"_id": 0, "id": 1, "created_at": 1})
+        for row in session_rows:
+            case = row['_id'].get('case_number')
+            person_name = row['_id'].get('person_name')
+            device = row['_id'].get('device_info')
+            upload_session_id = row['_id'].get('upload_session_id')
+            suspect_profile = row['profiles'][0] if row.get('profiles') else None
             
-            session = {
+            cases_map.setdefault(case, []).append({
                 'session_id': upload_session_id or f"{case}_{person_name}_{device}",
                 'upload_session_id': upload_session_id,
                 'person_name': person_name,
                 'device_info': device,
-                'contacts': contacts_count,
-                'passwords': passwords_count,
-                'user_accounts': accounts_count,
-                'total': contacts_count + passwords_count + accounts_count,
+                'contacts': row['contacts'],
+                'passwords': row['passwords'],
+                'user_accounts': row['user_accounts'],
+                'total': row['contacts'] + row['passwords'] + row['user_accounts'],
                 'uploaded_at': suspect_profile.get('created_at') if suspect_profile else None,
                 'profile_id': suspect_profile.get('id') if suspect_profile else None
-            }
-            
-            cases_map[case]['sessions'].append(session)
+            })
         
         # Convert to list and calculate totals per case
         cases_list = []
-        for case_number, case_data in sorted(cases_map.items()):
-            total_contacts = sum(s['contacts'] for s in case_data['sessions'])
-            total_passwords = sum(s['passwords'] for s in case_data['sessions'])
-            total_accounts = sum(s['user_accounts'] for s in case_data['sessions'])
+        for case_number, sessions in sorted(cases_map.items()):
+            total_contacts = sum(s['contacts'] for s in sessions)
+            total_passwords = sum(s['passwords'] for s in sessions)
+            total_accounts = sum(s['user_accounts'] for s in sessions)
             
             cases_list.append({
                 'case_number': case_number,
-                'sessions': case_data['sessions'],
+                'sessions': sessions,
                 'totals': {
                     'contacts': total_contacts,
                     'passwords': total_passwords,
@@ -3130,6 +4538,12 @@ async def delete_session(case_number: str, person_name: str, device_info: str):
     try:
         logger.info(f"Deleting session: {case_number}/{person_name}/{device_info}")
         
+        session_query = {"case_number": case_number, "person_name": person_name, "device_info": device_info}
+        image_refs = set()
+        for collection, _ in IMAGE_REF_FIELDS:
+            image_refs |= await image_blob_refs(collection, session_query)
+        view_keys = await run_in_threadpool(derived_view_keys, session_query)
+        
         # Delete from all collections for this specific session
         contacts_result = await db.contacts.delete_many({
             "case_number": case_number,
@@ -3155,13 +4569,17 @@ async def delete_session(case_number: str, person_name: str, device_info: str):
             "device_info": device_info
         })
         
+        await db.group_memberships.delete_many(session_query)
+        await db.graph_edges.delete_many(session_query)
+        await run_in_threadpool(refresh_derived_views, view_keys)
+        await bump_generation()
+        
         # Delete images for this specific session
-        deleted_images = 0
-        session_dir = uploads_dir / sanitize_filename(case_number) / sanitize_filename(person_name) / sanitize_filename(device_info)
+        deleted_images = await release_image_blobs(image_refs)
+        session_dir = Path('/app/uploads') / sanitize_filename(case_number) / sanitize_filename(person_name) / sanitize_filename(device_info)
         if session_dir.exists():
-            import shutil
             shutil.rmtree(session_dir)
-            deleted_images = contacts_result.deleted_count
+            deleted_images += contacts_result.deleted_count
         
         logger.info(f"Session deleted: {contacts_result.deleted_count} contacts, {passwords_result.deleted_count} passwords, {accounts_result.deleted_count} user accounts")
         
@@ -3196,6 +4614,16 @@ async def delete_session_by_profile(profile_id: str):
         
         logger.info(f"Deleting session by profile_id {profile_id}: {case_number}/{person_name}/{device_info} (session: {upload_session_id})")
         
+        # Image blobs referenced by what is about to be deleted
+        if upload_session_id:
+            session_query = {"upload_session_id": upload_session_id}
+        else:
+            session_query = {"case_number": case_number, "person_name": person_name, "device_info": device_info}
+        image_refs = await image_blob_refs('suspect_profiles', {"id": profile_id})
+        for collection in ('contacts', 'whatsapp_groups'):
+            image_refs |= await image_blob_refs(collection, session_query)
+        view_keys = await run_in_threadpool(derived_view_keys, session_query)
+        
         # Delete using upload_session_id for precision (if available)
         if upload_session_id:
             # Precise deletion - only this specific upload
@@ -3214,6 +4642,14 @@ async def delete_session_by_profile(profile_id: str):
             groups_result = await db.whatsapp_groups.delete_many({
                 "upload_session_id": upload_session_id
             })
+            
+            await db.group_memberships.delete_many({
+                "upload_session_id": upload_session_id
+            })
+            
+            await db.graph_edges.delete_many({
+                "upload_session_id": upload_session_id
+            })
         else:
             # Fallback: Delete by case_number + person_name + device_info (old behavior)
             # This will delete ALL uploads for this combination
@@ -3241,9 +4677,17 @@ async def delete_session_by_profile(profile_id: str):
                 "person_name": person_name,
                 "device_info": device_info
             })
+            
+            await db.group_memberships.delete_many(session_query)
+            await db.graph_edges.delete_many(session_query)
         
         # Delete the profile itself
         profiles_result = await db.suspect_profiles.delete_one({"id": profile_id})
+        await run_in_threadpool(refresh_derived_views, view_keys)
+        await bump_generation()
+        
+        # Drop image blobs that lost their last reference
+        deleted_blobs = await release_image_blobs(image_refs)
         
         # Delete images folder for this profile
         # Images are stored in /uploads/CaseNumber/SuspectName/Device/
@@ -3260,7 +4704,6 @@ async def delete_session_by_profile(profile_id: str):
         
         if remaining_profiles == 0 and session_dir.exists():
             # No more profiles for this combination - safe to delete images folder
-            import shutil
             shutil.rmtree(session_dir)
             deleted_images = 1
             logger.info(f"Deleted images folder: {session_dir}")
@@ -3278,6 +4721,7 @@ async def delete_session_by_profile(profile_id: str):
             'user_accounts_deleted': accounts_result.deleted_count,
             'suspect_profiles_deleted': profiles_result.deleted_count,
             'images_folder_deleted': deleted_images > 0,
+            'image_blobs_deleted': deleted_blobs,
             'message': f'Successfully deleted session for {person_name} ({device_info})'
         }
         
@@ -3292,14 +4736,21 @@ async def cleanup_groups_from_contacts():
     """Remove WhatsApp groups that were incorrectly added to contacts"""
     try:
         # Find and delete contacts where user_id contains @g.us or @broadcast
-        result = await db.contacts.delete_many({
+        query = {
             "$or": [
                 {"user_id": {"$regex": "@g.us"}},
                 {"user_id": {"$regex": "@broadcast"}},
                 {"phone": {"$regex": "@g.us"}},
                 {"phone": {"$regex": "@broadcast"}}
             ]
-        })
+        }
+        view_keys = await run_in_threadpool(derived_view_keys, query, ('contacts',))
+        contact_ids = await db.contacts.distinct('id', query)
+        result = await db.contacts.delete_many(query)
+        await db.group_memberships.delete_many({"contact_id": {"$in": contact_ids}})
+        await run_in_threadpool(refresh_derived_views, view_keys)
+        await run_in_threadpool(refresh_phone_links, view_keys['contacts_dedup'])
+        await bump_generation()
         
         logger.info(f"Cleaned up {result.deleted_count} group records from contacts")
         
@@ -3320,7 +4771,7 @@ async def cleanup_newsletters_from_contacts():
     try:
         # Find and delete contacts where user_id contains WhatsApp system identifiers
         # @newsletter (channels), @lid (business accounts), @bot (automated bots)
-        result = await db.contacts.delete_many({
+        query = {
             "$or": [
                 {"user_id": {"$regex": "@newsletter"}},
                 {"phone": {"$regex": "@newsletter"}},
@@ -3329,7 +4780,14 @@ async def cleanup_newsletters_from_contacts():
                 {"user_id": {"$regex": "@bot"}},
                 {"phone": {"$regex": "@bot"}}
             ]
-        })
+        }
+        view_keys = await run_in_threadpool(derived_view_keys, query, ('contacts',))
+        contact_ids = await db.contacts.distinct('id', query)
+        result = await db.contacts.delete_many(query)
+        await db.group_memberships.delete_many({"contact_id": {"$in": contact_ids}})
+        await run_in_threadpool(refresh_derived_views, view_keys)
+        await run_in_threadpool(refresh_phone_links, view_keys['contacts_dedup'])
+        await bump_generation()
         
         logger.info(f"Cleaned up {result.deleted_count} WhatsApp system records from contacts")
         
@@ -3343,27 +4801,162 @@ async def cleanup_newsletters_from_contacts():
         logger.error(f"Error cleaning up newsletters: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/admin/contacts-dedup/rebuild")
+async def rebuild_contacts_dedup_view():
+    """Recompute the whole contacts_dedup view (repair after manual database edits)"""
+    try:
+        refreshed = await run_in_threadpool(rebuild_contacts_dedup)
+        await bump_generation()
+        logger.info(f"Rebuilt contacts_dedup view: {refreshed} phone keys")
+        return {'success': True, 'phone_keys': refreshed}
+    except Exception as e:
+        logger.error(f"Error rebuilding contacts_dedup view: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/admin/password-usage/rebuild")
+async def rebuild_password_usage_view():
+    """Recompute the whole password_usage view (repair after manual database edits)"""
+    try:
+        refreshed = await run_in_threadpool(rebuild_password_usage)
+        await bump_generation()
+        logger.info(f"Rebuilt password_usage view: {refreshed} passwords")
+        return {'success': True, 'passwords': refreshed}
+    except Exception as e:
+        logger.error(f"Error rebuilding password_usage view: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/admin/whatsapp-groups/rebuild")
+async def rebuild_group_summary_view():
+    """Recompute the whole whatsapp_group_summary view (repair after manual database edits)"""
+    try:
+        refreshed = await run_in_threadpool(rebuild_group_summary)
+        await bump_generation()
+        logger.info(f"Rebuilt whatsapp_group_summary view: {refreshed} groups")
+        return {'success': True, 'groups': refreshed}
+    except Exception as e:
+        logger.error(f"Error rebuilding whatsapp_group_summary view: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/admin/link-graph/rebuild")
+async def rebuild_link_graph_edges():
+    """Recompute the whole link graph (repair after manual database edits)"""
+    try:
+        edges = await run_in_threadpool(rebuild_link_graph)
+        await bump_generation()
+        logger.info(f"Rebuilt link graph: {edges} edges")
+        return {'success': True, 'edges': edges}
+    except Exception as e:
+        logger.error(f"Error rebuilding link graph: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+SLOW_QUERY_REPORT_LIMIT = 20
+
+def index_name(key) -> str:
+    return '_'.join(f'{field}_{direction}' for field, direction in key)
+
+def profiled_query_fields(entry: Dict[str, Any]) -> List[str]:
+    """Filtered fields of a profiled operation (find / count / delete filter, first $match of an aggregation)"""
+    command = entry.get('command') or {}
+    query = command.get('filter', command.get('query', command.get('q')))
+    if query is None and command.get('pipeline'):
+        query = command['pipeline'][0].get('$match')
+    return sorted(query) if isinstance(query, dict) else []
+
+@api_router.get("/admin/indexes")
+async def get_index_report():
+    """
+    Declared vs existing indexes of every collection, indexes unused since the last mongod restart
+    ($indexStats), and the collection scans recorded by the slow query profiler (MONGO_PROFILE_SLOW_MS)
+    """
+    try:
+        collections = []
+        names = set(INDEXES) | {name for name in await db.list_collection_names() if not name.startswith('system.')}
+        for collection in sorted(names):
+            declared = {index_key(keys) for keys, _ in INDEXES.get(collection, [])}
+            existing = {index_key(info['key']): name for name, info in (await db[collection].index_information()).items()}
+            try:
+                usage = {stat['name']: stat['accesses'] async for stat in db[collection].aggregate([{'$indexStats': {}}])}
+            except Exception:
+                usage = None  # $indexStats needs the clusterMonitor role
+            collections.append({
+                'collection': collection,
+                'missing': [index_name(key) for key in declared if key not in existing],
+                'undeclared': [name for key, name in existing.items() if name != '_id_' and key not in declared],
+                'unused': [
+                    {'name': name, 'since': usage[name].get('since')}
+                    for name in existing.values() if name != '_id_' and usage and name in usage and not usage[name].get('ops')
+                ],
+                'usage': {name: int(access.get('ops', 0)) for name, access in usage.items()} if usage is not None else None
+            })
+        
+        # Collection scans from the slow query log, grouped by collection, operation and filtered fields
+        profiling = None
+        scans = {}
+        try:
+            profiling = await db.command({'profile': -1})
+            async for entry in db['system.profile'].find(
+                {'planSummary': {'$regex': '^COLLSCAN'}}, {'ns': 1, 'op': 1, 'command': 1, 'millis': 1, 'docsExamined': 1}
+            ).sort('ts', -1).limit(1000):
+                fields = profiled_query_fields(entry)
+                shape = scans.setdefault((entry.get('ns'), entry.get('op'), tuple(fields)), {
+                    'ns': entry.get('ns'), 'op': entry.get('op'), 'fields': fields,
+                    'count': 0, 'max_millis': 0, 'docs_examined': 0
+                })
+                shape['count'] += 1
+                shape['max_millis'] = max(shape['max_millis'], entry.get('millis') or 0)
+                shape['docs_examined'] += entry.get('docsExamined') or 0
+        except Exception as e:
+            logger.warning(f"Slow query log unavailable: {str(e)}")
+        
+        # A scan whose first filtered field leads no declared index points at a missing one
+        for shape in scans.values():
+            collection = (shape['ns'] or '').split('.', 1)[-1]
+            leading = {keys[0][0] for keys, _ in INDEXES.get(collection, [])}
+            shape['declared_index'] = any(field in leading for field in shape['fields'])
+        
+        return {
+            'collections': collections,
+            'profiling_level': profiling.get('was') if profiling else None,
+            'slow_ms': profiling.get('slowms') if profiling else None,
+            'collection_scans': sorted(scans.values(), key=lambda s: (-s['count'], -s['max_millis']))[:SLOW_QUERY_REPORT_LIMIT]
+        }
+        
+    except Exception as e:
+        logger.error(f"Error building index report: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.delete("/admin/cases/{case_number}")
 async def delete_case(case_number: str):
     """Delete a specific case and all its related data"""
     try:
         logger.info(f"Deleting case: {case_number}")
         
+        # Remember which image blobs this case references before its documents go
+        image_refs = set()
+        for collection, _ in IMAGE_REF_FIELDS:
+            image_refs |= await image_blob_refs(collection, {"case_number": case_number})
+        view_keys = await run_in_threadpool(derived_view_keys, {"case_number": case_number})
+        
         # Delete from all collections
         contacts_result = await db.contacts.delete_many({"case_number": case_number})
         passwords_result = await db.passwords.delete_many({"case_number": case_number})
         accounts_result = await db.user_accounts.delete_many({"case_number": case_number})
         profiles_result = await db.suspect_profiles.delete_many({"case_number": case_number})
         groups_result = await db.whatsapp_groups.delete_many({"case_number": case_number})
+        await db.group_memberships.delete_many({"case_number": case_number})
+        await db.graph_edges.delete_many({"case_number": case_number})
+        await run_in_threadpool(refresh_derived_views, view_keys)
+        await bump_generation()
         
-        # Delete images for this case
-        deleted_images = 0
-        case_dir = uploads_dir / sanitize_filename(case_number)
+        # Delete image blobs no other case still references
+        deleted_images = await release_image_blobs(image_refs)
+        
+        # Legacy per-case image folder (uploads made before the blob store)
+        case_dir = Path('/app/uploads') / sanitize_filename(case_number)
         if case_dir.exists():
-            import shutil
             shutil.rmtree(case_dir)
             # Count files deleted (approximate)
-            deleted_images = contacts_result.deleted_count  # Rough estimate
+            deleted_images += contacts_result.deleted_count  # Rough estimate
         
         logger.info(f"Case {case_number} deleted: {contacts_result.deleted_count} contacts, {passwords_result.deleted_count} passwords, {accounts_result.deleted_count} user accounts, {profiles_result.deleted_count} suspect profiles, {groups_result.deleted_count} WhatsApp groups")
         
@@ -3384,6 +4977,113 @@ async def delete_case(case_number: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 # Include the router in the main app
+# --- Response cache ---
+# Heavy read endpoints only change when the dataset does. Every write path (each chunk an
+# upload inserts, deletes, cleanups, view rebuilds) bumps a generation counter kept in Mongo,
+# and each worker caches the full responses of CACHED_PATHS under the generation they were
+# computed for, so all uvicorn workers stop serving an entry as soon as any of them changes
+# the data - including while a long upload is still being written.
+CACHED_PATHS = re.compile(
+    r'^/api/(contacts/deduplicated|credentials/deduplicated|credentials/password-analysis'
+    r'|whatsapp-groups|filters/[^/]+|stats|admin/cases)$'
+)
+# Conditional GET: list and aggregate endpoints carry a strong ETag of the dataset generation
+# and answer If-None-Match with 304 before the handler runs. The tag is derived from exactly what
+# a cache entry is keyed on (generation, path, query, Accept), so a cached body is never served
+# under a tag it was not built for.
+ETAG_PATHS = re.compile(
+    r'^/api/(contacts|passwords|user-accounts|contacts/deduplicated|passwords/deduplicated'
+    r'|user-accounts/deduplicated|credentials/deduplicated|credentials/password-analysis'
+    r'|whatsapp-groups|filters/[^/]+|stats|admin/cases|suspect-profile|suspect-info)$'
+)
+GENERATION_ID = 'dataset_generation'
+
+async def dataset_generation() -> int:
+    state = await db.meta.find_one({'_id': GENERATION_ID})
+    return state['generation'] if state else 0
+
+async def bump_generation():
+    """Invalidate the cached responses of every worker (call after the data has changed)"""
+    await db.meta.update_one({'_id': GENERATION_ID}, {'$inc': {'generation': 1}}, upsert=True)
+
+def bump_generation_sync():
+    sync_db.meta.update_one({'_id': GENERATION_ID}, {'$inc': {'generation': 1}}, upsert=True)
+
+class ResponseCache:
+    """Per-worker LRU of response bodies tagged with the dataset generation, bounded in bytes"""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (generation, body, headers)
+    
+    def get(self, key, generation: int):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != generation:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+    
+    def put(self, key, generation: int, body: bytes, headers: Dict[str, str]):
+        if len(body) > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = (generation, body, headers)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+    
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+response_cache = ResponseCache(int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(256 * 1024 * 1024))))
+
+def dataset_etag(request: Request, generation: int) -> str:
+    """Strong ETag: dataset generation and the response variant (path, query, Accept)"""
+    variant = f"{request.url.path}?{request.url.query}|{request.headers.get('accept', '')}"
+    return f'"{generation}-{hashlib.sha1(variant.encode()).hexdigest()[:20]}"'
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in candidates or etag in candidates
+
+@app.middleware("http")
+async def cache_responses(request: Request, call_next):
+    path = request.url.path
+    if request.method != 'GET' or not ETAG_PATHS.match(path):
+        return await call_next(request)
+    
+    generation = await dataset_generation()
+    etag = dataset_etag(request, generation)
+    validators = {'ETag': etag, 'Cache-Control': 'no-cache'}  # browsers revalidate on every load
+    if etag_matches(etag, request.headers.get('if-none-match')):
+        return Response(status_code=304, headers=validators)
+    
+    # NDJSON streams are passed through rather than buffered into the cache
+    cacheable = response_cache.max_bytes and CACHED_PATHS.match(path) and not wants_ndjson(request)
+    key = (path, request.url.query, request.headers.get('accept', ''))
+    cached = response_cache.get(key, generation) if cacheable else None
+    if cached is not None:
+        return Response(content=cached[1], status_code=200, headers={**cached[2], **validators})
+    
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+    if not cacheable:
+        response.headers.update(validators)
+        return response
+    body = b''.join([chunk async for chunk in response.body_iterator])
+    headers = dict(response.headers)
+    response_cache.put(key, generation, body, headers)
+    return Response(content=body, status_code=200, headers={**headers, **validators})
+
 app.include_router(api_router)
 
 app.add_middleware(
@@ -3392,8 +5092,287 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# --- Index registry ---
+# Every index the API's query shapes rely on: collection -> [(keys, options)].
+# ensure_indexes creates the missing ones at startup; GET /admin/indexes reports missing,
+# undeclared and unused ($indexStats) indexes and the collection scans in the slow query log.
+def declare_index(*keys, **options) -> Tuple[List[Tuple[str, int]], Dict[str, Any]]:
+    """Registry entry: declare_index('field'), declare_index('a', ('b', -1), unique=True)"""
+    return [(key, 1) if isinstance(key, str) else key for key in keys], options
+
+SESSION_KEYS = ('case_number', 'person_name', 'device_info')
+
+INDEXES = {
+    'contacts': [
+        declare_index('id'),
+        declare_index('photo_path'),  # image blob garbage collection
+        # Phone lookups (details, dedup, suspect matching)
+        declare_index('normalized_phone'),
+        declare_index('phone_suffix9'),
+        declare_index('case_number', 'suspect_phone'),
+        # List filters (the most selective dimension, the rest is filtered on the fetched range),
+        # session deletes and the admin cases overview (covered by the trailing upload_session_id)
+        declare_index(*SESSION_KEYS, 'upload_session_id'),
+        declare_index('upload_session_id'),
+        declare_index('source'),
+        declare_index('created_at', '_id'),
+        declare_index('search_terms'),
+    ],
+    'passwords': [
+        declare_index('id'),
+        declare_index(*SESSION_KEYS, 'upload_session_id'),
+        declare_index('upload_session_id'),
+        declare_index('created_at', '_id'),
+        declare_index('search_terms'),
+        # Credential dedup partitions and password reuse view
+        declare_index('credential_key'),
+        declare_index('password_key'),
+    ],
+    'user_accounts': [
+        declare_index('id'),
+        declare_index(*SESSION_KEYS, 'upload_session_id'),
+        declare_index('upload_session_id'),
+        declare_index('source'),
+        declare_index('created_at', '_id'),
+        declare_index('search_terms'),
+        declare_index('credential_key'),
+        declare_index('password_key'),
+    ],
+    'whatsapp_groups': [
+        declare_index('group_id'),
+        declare_index('photo_path'),
+        declare_index(*SESSION_KEYS),
+        declare_index('upload_session_id'),
+    ],
+    'suspect_profiles': [
+        declare_index('id'),
+        declare_index('profile_image_path'),
+        declare_index('upload_session_id'),
+        declare_index(*SESSION_KEYS, ('created_at', -1)),
+    ],
+    'upload_jobs': [
+        declare_index('id'),
+    ],
+    # WhatsApp group membership edges (group listing, member lookups, deletes)
+    'group_memberships': [
+        declare_index('group_id', 'phone'),
+        declare_index('contact_id'),
+        declare_index('normalized_phone'),
+        declare_index(*SESSION_KEYS),
+        declare_index('upload_session_id'),
+    ],
+    # Link graph traversal (both edge directions) and deletes
+    'graph_edges': [
+        declare_index('source', 'type'),
+        declare_index('target', 'type'),
+        declare_index(*SESSION_KEYS),
+        declare_index('upload_session_id'),
+    ],
+    'contacts_dedup': [
+        declare_index('dedup_key', unique=True),
+        declare_index('sort_name', 'first_id'),
+        declare_index('cases'),
+    ],
+    'password_usage': [
+        declare_index('password', unique=True),
+        declare_index(('usage_count', -1), ('password', -1)),
+    ],
+    'whatsapp_group_summary': [
+        declare_index('group_id', unique=True),
+        declare_index('order_key'),
+        declare_index('group_name', 'order_key'),
+        declare_index('member_count', 'order_key'),
+        declare_index('upload_count', 'order_key'),
+        declare_index('cases'),
+        declare_index('devices'),
+        declare_index('suspects'),
+    ],
+}
+
+def index_key(key) -> Tuple[Tuple[str, Any], ...]:
+    """Comparable form of an index key (index_information reports directions as floats)"""
+    items = key.items() if isinstance(key, dict) else key
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction) for field, direction in items)
+
+async def reconcile_indexes():
+    """Create the declared indexes that are missing; drop undeclared ones when INDEX_DROP_UNDECLARED is set"""
+    drop_undeclared = os.environ.get('INDEX_DROP_UNDECLARED', '').lower() in ('1', 'true', 'yes')
+    for collection, declared in INDEXES.items():
+        existing = {index_key(info['key']): name for name, info in (await db[collection].index_information()).items()}
+        declared_keys = set()
+        for keys, options in declared:
+            declared_keys.add(index_key(keys))
+            if index_key(keys) not in existing:
+                logger.info(f"Creating index {collection} {keys}")
+                await db[collection].create_index(keys, **options)
+        for key, name in existing.items():
+            if name != '_id_' and key not in declared_keys:
+                if drop_undeclared:
+                    logger.info(f"Dropping undeclared index {collection}.{name}")
+                    await db[collection].drop_index(name)
+                else:
+                    logger.info(f"Undeclared index {collection}.{name} (set INDEX_DROP_UNDECLARED to drop it)")
+
+# Every uvicorn worker runs the startup hook. The migrations below check "is there anything left
+# to do" and then write, so concurrent runs would duplicate their work: a lease in meta lets one
+# worker run them at a time, and the others skip them.
+MIGRATION_LOCK_ID = 'startup_migrations'
+MIGRATION_LOCK_SECONDS = 3600  # lease, so a worker that died mid-migration does not block the next start
+
+async def acquire_migration_lock() -> bool:
+    now = datetime.now(timezone.utc)
+    try:
+        await db.meta.find_one_and_update(
+            {'_id': MIGRATION_LOCK_ID, '$or': [{'locked_until': None}, {'locked_until': {'$lt': now}}]},
+            {'$set': {'locked_until': now + timedelta(seconds=MIGRATION_LOCK_SECONDS), 'owner': INGEST_WORKER_ID}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # The lock document exists and its lease is held by another worker
+        return False
+
+async def release_migration_lock():
+    await db.meta.update_one({'_id': MIGRATION_LOCK_ID, 'owner': INGEST_WORKER_ID}, {'$set': {'locked_until': None}})
+
+async def run_startup_migrations():
+    await backfill_phone_keys()
+    await backfill_search_terms()
+    await backfill_credential_keys()
+    await backfill_group_memberships()
+    
+    # Build the views once for databases that predate them
+    if not await db.contacts_dedup.estimated_document_count() and await db.contacts.estimated_document_count():
+        logger.info("Building contacts_dedup view...")
+        await run_in_threadpool(rebuild_contacts_dedup)
+    if not await db.password_usage.estimated_document_count() and (
+        await db.passwords.estimated_document_count() or await db.user_accounts.estimated_document_count()
+    ):
+        logger.info("Building password_usage view...")
+        await run_in_threadpool(rebuild_password_usage)
+    if not await db.whatsapp_group_summary.estimated_document_count() and await db.whatsapp_groups.estimated_document_count():
+        logger.info("Building whatsapp_group_summary view...")
+        await run_in_threadpool(rebuild_group_summary)
+    # The graph is not emptiness-checked: a build that died part-way leaves edges behind
+    graph_state = await db.meta.find_one({'_id': LINK_GRAPH_STATE_ID}) or {}
+    if not graph_state.get('built'):
+        logger.info("Building link graph...")
+        await run_in_threadpool(rebuild_link_graph)
+
+_job_heartbeat = None
+
+@app.on_event("startup")
+async def ensure_indexes():
+    """Reconcile the index registry and run the startup migrations"""
+    await reconcile_indexes()
+    
+    # Opt-in slow query log for /admin/indexes (needs the dbAdmin role)
+    slow_ms = os.environ.get('MONGO_PROFILE_SLOW_MS')
+    if slow_ms:
+        try:
+            await db.command({'profile': 1, 'slowms': int(slow_ms)})
+        except Exception as e:
+            logger.warning(f"Could not enable the slow query profiler: {str(e)}")
+    
+    if await acquire_migration_lock():
+        try:
+            await run_startup_migrations()
+        finally:
+            await release_migration_lock()
+    else:
+        logger.info("Startup migrations are running in another worker")
+    
+    interrupted = await fail_interrupted_jobs(stale_jobs_query())
+    if interrupted:
+        logger.warning(f"Marked {interrupted} upload jobs interrupted by a restart as failed")
+    global _job_heartbeat
+    _job_heartbeat = asyncio.create_task(heartbeat_upload_jobs())
+
+async def backfill_phone_keys():
+    """Migration: store normalized_phone / phone_suffix9 on contacts ingested before those fields existed"""
+    updated = 0
+    operations = []
+    async for contact in db.contacts.find({'normalized_phone': {'$exists': False}}, {'_id': 1, 'phone': 1}):
+        operations.append(UpdateOne({'_id': contact['_id']}, {'$set': phone_keys(contact.get('phone'))}))
+        if len(operations) >= 1000:
+            await db.contacts.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await db.contacts.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    if updated:
+        logger.info(f"Backfilled phone keys on {updated} contacts")
+
+async def backfill_credential_keys():
+    """Migration: store credential_key / password_key on passwords / user_accounts ingested before they existed"""
+    for collection in ('passwords', 'user_accounts'):
+        updated = 0
+        operations = []
+        missing = {'$or': [{'credential_key': {'$exists': False}}, {'password_key': {'$exists': False}}]}
+        async for doc in db[collection].find(missing, {'raw_data': 0, 'search_terms': 0}):
+            operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {
+                'credential_key': credential_key(collection, doc),
+                'password_key': password_key(collection, doc)
+            }}))
+            if len(operations) >= 1000:
+                await db[collection].bulk_write(operations, ordered=False)
+                updated += len(operations)
+                operations = []
+        if operations:
+            await db[collection].bulk_write(operations, ordered=False)
+            updated += len(operations)
+        if updated:
+            logger.info(f"Backfilled credential keys on {updated} {collection}")
+
+async def backfill_group_memberships():
+    """Migration: write group_memberships edges for databases that predate the collection"""
+    if await db.group_memberships.estimated_document_count():
+        return
+    created = 0
+    edges = []
+    async for contact in db.contacts.find(
+        {'whatsapp_groups': {'$exists': True, '$ne': []}},
+        {'_id': 0, 'id': 1, 'phone': 1, 'normalized_phone': 1, 'case_number': 1, 'person_name': 1,
+         'device_info': 1, 'upload_session_id': 1, 'whatsapp_groups': 1}
+    ).sort('_id', 1):
+        edges.extend(group_membership_edges(contact))
+        if len(edges) >= 1000:
+            await db.group_memberships.insert_many(edges)
+            created += len(edges)
+            edges = []
+    if edges:
+        await db.group_memberships.insert_many(edges)
+        created += len(edges)
+    if created:
+        logger.info(f"Backfilled {created} group membership edges")
+
+async def backfill_search_terms():
+    """Migration: index documents stored before search_terms existed"""
+    for collection, fields in SEARCH_FIELDS.items():
+        updated = 0
+        operations = []
+        async for doc in db[collection].find({'search_terms': {'$exists': False}}, {field: 1 for field in fields}):
+            operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {'search_terms': search_terms(collection, doc)}}))
+            if len(operations) >= 1000:
+                await db[collection].bulk_write(operations, ordered=False)
+                updated += len(operations)
+                operations = []
+        if operations:
+            await db[collection].bulk_write(operations, ordered=False)
+            updated += len(operations)
+        if updated:
+            logger.info(f"Backfilled search terms on {updated} {collection}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    if _job_heartbeat is not None:
+        _job_heartbeat.cancel()
+    client.close()
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+    if _parse_manager is not None:
+        _parse_manager.shutdown()
\ No newline at end of file
@@ -17,6 +17,8 @@ import { cleanDisplayName } from "@/lib/utils";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = BACKEND_URL;
+// An upload job whose status has not changed for this long is treated as lost
+const UPLOAD_STALL_TIMEOUT_MS = 5 * 60 * 1000;
 
 function App() {
   const [searchParams] = useSearchParams();
@@ -277,8 +279,38 @@ function App() {
         headers: { 'Content-Type': 'multipart/form-data' },
       });
       
+      // Upload is processed in the background - poll the job until it finishes
+      const jobId = response.data.id;
+      const toastId = toast.loading("Upload queued...");
+      let job = response.data;
+      // Give up when the job stops reporting progress or heartbeats (e.g. the server went away)
+      let lastSignal = `${job.updated_at}|${job.heartbeat_at}`;
+      let lastChange = Date.now();
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        job = (await axios.get(`${API}/upload/jobs/${jobId}`)).data;
+        const signal = `${job.updated_at}|${job.heartbeat_at}`;
+        if (signal !== lastSignal) {
+          lastSignal = signal;
+          lastChange = Date.now();
+        } else if (Date.now() - lastChange > UPLOAD_STALL_TIMEOUT_MS) {
+          toast.error("Upload stopped responding - check the job later or retry", { id: toastId });
+          return;
+        }
+        toast.loading(
+          `Processing: ${job.stage} (${job.records_processed} records, ${Math.round(job.throughput)}/s)`,
+          { id: toastId }
+        );
+      }
+      
+      if (job.status === 'failed') {
+        toast.error(job.error || "Upload failed", { id: toastId });
+        return;
+      }
+      
       toast.success(
-        `Upload successful! Parsed ${response.data.contacts} contacts, ${response.data.passwords} passwords, ${response.data.user_accounts} accounts`
+        `Upload successful! Parsed ${job.result.contacts} contacts, ${job.result.passwords} passwords, ${job.result.user_accounts} accounts`,
+        { id: toastId }
       );
       
       setShowUploadDialog(false);
@@ -389,7 +421,8 @@ function App() {
     try {
       const response = await axios.get(`${API}/contacts/${contact.id}/details`);
       setContactDetails(response.data);
-      setSelectedContact(contact);
+      // List rows are lean - the full XML record (raw_data) comes with the details
+      setSelectedContact({ ...contact, raw_data: response.data.main_contact?.raw_data });
     } catch (error) {
       console.error("Error loading contact details:", error);
       toast.error("Failed to load contact details");
@@ -400,7 +433,7 @@ function App() {
     try {
       const response = await axios.get(`${API}/credentials/${credential.id}/details`);
       setCredentialDetails(response.data);
-      setSelectedCredential(credential);
+      setSelectedCredential({ ...credential, raw_data: response.data.main_credential?.raw_data });
     } catch (error) {
       console.error("Error loading credential details:", error);
       toast.error("Failed to load credential details");